@@ -3,18 +3,15 @@ import pandas as pd
 import plotly.express as px
 from datetime import datetime
 
-from data_analysis.test_code import data_handler
-
-myDH = data_handler.dataHandler()
-
-all_data = pd.concat(myDH.unique.values())
-all_data["timestamp"] = pd.to_datetime(all_data["timestamp"])
-
-min_time = all_data["timestamp"].min()
-max_time = all_data["timestamp"].max()
+from data_analysis.test_code import catalog, instrument, lod
 
 # Streamlit configs
 st.set_page_config(page_title="Animal Tracking Maps", layout="wide")
+myDH = catalog.select_study()
+
+min_time = myDH.index.min_time
+max_time = myDH.index.max_time
+
 st.sidebar.header("Filter by Time")
 
 # Time slider for filtering
@@ -26,60 +23,111 @@ time_range = st.sidebar.slider(
     format="MM/DD/YY - hh:mm",
 )
 
-# Filter the data based on the selected time range
-filtered_data = all_data[
-    (all_data["timestamp"] >= time_range[0]) & (all_data["timestamp"] <= time_range[1])
-]
+# Area filter: only fixes inside a lat/long box, answered by the spatial index
+st.sidebar.header("Filter by Area")
+extent = myDH.spatial
+bbox = None
+if st.sidebar.checkbox("Limit to an area", value=False):
+    south, north = st.sidebar.slider(
+        "Latitude:",
+        min_value=float(extent.south),
+        max_value=float(extent.north),
+        value=(float(extent.south), float(extent.north)),
+        format="%.4f",
+    )
+    west, east = st.sidebar.slider(
+        "Longitude:",
+        min_value=float(extent.west),
+        max_value=float(extent.east),
+        value=(float(extent.west), float(extent.east)),
+        format="%.4f",
+    )
+    bbox = (south, west, north, east)
+
+# Level of detail: cap how many points are sent to the browser
+MAP_ZOOM = 10
+st.sidebar.header("Level of Detail")
+point_budget = st.sidebar.slider(
+    "Maximum points on the dot map:",
+    min_value=1000,
+    max_value=50000,
+    value=lod.point_budget(MAP_ZOOM),
+    step=1000,
+)
+downsample_method = st.sidebar.selectbox("Downsampling method:", ["grid", "stride", "lttb"], index=0)
+
+# Filter the data based on the selected time range (and area)
+filtered_data = myDH.query(time_range[0], time_range[1], bbox=bbox)
+
+with instrument.span("Data_Visualization.downsample", rows=len(filtered_data)) as span:
+    dot_data = lod.downsample(filtered_data, zoom=MAP_ZOOM, budget=point_budget, method=downsample_method)
+    span.kept = len(dot_data)
+with instrument.span("Data_Visualization.density_bins", rows=len(filtered_data)) as span:
+    # Summed from the precomputed per-day/per-month bins; an area filter bins the selected fixes directly
+    if bbox is None:
+        heat_data = myDH.heat_bins(time_range[0], time_range[1], zoom=MAP_ZOOM)
+    else:
+        heat_data = lod.density_bins(filtered_data, zoom=MAP_ZOOM)
+    span.cells = len(heat_data)
 
 col1, col2 = st.columns(2)
 
-# Map configuration
-latitude_center = filtered_data["location-lat"].mean()
-longitude_center = filtered_data["location-long"].mean()
+# Map configuration: centered on the selected area, or on the mean of the fixes
+if bbox is not None:
+    latitude_center, longitude_center = (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
+else:
+    latitude_center = filtered_data["location-lat"].mean()
+    longitude_center = filtered_data["location-long"].mean()
 
 # Dot Plot 
 with col1:
     st.header("Dot Plot")
-    dot_map = px.scatter_mapbox(
-        filtered_data,
-        lat="location-lat",
-        lon="location-long",
-        color="name",  
-        hover_name="name",
-        hover_data={"timestamp": True},
-        zoom=10,
+    with instrument.span("Data_Visualization.dot_figure", rows=len(dot_data)):
+        dot_map = px.scatter_mapbox(
+            dot_data,
+            lat="location-lat",
+            lon="location-long",
+            color="name",  
+            hover_name="name",
+            hover_data={"timestamp": True},
+            zoom=MAP_ZOOM,
         
-        center={"lat": latitude_center, "lon": longitude_center},
-        title="Animal Dot Map",
+            center={"lat": latitude_center, "lon": longitude_center},
+            title="Animal Dot Map",
         
-    )
-    dot_map.update_layout(
-        mapbox_style="open-street-map",
-        height=500,
-        margin={"r": 0, "t": 40, "l": 0, "b": 0},
-    )
-    dot_map.update_traces(marker=dict(size=20))
-    st.plotly_chart(dot_map, use_container_width=True)
+        )
+        dot_map.update_layout(
+            mapbox_style="open-street-map",
+            height=500,
+            margin={"r": 0, "t": 40, "l": 0, "b": 0},
+        )
+        dot_map.update_traces(marker=dict(size=20))
+    # Serializes the figure and sends it to the browser
+    with instrument.span("Data_Visualization.dot_render", rows=len(dot_data)):
+        st.plotly_chart(dot_map, use_container_width=True)
 
 # Heatmap 
 with col2:
     st.header("Heatmap")
-    heatmap = px.density_mapbox(
-        filtered_data,
-        lat="location-lat",
-        lon="location-long",
-        z=None,  
-        radius=20,  #
-        zoom=10,
-        center={"lat": latitude_center, "lon": longitude_center},
-        title="Animal Heatmap",
-    )
-    heatmap.update_layout(
-        mapbox_style="open-street-map",
-        height=500,
-        margin={"r": 0, "t": 40, "l": 0, "b": 0},
-    )
-    st.plotly_chart(heatmap, use_container_width=True)
+    with instrument.span("Data_Visualization.heat_figure", rows=len(heat_data)):
+        heatmap = px.density_mapbox(
+            heat_data,
+            lat="location-lat",
+            lon="location-long",
+            z="count",  # pre-binned fix counts per map cell
+            radius=20,  #
+            zoom=MAP_ZOOM,
+            center={"lat": latitude_center, "lon": longitude_center},
+            title="Animal Heatmap",
+        )
+        heatmap.update_layout(
+            mapbox_style="open-street-map",
+            height=500,
+            margin={"r": 0, "t": 40, "l": 0, "b": 0},
+        )
+    with instrument.span("Data_Visualization.heat_render", rows=len(heat_data)):
+        st.plotly_chart(heatmap, use_container_width=True)
 
 # Display selected time range below the maps
 st.sidebar.write(f"Showing data from **{time_range[0]}** to **{time_range[1]}**")
+st.sidebar.write(f"Dot map: **{len(dot_data)}** of {len(filtered_data)} fixes, heatmap: **{len(heat_data)}** cells")
@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from .trajectory import DIRECTIONS, steps_for
+except ImportError:
+    from trajectory import DIRECTIONS, steps_for
+
+NS_PER_MINUTE = 60 * 10 ** 9
+DAY_NS = 1440 * NS_PER_MINUTE
+
+# Minutes of local mean solar time per degree of longitude east of Greenwich
+SOLAR_MINUTES_PER_DEGREE = 4.0
+
+# Ties between directions go to the alphabetically first one, like Series.mode()
+_BY_NAME = np.argsort(DIRECTIONS.astype(str), kind='stable')
+
+# Columns of the profile table; a windowed profile adds 'day' after 'section'
+PROFILE_COLUMNS = [
+    'bin_minutes', 'section', 'section_label', 'fixes', 'steps', 'distance', 'mean_distance',
+    'median_distance', 'mean_bearing', 'bearing_strength', 'predominant_direction',
+] + list(DIRECTIONS)
+
+
+def section_labels(sections, interval_minutes):
+    """
+    'HH:MM to HH:MM' labels for time-of-day sections of `interval_minutes`. Each distinct
+    label is formatted once and the labels are gathered by section number.
+    """
+    sections = np.asarray(sections, dtype=np.int64)
+    if not len(sections):
+        return np.empty(0, dtype=object)
+    labels = np.array([
+        f"{(x * interval_minutes) // 60:02d}:{(x * interval_minutes) % 60:02d} to "
+        f"{((x + 1) * interval_minutes) // 60:02d}:{((x + 1) * interval_minutes) % 60:02d}"
+        for x in range(sections.max() + 1)
+    ], dtype=object)
+    return labels[sections]
+
+
+def local_time(times, lon=None, solar=False, offset_minutes=0):
+    """
+    Shift timestamps from UTC to local time.
+
+    Args:
+        times: Timestamps as datetime64 or int64 nanoseconds.
+        lon (np.ndarray): Longitude of each fix in degrees, needed for solar time.
+        solar (bool): Use local mean solar time: 4 minutes later per degree east. Fixes
+            without a longitude stay on UTC.
+        offset_minutes (float): Fixed shift added on top, e.g. a time zone's UTC offset.
+
+    Returns:
+        tuple: (local day number since the epoch, minute of the local day), as int64 arrays.
+    """
+    local = np.asarray(times).astype('datetime64[ns]').view('int64')
+    shift = np.full(len(local), float(offset_minutes))
+    if solar:
+        shift += np.nan_to_num(np.asarray(lon, dtype=np.float64) * SOLAR_MINUTES_PER_DEGREE)
+    if shift.any():
+        local = local + np.round(shift * NS_PER_MINUTE).astype(np.int64)
+    return local // DAY_NS, (local % DAY_NS) // NS_PER_MINUTE
+
+
+def _step_columns(steps, day, minute, by):
+    # Per-step values whose sums and counts make up a profile; 'code' indexes DIRECTIONS (-1: no bearing)
+    distance = steps['distance'].values.astype(np.float64)
+    bearing = steps['bearing'].values.astype(np.float64)
+    valid = np.isfinite(bearing)
+    radians = np.radians(bearing)
+    frame = pd.DataFrame({
+        'day': day,
+        'minute': minute,
+        'distance': distance,
+        'sin': np.sin(radians),
+        'cos': np.cos(radians),
+        'code': np.where(valid, np.floor((np.where(valid, bearing, 0) + 22.5) / 45) % 8, -1).astype(np.int64),
+    })
+    if by is not None:
+        frame.insert(0, by, steps[by].values)
+    return frame
+
+
+def _finish(table, interval_minutes):
+    # Circular mean, predominant direction and labels from the summed columns
+    with np.errstate(invalid='ignore', divide='ignore'):
+        bearings = table[list(DIRECTIONS)].sum(axis=1).values
+        table['mean_bearing'] = np.where(bearings > 0, np.degrees(np.arctan2(table['sin'], table['cos'])) % 360, np.nan)
+        table['bearing_strength'] = np.where(bearings > 0, np.hypot(table['sin'], table['cos']) / bearings, np.nan)
+    counts = table[list(DIRECTIONS[_BY_NAME])].values
+    best = DIRECTIONS[_BY_NAME][counts.argmax(axis=1)] if len(counts) else np.empty(0, dtype=object)
+    table['predominant_direction'] = np.where(bearings > 0, best, None)
+    table['bin_minutes'] = interval_minutes
+    table['section_label'] = section_labels(table['section'].values, interval_minutes)
+    return table
+
+
+def _profile(frame, keys, interval_minutes):
+    # One grouping; sums and counts per group are bincounts over its group numbers
+    grouped = frame.groupby(keys, sort=True, observed=True)
+    group = grouped.ngroup().values
+    sizes = grouped.size()
+    n = len(sizes)
+    distance = frame['distance'].values
+    moved = np.isfinite(distance)
+    code = frame['code'].values
+    headed = code >= 0
+    columns = {key: sizes.index.get_level_values(key) for key in keys}
+    columns['fixes'] = sizes.values
+    columns['steps'] = np.bincount(group[moved], minlength=n)
+    columns['distance'] = np.bincount(group[moved], weights=distance[moved], minlength=n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        columns['mean_distance'] = columns['distance'] / columns['steps']
+    columns['median_distance'] = grouped['distance'].median().values
+    columns['sin'] = np.bincount(group[headed], weights=frame['sin'].values[headed], minlength=n)
+    columns['cos'] = np.bincount(group[headed], weights=frame['cos'].values[headed], minlength=n)
+    counts = np.bincount(group[headed] * len(DIRECTIONS) + code[headed], minlength=n * len(DIRECTIONS))
+    columns.update(zip(DIRECTIONS, counts.reshape(n, len(DIRECTIONS)).T))
+    return _finish(pd.DataFrame(columns), interval_minutes)
+
+
+def _rolling_profile(frame, keys, interval_minutes, window):
+    # Windows ending on each local day: rolling over the day (not the fix time) makes every
+    # window cover whole days, and the last step of a day sees the complete window.
+    frame = frame.assign(day=frame['day'].values.astype('datetime64[D]').astype('datetime64[ns]'), one=1.0)
+    for k, direction in enumerate(DIRECTIONS):
+        frame[direction] = (frame['code'].values == k).astype(np.float64)
+    # Rolling results come out group by group, in each group's row order: sorting by group
+    # number, then day, lines them up with the frame row for row
+    frame['group'] = frame.groupby(keys, sort=True, observed=True).ngroup()
+    frame = frame.sort_values(['group', 'day'], kind='stable').reset_index(drop=True)
+    rolling = frame.groupby('group', sort=True).rolling(f"{window}D", on='day')
+
+    table = frame[keys + ['day']].copy()
+    sums = rolling[['one', 'distance', 'sin', 'cos'] + list(DIRECTIONS)].sum()
+    for column in sums.columns:
+        table['fixes' if column == 'one' else column] = sums[column].values
+    table['steps'] = rolling['distance'].count().values
+    table['median_distance'] = rolling['distance'].median().values
+    table['mean_distance'] = table['distance'] / table['steps']
+
+    last = np.ones(len(frame), dtype=bool)
+    if len(frame) > 1:
+        group, day = frame['group'].values, frame['day'].values
+        last[:-1] = (group[1:] != group[:-1]) | (day[1:] != day[:-1])
+    table = table[last].reset_index(drop=True)
+    table['fixes'] = table['fixes'].astype(np.int64)
+    table['steps'] = table['steps'].astype(np.int64)
+    table[list(DIRECTIONS)] = table[list(DIRECTIONS)].astype(np.int64)
+    return _finish(table, interval_minutes)
+
+
+def activity_profile(steps, bin_minutes=90, window=None, solar=False, offset_minutes=0, by='name'):
+    """
+    Daily activity profile: step lengths and headings per time-of-day section.
+
+    All tags and sections of one bin width are aggregated in a single grouped pass.
+
+    Args:
+        steps (pd.DataFrame): A step feature table (dataHandler.steps or a slice of it, which
+            may hold many tags) or a single track with 'timestamp', 'location-lat' and
+            'location-long' columns.
+        bin_minutes (int or list): Section width in minutes, or several widths profiled
+            together (told apart by the 'bin_minutes' column).
+        window (int): Length in days of rolling windows. Each local day with steps then gets
+            the profile of the `window` days ending on it. None profiles all steps at once.
+        solar (bool): Bin by local mean solar time at each fix instead of UTC.
+        offset_minutes (float): Fixed shift from UTC, e.g. a time zone's offset.
+        by (str): Column profiled separately, normally the tag. None pools every step.
+
+    Returns:
+        pd.DataFrame: One row per (by, bin width, section[, day]) with PROFILE_COLUMNS:
+            'fixes' (rows in the section, including each track's first fix), 'steps' (rows
+            with a step length), total 'distance', 'mean_distance' and 'median_distance'
+            (m) over the steps, 'mean_bearing' (circular mean, degrees), 'bearing_strength'
+            (resultant length, 0 = no preferred heading, 1 = all alike), the most common
+            of the 8 directions and a count per direction.
+    """
+    steps = steps_for(steps)
+    if by is not None and by not in steps:
+        by = None
+    lon = steps['location-long'].values if solar else None
+    day, minute = local_time(steps['timestamp'].values, lon, solar, offset_minutes)
+    frame = _step_columns(steps, day, minute, by)
+
+    keys = ([by] if by is not None else []) + ['section']
+    tables = []
+    for interval in np.atleast_1d(bin_minutes):
+        interval = int(interval)
+        part = frame.assign(section=frame['minute'].values // interval)
+        if window is None:
+            tables.append(_profile(part, keys, interval))
+        else:
+            tables.append(_rolling_profile(part, keys, interval, window))
+    table = pd.concat(tables, ignore_index=True) if len(tables) > 1 else tables[0]
+
+    columns = ([by] if by is not None else []) + PROFILE_COLUMNS
+    if window is not None:
+        columns.insert(columns.index('section') + 1, 'day')
+    return table[columns]
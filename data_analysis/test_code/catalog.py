@@ -0,0 +1,283 @@
+import collections
+import glob
+import os
+import threading
+
+import pandas as pd
+
+try:
+    from . import data_handler
+except ImportError:
+    import data_handler
+
+# Datasets shipped with the app, found relative to this file rather than the working directory
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data'))
+
+# Memory the loaded studies may hold before the least recently used ones are dropped.
+# Override with TRACKING_CACHE_MB.
+MAX_BYTES = int(float(os.environ.get('TRACKING_CACHE_MB', 4096)) * 2 ** 20)
+
+# Movebank columns describing a study; read from the first row only
+METADATA_COLUMNS = {'study-name': 'name', 'individual-taxon-canonical-name': 'species'}
+
+
+class Study:
+    """
+    One registered dataset: where its CSV is and how to thin it. Nothing is read until
+    the study's metadata or data is first requested.
+    """
+
+    def __init__(self, key, csv_path, name=None, species=None, time_interval=pd.Timedelta(hours=5), min_distance=75):
+        self.key = key
+        self.csv_path = os.path.abspath(csv_path)
+        self._name = name
+        self._species = species
+        self._metadata = None
+        self.time_interval = pd.Timedelta(time_interval)
+        self.min_distance = min_distance
+
+    @property
+    def metadata(self):
+        # Read on first use, so registering many studies costs no I/O
+        if self._metadata is None:
+            self._metadata = read_metadata(self.csv_path)
+        return self._metadata
+
+    @property
+    def name(self):
+        return self.metadata['name'] if self._name is None else self._name
+
+    @property
+    def species(self):
+        return self.metadata['species'] if self._species is None else self._species
+
+    @property
+    def label(self):
+        return f"{self.key} ({self.species})" if self.species else self.key
+
+    def __repr__(self):
+        return f"Study({self.key!r}, {self.csv_path!r})"
+
+
+def read_metadata(csv_path):
+    """
+    Return the study name and species of a Movebank CSV from its first row, as a dict
+    with 'name' and 'species' (None when the file lacks the column).
+    """
+    metadata = dict.fromkeys(METADATA_COLUMNS.values())
+    try:
+        first = pd.read_csv(csv_path, nrows=1, usecols=lambda column: column in METADATA_COLUMNS)
+    except (OSError, ValueError, pd.errors.ParserError):
+        return metadata
+    for column, field in METADATA_COLUMNS.items():
+        if column in first and len(first) and pd.notna(first[column].iloc[0]):
+            metadata[field] = str(first[column].iloc[0])
+    return metadata
+
+
+class Catalog:
+    """
+    Registry of Movebank studies with a process-wide cache of their loaded dataHandlers.
+
+    Studies are loaded on first request, so a page serving one study never reads the
+    others. Loaded handlers are kept in least-recently-used order; once their combined
+    size (dataHandler.memory_usage) passes max_bytes, the least recently used ones are
+    dropped and reloaded from their cache files when next requested. Callers must treat
+    the handlers as read-only, since every page and session sees the same objects.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._studies = {}
+        self._default = None
+        # (path, interval, min_distance) -> (mtime, handler, bytes), least recently used first
+        self._loaded = collections.OrderedDict()
+        # Guards _loaded and _loading; held only for bookkeeping, never while a study loads
+        self._lock = threading.Lock()
+        # One lock per key in _loaded, held while that study is built or refreshed
+        self._loading = {}
+
+    def register(self, key, csv_path, name=None, species=None, **kwargs):
+        """
+        Add a study under `key`. Name and species default to the CSV's Movebank metadata,
+        read when first needed.
+
+        Args:
+            key (str): Short name pages select the study by.
+            csv_path (str): Path to the Movebank CSV.
+            **kwargs: time_interval and min_distance for thinning.
+
+        Returns:
+            Study: The registered study.
+        """
+        study = Study(key, csv_path, name, species, **kwargs)
+        self._studies[key] = study
+        return study
+
+    def unregister(self, key):
+        study = self._studies.pop(key)
+        if self._default == key:
+            self._default = None
+        return study
+
+    def scan(self, directory=DATA_DIR):
+        """
+        Register every CSV in a directory under its file name without the extension.
+        Already registered keys are left as they are.
+
+        Returns:
+            list: Keys of the newly registered studies.
+        """
+        added = []
+        for path in sorted(glob.glob(os.path.join(directory, '*.csv'))):
+            key = os.path.splitext(os.path.basename(path))[0]
+            if key not in self._studies:
+                self.register(key, path)
+                added.append(key)
+        return added
+
+    def __contains__(self, key):
+        return key in self._studies
+
+    def __len__(self):
+        return len(self._studies)
+
+    def keys(self):
+        return list(self._studies)
+
+    def study(self, key):
+        return self._studies[key]
+
+    @property
+    def default(self):
+        """
+        Key of the study pages show before one is chosen: the one set explicitly, else the
+        first registered.
+        """
+        if self._default is not None:
+            return self._default
+        return next(iter(self._studies), None)
+
+    @default.setter
+    def default(self, key):
+        if key is not None and key not in self._studies:
+            raise KeyError(key)
+        self._default = key
+
+    def get(self, key=None, follow=False):
+        """
+        Return the loaded dataHandler of a study, loading it on first use.
+
+        Args:
+            key (str): Study key. Defaults to the default study.
+            follow (bool): Treat the CSV as a growing live feed (see load).
+        """
+        key = self.default if key is None else key
+        if key is None:
+            raise KeyError("No studies are registered")
+        study = self._studies[key]
+        return self.load(study.csv_path, study.time_interval, study.min_distance, follow)
+
+    def load(self, csv_path, time_interval=pd.Timedelta(hours=5), min_distance=75, follow=False):
+        """
+        Return the cached dataHandler for a CSV and thinning parameters, whether or not the
+        CSV is registered.
+
+        The handler is rebuilt only when the file's modification time changes. With
+        follow=True, rows appended to the file are thinned and added incrementally instead
+        of reloading the whole file; a file that shrinks is still reloaded.
+        """
+        csv_path = os.path.abspath(csv_path)
+        key = (csv_path, pd.Timedelta(time_interval), min_distance)
+        mtime = os.stat(csv_path).st_mtime_ns
+
+        with self._lock:
+            loading = self._loading.setdefault(key, threading.Lock())
+        # Concurrent sessions asking for this study wait for one load instead of each reading
+        # the CSV; sessions using other studies are not held up
+        with loading:
+            with self._lock:
+                cached = self._loaded.get(key)
+            if follow and cached is not None and cached[0] != mtime and not cached[1].rewritten():
+                handler = cached[1] if cached[1].feed is not None else cached[1].follow()
+                handler.refresh()
+                cached = (mtime, handler)
+            if cached is None or cached[0] != mtime:
+                cached = (mtime, data_handler.dataHandler(csv_path, time_interval, min_distance))
+            # Re-measured on every access: derived tables (steps, heat pyramid) are built lazily
+            handler = cached[1]
+            size = handler.memory_usage()
+            with self._lock:
+                self._loaded[key] = (mtime, handler, size)
+                self._loaded.move_to_end(key)
+                self._evict(keep=key)
+            return handler
+
+    def _evict(self, keep):
+        total = sum(entry[2] for entry in self._loaded.values())
+        for key in list(self._loaded):
+            if total <= self.max_bytes:
+                break
+            if key != keep:
+                total -= self._loaded.pop(key)[2]
+
+    def memory_usage(self):
+        with self._lock:
+            return sum(entry[2] for entry in self._loaded.values())
+
+    def clear(self):
+        with self._lock:
+            self._loaded.clear()
+
+    def summary(self):
+        """
+        Return one row per registered study: key, name, species, path, and whether it is
+        loaded and how many bytes it holds.
+        """
+        with self._lock:
+            loaded = {path: size for (path, _, _), (_, _, size) in self._loaded.items()}
+        rows = [{
+            'study': study.key,
+            'name': study.name,
+            'species': study.species,
+            'path': study.csv_path,
+            'loaded': study.csv_path in loaded,
+            'bytes': loaded.get(study.csv_path, 0),
+        } for study in self._studies.values()]
+        return pd.DataFrame(rows, columns=['study', 'name', 'species', 'path', 'loaded', 'bytes'])
+
+
+# Process-wide catalog shared by every page and every user session.
+# Streamlit re-runs page scripts but keeps imported modules, so this lives as long as the server.
+CATALOG = Catalog()
+CATALOG.scan(DATA_DIR)
+# More study directories, separated like PATH
+for _directory in filter(None, os.environ.get('TRACKING_DATA_DIRS', '').split(os.pathsep)):
+    CATALOG.scan(_directory)
+if 'red_fox' in CATALOG:
+    CATALOG.default = 'red_fox'
+
+
+def select_study(follow=True, catalog=None, label="Study:"):
+    """
+    Sidebar study picker for the Streamlit pages, shown when more than one study is
+    registered. The choice is kept in session state, so every page shows the same study.
+    Call it after st.set_page_config.
+
+    Returns:
+        dataHandler: The chosen study's handler.
+    """
+    import streamlit as st
+
+    catalog = CATALOG if catalog is None else catalog
+    keys = catalog.keys()
+    if not keys:
+        st.error(f"No datasets found. Put Movebank CSVs in {DATA_DIR} or list directories in TRACKING_DATA_DIRS.")
+        st.stop()
+    key = st.session_state.get('study', catalog.default)
+    if key not in keys:
+        key = catalog.default
+    if len(keys) > 1:
+        key = st.sidebar.selectbox(label, keys, index=keys.index(key), format_func=lambda k: catalog.study(k).label)
+    st.session_state['study'] = key
+    return catalog.get(key, follow=follow)
@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+try:
+    from . import streaming
+except ImportError:
+    import streaming
+
+# One spilled fix: timestamp (ns), coordinates and the fix's row number in the CSV
+FIX_DTYPE = np.dtype([('time', 'i8'), ('lat', 'f8'), ('lon', 'f8'), ('row', 'i8')])
+
+# Rough peak bytes per CSV row while a chunk is parsed (text buffers, object columns and
+# their typed copies), used to turn a memory budget into a chunk size
+PARSE_BYTES_PER_ROW = 1024
+
+TAG_COLUMN = 'tag-local-identifier'
+USE_COLUMNS = ['timestamp', 'location-long', 'location-lat', TAG_COLUMN]
+
+
+def chunk_rows(memory_budget):
+    """
+    Number of CSV rows to parse at a time so that one chunk stays within memory_budget bytes.
+    """
+    return max(1000, int(memory_budget // PARSE_BYTES_PER_ROW))
+
+
+def spill_by_tag(csv_path, spill_dir, chunksize):
+    """
+    Stream a Movebank CSV in chunks and write each chunk's fixes to one file per tag,
+    sorted by time. Only one chunk is held in memory at a time.
+
+    Args:
+        csv_path (str): Path to the Movebank CSV.
+        spill_dir (str): Directory for the spill files.
+        chunksize (int): Number of CSV rows parsed at a time.
+
+    Returns:
+        dict: For each tag, in order of its first fix (by time, then CSV row, like
+            TrackStore.from_table), the list of its spill files.
+    """
+    parts = {}
+    numbers = {}
+    first_fix = {}
+    row = 0
+    for chunk in pd.read_csv(csv_path, usecols=USE_COLUMNS, chunksize=chunksize):
+        rows = np.arange(row, row + len(chunk), dtype=np.int64)
+        row += len(chunk)
+        present = chunk[TAG_COLUMN].notna().values
+        chunk, rows = chunk[present], rows[present]
+        if not len(chunk):
+            continue
+        times = pd.to_datetime(chunk['timestamp']).values.astype('datetime64[ns]').view('int64')
+        codes, tags = pd.factorize(chunk[TAG_COLUMN])
+        # One sort by (tag, time) groups the chunk; lexsort is stable, so ties keep row order
+        order = np.lexsort((times, codes))
+        fixes = np.empty(len(order), dtype=FIX_DTYPE)
+        fixes['time'] = times[order]
+        fixes['lat'] = chunk['location-lat'].values[order]
+        fixes['lon'] = chunk['location-long'].values[order]
+        fixes['row'] = rows[order]
+        codes = codes[order]
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(codes)) + 1, [len(codes)]))
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            tag = tags[codes[start]]
+            first = (fixes['time'][start], fixes['row'][start])
+            if tag not in numbers:
+                numbers[tag] = len(numbers)
+                parts[tag] = []
+                first_fix[tag] = first
+            first_fix[tag] = min(first_fix[tag], first)
+            # Files are named by tag number, not tag, so any tag string is safe
+            path = os.path.join(spill_dir, f'{numbers[tag]:05d}-{len(parts[tag]):05d}.npy')
+            np.save(path, fixes[start:stop])
+            parts[tag].append(path)
+    return {tag: parts[tag] for tag in sorted(parts, key=first_fix.get)}
+
+
+def merge_parts(paths, window):
+    """
+    Merge time-sorted spill files into one time-sorted stream, reading at most `window`
+    fixes of each file at a time.
+
+    Yields:
+        np.ndarray: Consecutive batches of fixes (FIX_DTYPE), sorted by time across batches.
+    """
+    parts = [np.load(path, mmap_mode='r') for path in paths]
+    positions = [0] * len(parts)
+    while True:
+        buffers = {i: part[positions[i]:positions[i] + window] for i, part in enumerate(parts) if positions[i] < len(part)}
+        if not buffers:
+            return
+        # Everything up to the smallest buffer end is final: no unread fix can be earlier
+        unfinished = [buf['time'][-1] for i, buf in buffers.items() if positions[i] + len(buf) < len(parts[i])]
+        boundary = min(unfinished) if unfinished else np.iinfo(np.int64).max
+        taken = []
+        for i, buf in buffers.items():
+            n = int(np.searchsorted(buf['time'], boundary, side='right'))
+            taken.append(np.asarray(buf[:n]))
+            positions[i] += n
+        batch = np.concatenate(taken)
+        yield batch[np.argsort(batch['time'], kind='stable')]
+
+
+def thin_csv(csv_path, time_interval=pd.Timedelta(hours=5), min_distance=75, memory_budget=256 * 2 ** 20, spill_dir=None):
+    """
+    Thin every tag's track of a Movebank CSV with peak memory bounded by memory_budget
+    (plus the thinned output): the CSV is split into per-tag spill files chunk by chunk,
+    then each tag is merged back in time order and thinned incrementally.
+
+    Args:
+        csv_path (str): Path to the Movebank CSV.
+        time_interval (pd.Timedelta): Minimum gap between kept fixes.
+        min_distance (float): Minimum distance in meters between kept fixes.
+        memory_budget (int): Approximate working memory in bytes.
+        spill_dir (str): Directory for the temporary spill files. Defaults to the system temp directory.
+
+    Returns:
+        dict: Thinned DataFrames keyed by tag, like the second value of dataHandler.processData
+            ('location-long', 'location-lat', 'name', 'timestamp' columns, indexed by CSV row number).
+    """
+    workdir = tempfile.mkdtemp(prefix='thin-', dir=spill_dir)
+    try:
+        parts = spill_by_tag(csv_path, workdir, chunk_rows(memory_budget))
+        names = pd.CategoricalDtype(list(parts))
+        thinner = streaming.IncrementalThinner(time_interval, min_distance)
+        unique_dfs = {}
+        for tag, paths in parts.items():
+            window = max(1024, int(memory_budget // (2 * FIX_DTYPE.itemsize * len(paths))))
+            kept = []
+            for batch in merge_parts(paths, window):
+                keep = thinner.push(tag, batch['time'], batch['lat'], batch['lon'])
+                kept.append(batch[keep])
+            kept = np.concatenate(kept)
+            unique_dfs[tag] = pd.DataFrame({
+                'location-long': kept['lon'],
+                'location-lat': kept['lat'],
+                'name': pd.Categorical([tag] * len(kept), dtype=names),
+                'timestamp': kept['time'].view('datetime64[ns]'),
+            }, index=kept['row'])
+        return unique_dfs
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,60 @@
+# Rendering layer for the results of correlation.py
+import matplotlib.pyplot as plt
+
+
+def plot_aligned(result, x_label='Time', title_prefix='Aligned'):
+    """
+    Plot two foxes' longitude and latitude over their aligned timestamps.
+
+    Args:
+        result (dict): Output of correlation.correlation_aligned or correlation.correlation_end_of_day.
+        x_label (str): Label of the time axis.
+        title_prefix (str): Prefix for the subplot titles.
+    """
+    merged = result['aligned']
+    time = merged['timestamp']
+
+    plt.figure(figsize=(14, 6))
+
+    # Longitude comparison
+    plt.subplot(2, 1, 1)
+    plt.plot(time, merged['location-long_fox1'].values, label='Fox 1 Longitude', marker='o')
+    plt.plot(time, merged['location-long_fox2'].values, label='Fox 2 Longitude', marker='x')
+    plt.xlabel(x_label)
+    plt.ylabel('Longitude')
+    plt.title(f'{title_prefix} Longitude Over Time')
+    plt.legend()
+
+    # Latitude comparison
+    plt.subplot(2, 1, 2)
+    plt.plot(time, merged['location-lat_fox1'].values, label='Fox 1 Latitude', marker='o')
+    plt.plot(time, merged['location-lat_fox2'].values, label='Fox 2 Latitude', marker='x')
+    plt.xlabel(x_label)
+    plt.ylabel('Latitude')
+    plt.title(f'{title_prefix} Latitude Over Time')
+    plt.legend()
+
+    # Show the plots
+    plt.tight_layout()
+    plt.show()
+
+
+def plot_monthly(results_df, title='Correlation by Month'):
+    """
+    Plot monthly longitude and latitude correlations.
+
+    Args:
+        results_df (pd.DataFrame): Output of correlation.correlation_by_month or correlation.correlation_end_of_day_by_month.
+        title (str): Plot title.
+    """
+    plt.figure(figsize=(10, 6))
+    plt.plot(results_df['month'].astype(str), results_df['pearson_corr_long'], label='Longitude Correlation', marker='o')
+    plt.plot(results_df['month'].astype(str), results_df['pearson_corr_lat'], label='Latitude Correlation', marker='x')
+    plt.xlabel('Month')
+    plt.ylabel('Pearson Correlation')
+    plt.title(title)
+    plt.legend()
+    plt.xticks(rotation=45)
+    plt.grid(True)
+    plt.tight_layout()
+    plt.show()
@@ -0,0 +1,281 @@
+# Computation layer for the fox correlation analyses. Nothing here plots or imports
+# matplotlib, so it can run in batch jobs and worker processes; cor_plots.py renders
+# the results and cor_utils.py combines the two.
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    from . import resample
+except ImportError:
+    import resample
+
+COLUMNS = ['timestamp', 'location-long', 'location-lat']
+
+
+def pearson(x, y):
+    """
+    Pearson correlation coefficient of two equal-length arrays. NaN if there are fewer
+    than two points or either array is constant.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) < 2:
+        return np.nan
+    x = x - x.mean()
+    y = y - y.mean()
+    denominator = np.sqrt((x * x).sum() * (y * y).sum())
+    if denominator == 0:
+        return np.nan
+    return float(np.clip((x * y).sum() / denominator, -1.0, 1.0))
+
+
+def resample_pair(df1, df2, step=resample.STEP, max_gap=resample.MAX_GAP):
+    """
+    Resample two foxes onto one time grid (see resample.AlignedTracks), under the tags
+    'fox1' and 'fox2'.
+    """
+    return resample.AlignedTracks.from_frames({'fox1': df1[COLUMNS], 'fox2': df2[COLUMNS]}, step, max_gap)
+
+
+def align(df1, df2, step=resample.STEP, max_gap=resample.MAX_GAP):
+    """
+    Pair the positions of two foxes on a shared time grid. Each fox is interpolated
+    between its fixes, so unsynchronized collars still line up; grid times inside a gap
+    longer than max_gap in either track are left out.
+
+    Returns:
+        pd.DataFrame: 'timestamp' plus '_fox1' / '_fox2' suffixed location columns.
+    """
+    return resample_pair(df1, df2, step, max_gap).pair('fox1', 'fox2')
+
+
+def segment_pearson(x, y, starts):
+    """
+    Pearson correlation of x and y within each contiguous segment, like pearson on each
+    segment's values (NaN for fewer than two points or a constant array), with segment
+    reductions instead of a loop.
+
+    Args:
+        starts (np.ndarray): Increasing start position of each non-empty segment; the
+            first is 0 and the last segment runs to the end of the arrays.
+    """
+    if not len(starts):
+        return np.empty(0)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    counts = np.diff(np.append(starts, len(x)))
+    x = x - np.repeat(np.add.reduceat(x, starts) / counts, counts)
+    y = y - np.repeat(np.add.reduceat(y, starts) / counts, counts)
+    denominator = np.sqrt(np.add.reduceat(x * x, starts) * np.add.reduceat(y * y, starts))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = np.clip(np.add.reduceat(x * y, starts) / denominator, -1.0, 1.0)
+    r[(counts < 2) | (denominator == 0)] = np.nan
+    return r
+
+
+def _month_starts(months):
+    # Time-ordered month ordinals: each month is one contiguous run; return its label and start
+    starts = np.append(0, np.flatnonzero(np.diff(months)) + 1) if len(months) else np.empty(0, np.int64)
+    return months[starts], starts
+
+
+def _month_ordinals(timestamps):
+    return np.asarray(timestamps).astype('datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+
+
+def _correlate(merged):
+    return {
+        'pearson_corr_long': pearson(merged['location-long_fox1'].values, merged['location-long_fox2'].values),
+        'pearson_corr_lat': pearson(merged['location-lat_fox1'].values, merged['location-lat_fox2'].values),
+        'aligned': merged,
+    }
+
+
+def _correlate_by_month(merged):
+    labels, starts = _month_starts(_month_ordinals(merged['timestamp'].values))
+    # Build the month column explicitly so an empty result keeps its period dtype
+    return pd.DataFrame({
+        'month': pd.PeriodIndex.from_ordinals(labels, freq='M'),
+        'pearson_corr_long': segment_pearson(merged['location-long_fox1'].values, merged['location-long_fox2'].values, starts),
+        'pearson_corr_lat': segment_pearson(merged['location-lat_fox1'].values, merged['location-lat_fox2'].values, starts),
+    })
+
+
+def correlation_aligned(df1, df2, step=resample.STEP, max_gap=resample.MAX_GAP):
+    """
+    Pearson correlation of two foxes' longitude and latitude over their shared grid times (see align).
+
+    Returns:
+        dict: 'pearson_corr_long', 'pearson_corr_lat' and the 'aligned' DataFrame they were computed from.
+    """
+    return _correlate(align(df1, df2, step, max_gap))
+
+
+def correlation_by_month(df1, df2, step=resample.STEP, max_gap=resample.MAX_GAP):
+    """
+    Pearson correlations over shared grid times, computed separately for each month.
+
+    Returns:
+        pd.DataFrame: 'month', 'pearson_corr_long' and 'pearson_corr_lat' columns.
+    """
+    return _correlate_by_month(align(df1, df2, step, max_gap))
+
+
+def correlation_end_of_day(df1, df2, step=resample.STEP, max_gap=resample.MAX_GAP):
+    """
+    Pearson correlation of the two foxes' end-of-day locations: their positions at the
+    last grid time of each day at which both have one.
+
+    Returns:
+        dict: 'pearson_corr_long', 'pearson_corr_lat' and the 'aligned' DataFrame they were computed from.
+    """
+    return _correlate(resample_pair(df1, df2, step, max_gap).pair('fox1', 'fox2', end_of_day=True))
+
+
+def correlation_end_of_day_by_month(df1, df2, step=resample.STEP, max_gap=resample.MAX_GAP):
+    """
+    Pearson correlations of the end-of-day locations, computed separately for each month.
+
+    Returns:
+        pd.DataFrame: 'month', 'pearson_corr_long' and 'pearson_corr_lat' columns.
+    """
+    return _correlate_by_month(resample_pair(df1, df2, step, max_gap).pair('fox1', 'fox2', end_of_day=True))
+
+
+def cross_correlation(aligned, tag1, tag2, max_lag=24):
+    """
+    Lagged Pearson correlations of two tags on a shared grid: tag1's position at each grid
+    time against tag2's position `lag` grid steps later, for -max_lag <= lag <= max_lag.
+    A peak at a positive lag means tag2 follows tag1's movements.
+
+    Args:
+        aligned (resample.AlignedTracks): Tracks on a shared grid, e.g. dataHandler.aligned().
+        max_lag (int): Largest lag in grid steps.
+
+    Returns:
+        pd.DataFrame: 'lag' (grid steps), 'offset' (Timedelta), 'pearson_corr_long',
+            'pearson_corr_lat' and the number of grid times compared 'n'.
+    """
+    i, j = aligned.row(tag1), aligned.row(tag2)
+    width = len(aligned.grid)
+    lags = np.arange(-max_lag, max_lag + 1)
+    long_corr, lat_corr, counts = [], [], []
+    for lag in lags:
+        # Positions t of tag1 paired with t + lag of tag2
+        first = slice(max(0, -lag), min(width, width - lag))
+        second = slice(max(0, lag), min(width, width + lag))
+        both = aligned.valid[i, first] & aligned.valid[j, second]
+        long_corr.append(pearson(aligned.lon[i, first][both], aligned.lon[j, second][both]))
+        lat_corr.append(pearson(aligned.lat[i, first][both], aligned.lat[j, second][both]))
+        counts.append(int(both.sum()))
+    return pd.DataFrame({
+        'lag': lags,
+        'offset': lags * aligned.step,
+        'pearson_corr_long': np.array(long_corr, dtype=np.float64),
+        'pearson_corr_lat': np.array(lat_corr, dtype=np.float64),
+        'n': np.array(counts, dtype=np.int64),
+    })
+
+
+# Batch variants: (use end-of-day positions, group by month)
+VARIANTS = {
+    'aligned': (False, False),
+    'by_month': (False, True),
+    'end_of_day': (True, False),
+    'end_of_day_by_month': (True, True),
+}
+
+
+def _run_pair(fox1, fox2, aligned, months, variants):
+    # Works on the grid arrays directly; aligned may hold just this pair's rows, so worker
+    # processes are sent two rows of the grid. months is the month ordinal of every grid time.
+    i, j = aligned.row(fox1), aligned.row(fox2)
+    # Positions and coordinates are gathered once per kind of overlap, not once per variant
+    gathered = {}
+    results = {}
+    for variant in variants:
+        use_end_of_day, by_month = VARIANTS[variant]
+        if use_end_of_day not in gathered:
+            positions = aligned.overlap(fox1, fox2, end_of_day=use_end_of_day)
+            rows = np.ix_([i, j], positions)
+            gathered[use_end_of_day] = (positions, aligned.lon[rows], aligned.lat[rows])
+        positions, lon, lat = gathered[use_end_of_day]
+        if by_month:
+            labels, starts = _month_starts(months[positions])
+            results[variant] = (labels, segment_pearson(lon[0], lon[1], starts), segment_pearson(lat[0], lat[1], starts))
+        else:
+            results[variant] = (None, np.array([pearson(lon[0], lon[1])]), np.array([pearson(lat[0], lat[1])]))
+    return results
+
+
+def correlate_pairs(aligned, variants=tuple(VARIANTS), pairs=None, max_workers=None):
+    """
+    Run correlation variants over pairs of tags resampled onto one grid.
+
+    Args:
+        aligned (resample.AlignedTracks): Tracks on a shared grid, e.g. dataHandler.aligned().
+        variants (iterable): Names from VARIANTS to run.
+        pairs (list): (tag1, tag2) pairs. Defaults to itertools.combinations(aligned.tags, 2).
+        max_workers (int): Number of worker processes. None runs in this process.
+
+    Returns:
+        dict: One DataFrame per variant with 'fox1' and 'fox2' columns identifying the pair,
+            in the order of `pairs`, then 'month' for the by-month variants and
+            'pearson_corr_long' and 'pearson_corr_lat'.
+    """
+    variants = list(variants)
+    pairs = list(itertools.combinations(aligned.tags, 2) if pairs is None else pairs)
+    months = _month_ordinals(aligned.grid.view('datetime64[ns]'))
+    if max_workers is None:
+        results = [_run_pair(a, b, aligned, months, variants) for a, b in pairs]
+    else:
+        def subset(a, b):
+            rows = [aligned.row(a), aligned.row(b)]
+            return resample.AlignedTracks(aligned.grid, [a, b], aligned.lat[rows], aligned.lon[rows], aligned.step,
+                                          aligned.max_gap, aligned.method, aligned.tolerance)
+
+        # Hand out pairs in chunks so each task is worth the inter-process round trip
+        chunksize = max(1, len(pairs) // (4 * max_workers))
+        args = [(a, b, subset(a, b), months, variants) for a, b in pairs]
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_run_pair, *zip(*args), chunksize=chunksize))
+
+    # One DataFrame per variant from the concatenated per-pair arrays
+    output = {}
+    for variant in variants:
+        parts = [result[variant] for result in results]
+        sizes = [len(part[1]) for part in parts]
+        table = {
+            'fox1': np.repeat(np.array([a for a, _ in pairs], dtype=object), sizes),
+            'fox2': np.repeat(np.array([b for _, b in pairs], dtype=object), sizes),
+        }
+        if VARIANTS[variant][1]:
+            months = [part[0] for part in parts]
+            table['month'] = pd.PeriodIndex.from_ordinals(np.concatenate(months) if months else np.empty(0, np.int64), freq='M')
+        for k, column in [(1, 'pearson_corr_long'), (2, 'pearson_corr_lat')]:
+            table[column] = np.concatenate([part[k] for part in parts]) if parts else np.empty(0)
+        output[variant] = pd.DataFrame(table)
+    return output
+
+
+def run_all_pairs(fox_dfs, variants=tuple(VARIANTS), max_workers=None, step=resample.STEP, max_gap=resample.MAX_GAP):
+    """
+    Run correlation variants over every pair of foxes. All foxes are resampled onto one
+    time grid once (see align), not once per pair.
+
+    Args:
+        fox_dfs (dict): DataFrames keyed by fox with 'timestamp', 'location-long', 'location-lat' columns.
+        variants (iterable): Names from VARIANTS to run.
+        max_workers (int): Number of worker processes. None runs in this process.
+        step (str): Grid spacing.
+        max_gap (str): Longest gap between fixes that is interpolated across.
+
+    Returns:
+        dict: One DataFrame per variant with 'fox1' and 'fox2' columns identifying the pair,
+            in the order of itertools.combinations(fox_dfs).
+    """
+    aligned = resample.AlignedTracks.from_frames({fox: df[COLUMNS] for fox, df in fox_dfs.items()}, step, max_gap)
+    return correlate_pairs(aligned, variants, max_workers=max_workers)
@@ -1,56 +1,486 @@
+import numpy as np
 import pandas as pd 
 import os 
-from tabulate import tabulate
-from geopy.distance import geodesic
+
+try:
+    from . import activity, chunked, correlation, density, export, ingest, instrument, parallel, proximity, resample, spatial, streaming, thinning, trajectory
+    from .time_index import TimeIndex
+    from .track_store import TrackStore
+except ImportError:
+    import activity
+    import chunked
+    import correlation
+    import density
+    import export
+    import ingest
+    import instrument
+    import parallel
+    import proximity
+    import resample
+    import spatial
+    import streaming
+    import thinning
+    import trajectory
+    from time_index import TimeIndex
+    from track_store import TrackStore
+
+# Columns the app and analyses use; the redundant per-row study/taxon strings are not loaded
+LOAD_COLUMNS = [
+    'timestamp', 'location-long', 'location-lat', 'tag-local-identifier',
+    'gps:hdop', 'gps:satellite-count',
+]
+
+def default_csv_path():
+    # Relative to this file, so the app works from any working directory
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "red_fox.csv")
+
+
+def _thin_tag(handle, i, interval, min_distance):
+    # Thin the i-th track of a parallel.frame_arrays block; runs in executor workers
+    with parallel.attach(handle) as arrays:
+        start, stop = arrays['offsets'][i], arrays['offsets'][i + 1]
+        return thinning.thin_track(
+            arrays['timestamp'][start:stop],
+            arrays['location-lat'][start:stop],
+            arrays['location-long'][start:stop],
+            interval,
+            min_distance,
+        )
+
 
 class dataHandler: 
-    def __init__(self): 
-        current_dir = os.getcwd()
-        # print(current_dir)
-        csv_path = os.path.join(current_dir, "data_analysis", "data", "red_fox.csv")
-        self.raw_df = pd.read_csv(csv_path)
-        self.raw_df['timestamp'] = pd.to_datetime(self.raw_df['timestamp'])
+    def __init__(self, csv_path=None, time_interval=pd.Timedelta(hours=5), min_distance=75, columns=LOAD_COLUMNS, memory_budget=None, executor=None): 
+        """
+        The thinned tracks are held once, in a track_store.TrackStore (`tracks`); all_data,
+        the time index and the per-tag frames in `unique` are views of it.
 
+        Args:
+            csv_path (str): Path to the Movebank CSV. Defaults to the red fox dataset.
+            time_interval (pd.Timedelta): Minimum gap between kept fixes.
+            min_distance (float): Minimum distance in meters between kept fixes.
+            columns (list): Raw columns to load into raw_df.
+            memory_budget (int): If set, thin the CSV chunk by chunk within roughly this many bytes
+                of working memory instead of loading it whole (see chunked.thin_csv). Only the
+                thinned tracks are kept; raw_df and desired_df are None.
+            executor: How processData thins the tags: 'serial' (default), 'thread', 'process'
+                or an executor from parallel.make_executor. Results do not depend on it.
+        """
+        if csv_path is None:
+            csv_path = default_csv_path()
+        self.csv_path = csv_path
+        self.time_interval = pd.Timedelta(time_interval)
+        self.min_distance = min_distance
+        self.columns = columns
+        self.executor = executor
+        # Size of the CSV as loaded, and the bytes before that point; following the file resumes
+        # from here, and a file whose bytes changed was rewritten rather than appended to
+        self._loaded_size = os.path.getsize(csv_path)
+        self._loaded_tail = streaming.tail_bytes(csv_path, self._loaded_size)
 
-        self.headers = self.raw_df.columns.tolist()
-        self.raw_data = self.raw_df.values
-        self.desired_df, self.unique = self.processData()
-        
+        if memory_budget is None:
+            # Loads through the typed Parquet cache, re-ingesting only when the CSV changes
+            with instrument.span('dataHandler.load') as span:
+                self.raw_df = ingest.load_table(csv_path, columns=columns)
+                span.rows = len(self.raw_df)
+            self.headers = self.raw_df.columns.tolist()
+            _, tracks = self.thin_tracks()
+        else:
+            self.raw_df = None
+            self.headers = [c for c in pd.read_csv(csv_path, nrows=0).columns if c in columns]
+            with instrument.span('dataHandler.thin_chunked') as span:
+                tracks = TrackStore.from_frames(chunked.thin_csv(csv_path, self.time_interval, min_distance, memory_budget))
+                span.rows = len(tracks)
+        # Time-sorted index over the thinned tracks, shared by every page's time filters
+        with instrument.span('dataHandler.index') as span:
+            self.index = TimeIndex.from_store(tracks)
+            span.rows = len(self.index)
+        self.all_data = self.index.data
+        self.unique = tracks.frames(self.all_data)
+        self._tracks = tracks
+        self._spatial = None
+        self._heat = None
+        self._steps = None
+        self._summary = None
+        self._aligned = {}
+        self.feed = None
+        self._thinner = None
+        self._appended = False
 
-    def processData(self): 
+    @property
+    def raw_data(self):
+        # Built on demand: an object-dtype copy of the whole table is rarely needed and costs more than raw_df itself
+        return None if self.raw_df is None else self.raw_df.values
 
-        df = self.raw_df.sort_values(by='timestamp')
-        columns_to_extract = ['location-long', 'location-lat', 'tag-local-identifier', 'timestamp' ]
-        new_df = df[columns_to_extract]
-        names = df['tag-local-identifier'].unique() 
-                
-                
-        time_interval = pd.Timedelta(hours=5)
-        
-        
-        unique_dfs = {}
-
-        for unique_name in df['tag-local-identifier'].unique():
-            # Filter rows corresponding to the unique name
-            group = new_df[new_df['tag-local-identifier'] == unique_name].sort_values(by='timestamp')
-            group.rename(columns={"tag-local-identifier" : "name"}, inplace=True)
-            # Initialize a new filtered DataFrame
-            filtered_group = [group.iloc[0]]  # Start with the first row
-
-            # Iterate through the group and select rows based on the time interval
-            for i in range(1, len(group)):
-                if group.iloc[i]['timestamp'] - filtered_group[-1]['timestamp'] >= time_interval and geodesic( (group.iloc[i]['location-lat'], group.iloc[i]['location-long'] )
-                                                                                                              , (filtered_group[-1]['location-lat'], filtered_group[-1]['location-long'] )).meters > 75:
-                    filtered_group.append(group.iloc[i])
-
-            # Create a DataFrame from the filtered rows
-            unique_dfs[unique_name] = pd.DataFrame(filtered_group)
+    @property
+    def desired_df(self):
+        # The extracted columns in timestamp order, built on demand; nothing in the pipeline needs a second copy of the table
+        if self.raw_df is None:
+            return None
+        return self.raw_df.sort_values(by='timestamp', kind='stable')[['location-long', 'location-lat', 'tag-local-identifier', 'timestamp']]
+
+    @property
+    def tracks(self):
+        """
+        The thinned tracks as a track_store.TrackStore: per-tag views of int64 times,
+        coordinates and row labels, sharing memory with all_data.
+        """
+        if self._tracks is None:
+            self._tracks = TrackStore.from_index(self.index)
+        return self._tracks
+
+    @property
+    def summary(self):
+        """
+        One row per tag of the thinned tracks: number of fixes, first and last timestamp
+        and bounding box (see TrackStore.summary). Built on first use.
+        """
+        if self._summary is None:
+            with instrument.span('dataHandler.summary', rows=len(self.all_data)):
+                self._summary = self.tracks.summary()
+        return self._summary
+
+    def page(self, tag, number, size=500):
+        """
+        Return one page of a tag's thinned fixes, in time order.
+
+        Args:
+            tag: Tag to read.
+            number (int): 0-based page number.
+            size (int): Rows per page.
+
+        Returns:
+            pd.DataFrame: A view of at most `size` rows of unique[tag].
+        """
+        start = number * size
+        return self.unique[tag].iloc[start:start + size]
+
+    def memory_usage(self):
+        """
+        Approximate bytes held by the handler: raw_df, the thinned tracks and whichever
+        derived tables (steps, spatial index, heat pyramid, aligned grids) have been built.
+        """
+        tables = [self.raw_df, self.all_data, self._steps]
+        total = sum(int(table.memory_usage(deep=True).sum()) for table in tables if table is not None)
+        if self._spatial is not None:
+            total += self._spatial.keys.nbytes + self._spatial.order.nbytes
+        if self._heat is not None:
+            total += sum(array.nbytes for table in self._heat.tables.values() for array in table)
+        total += sum(aligned.nbytes for aligned in self._aligned.values())
+        return total
+
+    @property
+    def spatial(self):
+        """
+        Grid index over the thinned tracks (spatial.SpatialIndex), built on first use.
+        Its positions are row positions in all_data.
+        """
+        if self._spatial is None:
+            with instrument.span('dataHandler.spatial_index', rows=len(self.all_data)):
+                self._spatial = spatial.SpatialIndex(self.tracks)
+        return self._spatial
+
+
+    def thin_tracks(self, time_interval=None, min_distance=None, executor=None):
+        """
+        Thin every tag's track so that consecutive kept fixes are at least `time_interval`
+        apart and more than `min_distance` meters away from each other.
+
+        Args:
+            time_interval (pd.Timedelta): Minimum gap between kept fixes. Defaults to the handler's setting (5 hours).
+            min_distance (float): Minimum distance in meters between kept fixes. Defaults to the handler's setting (75 m).
+            executor: Executor kind or instance for the per-tag thinning (see parallel.make_executor).
+                Defaults to the handler's setting. Process workers get the tracks through shared memory.
+
+        Returns:
+            tuple: (TrackStore of every fix, TrackStore of the kept fixes). Tags are in order of
+                their first fix.
+        """
+        if time_interval is None:
+            time_interval = self.time_interval
+        if min_distance is None:
+            min_distance = self.min_distance
+        if executor is None:
+            executor = self.executor
+        interval_ns = pd.Timedelta(time_interval).value
+
+        # One stable sort by (tag, time) into flat arrays replaces sorting the table and copying every group
+        with instrument.span('processData.sort', rows=len(self.raw_df)):
+            fixes = TrackStore.from_table(self.raw_df)
+
+        with instrument.span('processData.thin', rows=len(fixes), tags=len(fixes.tags)) as span:
+            pool = parallel.make_executor(executor)
+            try:
+                with parallel.SharedArrays(fixes.arrays(), pool) as shared:
+                    n = len(fixes.tags)
+                    keeps = list(pool.map(_thin_tag, [shared.handle] * n, range(n), [interval_ns] * n, [min_distance] * n))
+            finally:
+                if parallel.owns_executor(executor):
+                    pool.shutdown()
+            tracks = fixes.take(keeps)
+            span.kept = len(tracks)
+        return fixes, tracks
+
+    def processData(self, time_interval=None, min_distance=None, executor=None): 
+        """
+        Thin every tag's track (see thin_tracks) and return the result as DataFrames.
+
+        Returns:
+            tuple: (DataFrame of the extracted columns in timestamp order (desired_df), dict of
+                thinned DataFrames keyed by tag, sharing memory with the kept track store).
+        """
+        _, tracks = self.thin_tracks(time_interval, min_distance, executor)
+        unique_dfs = tracks.frames()
         for key, df in unique_dfs.items():
             rows, cols = df.shape
             print(f"DataFrame '{key}' has {rows} rows and {cols} columns.")        
-        return (new_df, unique_dfs)
+        return (self.desired_df, unique_dfs)
+
+    def append(self, batch):
+        """
+        Add newly received fixes without reprocessing the loaded history. Each tag's new
+        fixes are thinned against its last kept fix, and the kept ones are appended to
+        `unique` and the time index. raw_df and desired_df keep the data as originally loaded.
+
+        Args:
+            batch (pd.DataFrame): Movebank rows with at least 'timestamp', 'location-long',
+                'location-lat' and 'tag-local-identifier' columns.
+
+        Returns:
+            int: Number of fixes kept.
+        """
+        if self._thinner is None:
+            self._thinner = streaming.IncrementalThinner(self.time_interval, self.min_distance)
+            self._thinner.seed(self.unique)
+        if not len(batch):
+            return 0
+
+        columns_to_extract = ['location-long', 'location-lat', 'tag-local-identifier', 'timestamp' ]
+        batch = batch[columns_to_extract].assign(timestamp=pd.to_datetime(batch['timestamp']))
+        batch = batch.sort_values(by='timestamp', kind='stable').rename(columns={"tag-local-identifier" : "name"})
+        # Continue the row labels of the loaded data so labels stay unique
+        start = int(self.all_data.index.max()) + 1 if len(self.all_data) else 0
+        if self.raw_df is not None:
+            start = max(start, len(self.raw_df))
+        batch.index = pd.RangeIndex(start, start + len(batch))
+
+        added = {}
+        for name, group in batch.groupby('name', sort=False, observed=True):
+            keep = self._thinner.push(
+                name,
+                group['timestamp'].values.astype('datetime64[ns]').view('int64'),
+                group['location-lat'].values,
+                group['location-long'].values,
+            )
+            if len(keep):
+                added[name] = group.iloc[keep]
+        if not added:
+            return 0
+
+        # Build the new state first and swap it in, so concurrent readers see either the old or the new data
+        with instrument.span('dataHandler.append', rows=sum(len(rows) for rows in added.values())):
+            index = self.index.append(added)
+        unique = dict(self.unique)
+        for name in added:
+            s = index.slices(tags=[name])[name]
+            unique[name] = index.data.iloc[s]
+        if self._heat is not None:
+            kept = pd.concat(added.values())
+            heat = self._heat.copy()
+            heat.add(kept['timestamp'].values.astype('datetime64[ns]').view('int64'), kept['location-lat'].values, kept['location-long'].values)
+            self._heat = heat
+        self.index, self.all_data, self.unique = index, index.data, unique
+        self._tracks = None
+        self._spatial = None
+        self._steps = None
+        self._summary = None
+        self._aligned = {}
+        self._appended = True
+        return sum(len(rows) for rows in added.values())
+
+    def follow(self, source=None):
+        """
+        Start following a feed of new fixes, read by refresh().
+
+        Args:
+            source: Object with a read() method returning new rows as a DataFrame, such as
+                streaming.CsvTail or streaming.ChunkDirectory. Defaults to tailing this handler's
+                CSV from where it was loaded.
+
+        Returns:
+            dataHandler: self.
+        """
+        if source is None:
+            source = streaming.CsvTail(self.csv_path, offset=self._loaded_size, columns=self.columns, check=self._loaded_tail)
+        self.feed = source
+        return self
+
+    def rewritten(self):
+        """
+        True if the CSV no longer continues what was loaded (or followed so far): it is
+        shorter or its bytes before that point changed, so it must be reloaded rather than
+        appended from.
+        """
+        if self.feed is not None and hasattr(self.feed, 'rewritten'):
+            return self.feed.rewritten()
+        return (os.path.getsize(self.csv_path) < self._loaded_size
+                or streaming.tail_bytes(self.csv_path, self._loaded_size) != self._loaded_tail)
+
+    def refresh(self):
+        """
+        Read whatever the followed feed has received since the last call and append it.
+
+        Returns:
+            int: Number of fixes kept.
+        """
+        if self.feed is None:
+            return 0
+        return self.append(self.feed.read())
+
+    @property
+    def heat_pyramid(self):
+        """
+        Fix counts of the thinned tracks pre-binned per map cell, zoom level, day and month
+        (density.DensityPyramid). Built on first use and cached next to the raw data cache;
+        fixes appended later are counted in incrementally.
+        """
+        if self._heat is None:
+            with instrument.span('dataHandler.heat_pyramid', rows=len(self.all_data)):
+                key = f"{self.time_interval.value}:{self.min_distance}:{density.ZOOMS}"
+                cached = None if self._appended else ingest.load_derived(self.csv_path, 'heat', key)
+                if cached is not None:
+                    self._heat = density.DensityPyramid.from_frame(cached)
+                else:
+                    self._heat = density.DensityPyramid.from_store(self.tracks)
+                    if not self._appended:
+                        ingest.save_derived(self.csv_path, 'heat', self._heat.to_frame(), key)
+        return self._heat
+
+    def heat_bins(self, start=None, end=None, zoom=10):
+        """
+        Fix counts per map cell for start <= timestamp <= end (like lod.density_bins over
+        query(start, end)), summed from the heat pyramid instead of binning every fix.
+        """
+        if not len(self.index):
+            return pd.DataFrame({'location-lat': [], 'location-long': [], 'count': []})
+        with instrument.span('dataHandler.heat_bins') as span:
+            start = self.index.min_time if start is None else start
+            end = self.index.max_time if end is None else end
+            bins = self.heat_pyramid.density(start, end, zoom, fixes=self.query)
+            span.rows = len(bins)
+        return bins
+
+    def query(self, start=None, end=None, tags=None, bbox=None, polygon=None):
+        """
+        Return the thinned fixes with start <= timestamp <= end.
+
+        Args:
+            start, end: Inclusive time bounds; None leaves that side open.
+            tags (list): Tags to include. None includes every tag.
+            bbox (tuple): (south, west, north, east) in degrees: only fixes inside the box.
+            polygon (list): (lat, long) vertices: only fixes inside the polygon.
+
+        Returns:
+            pd.DataFrame: Matching rows from all_data.
+        """
+        with instrument.span('dataHandler.query') as span:
+            if bbox is None and polygon is None:
+                result = self.index.query(start, end, tags)
+            else:
+                index = self.spatial
+                positions = index.polygon(polygon, start, end, tags) if polygon is not None else index.bbox(*bbox, start, end, tags)
+                if bbox is not None and polygon is not None:
+                    positions = np.intersect1d(positions, index.bbox(*bbox, start, end, tags), assume_unique=True)
+                result = self.all_data.iloc[positions]
+            span.rows = len(result)
+        return result
+
+    def nearest(self, lat, lon, k=1, start=None, end=None, tags=None):
+        """
+        Return the k thinned fixes closest to a point, nearest first, optionally limited to
+        a time range and to some tags.
+
+        Returns:
+            pd.DataFrame: Rows from all_data with an added 'distance' column in meters.
+        """
+        with instrument.span('dataHandler.nearest', k=k):
+            distance, positions = self.spatial.nearest(lat, lon, k, start, end, tags)
+            return self.all_data.iloc[positions].assign(distance=distance)
+
+    @property
+    def steps(self):
+        """
+        Per-step feature table of the thinned tracks (step length, bearing, turning angle,
+        dt, speed, minute of day and month), row-aligned with all_data.
+
+        Built on first use and cached next to the raw data cache, keyed on the CSV hash
+        and thinning parameters. Treat it as read-only: it is shared by every caller.
+        Once fixes have been appended the table describes more than the CSV and is not cached on disk.
+        """
+        if self._steps is None and self._appended:
+            with instrument.span('dataHandler.steps', rows=len(self.all_data)):
+                self._steps = trajectory.build_step_table(self.all_data, self.index.offsets)
+        if self._steps is None:
+            with instrument.span('dataHandler.steps', rows=len(self.all_data)):
+                key = f"{self.time_interval.value}:{self.min_distance}"
+                steps = ingest.load_derived(self.csv_path, 'steps', key)
+                if steps is None or not steps.index.equals(self.all_data.index):
+                    steps = trajectory.build_step_table(self.all_data, self.index.offsets)
+                    ingest.save_derived(self.csv_path, 'steps', steps, key)
+                self._steps = steps
+        return self._steps
+
+    def step_features(self, start=None, end=None, tags=None):
+        """
+        Return the rows of the step feature table with start <= timestamp <= end,
+        optionally limited to some tags. Slices of a single tag can be passed straight
+        to the utils.py analyses.
+        """
+        slices = self.index.slices(start, end, tags)
+        parts = [self.steps.iloc[s] for s in slices.values()]
+        return parts[0] if len(parts) == 1 else pd.concat(parts)
+
+    def activity_profile(self, bin_minutes=90, window=None, solar=False, offset_minutes=0, start=None, end=None, tags=None):
+        """
+        Per-tag daily activity profile of the thinned tracks (see activity.activity_profile),
+        computed from the cached step table for start <= timestamp <= end and some tags.
+        """
+        with instrument.span('dataHandler.activity_profile') as span:
+            profile = activity.activity_profile(self.step_features(start, end, tags), bin_minutes, window, solar, offset_minutes)
+            span.rows = len(profile)
+        return profile
+
+    def aligned(self, step=resample.STEP, max_gap=resample.MAX_GAP, method='linear', tolerance=None):
+        """
+        The thinned tracks of every tag resampled onto one regular time grid
+        (resample.AlignedTracks), for the correlation and proximity analyses. Built on first
+        use for each set of parameters and kept until fixes are appended.
+        """
+        key = (pd.Timedelta(step), method) + tuple(None if value is None else pd.Timedelta(value) for value in (max_gap, tolerance))
+        if key not in self._aligned:
+            with instrument.span('dataHandler.aligned', rows=len(self.all_data)):
+                self._aligned[key] = resample.AlignedTracks.from_store(self.tracks, step, max_gap, method, tolerance)
+        return self._aligned[key]
+
+    def correlations(self, variants=tuple(correlation.VARIANTS), step=resample.STEP, max_gap=resample.MAX_GAP, max_workers=None):
+        """
+        Correlation variants (correlation.VARIANTS) for every pair of tags, computed on the
+        cached aligned grid (see correlation.correlate_pairs).
+        """
+        with instrument.span('dataHandler.correlations'):
+            return correlation.correlate_pairs(self.aligned(step, max_gap), variants, max_workers=max_workers)
+
+    def proximity(self, step=resample.STEP, tolerance=None, max_workers=None):
+        """
+        Distance statistics for every pair of tags, from each tag's nearest fix at every
+        grid time (see proximity.all_pairs_proximity), on a cached grid.
+        """
+        with instrument.span('dataHandler.proximity'):
+            aligned = self.aligned(step, max_gap=None, method='nearest', tolerance=tolerance)
+            return proximity.aligned_proximity(aligned, max_workers=max_workers)
 
     def displayDataPretty(self, df, unique_dfs = None):
+        from tabulate import tabulate
+
         displayLimit = 10
 
         # Check if the DataFrame exceeds the display limit
@@ -74,27 +504,70 @@ class dataHandler:
         
         pass
     def csv_to_geojson(self, df: pd.DataFrame):
-        features = []
-        for _, row in df.iterrows():
-            feature = {
-                "type": "Feature",
-                "geometry": {
-                    "type": "Point",
-                    "coordinates": [row['location-long'], row['location-lat']]
-                },
-                "properties": {
-                    "timestamp": row['timestamp'].isoformat(),
-                    "gps_hdop": row['gps:hdop'],
-                    "satellite_count": row['gps:satellite-count']
-                }
-            }
-            features.append(feature)
-        return {
-            "type": "FeatureCollection",
-            "features": features
-        }
-        
-        
+        """
+        Return the rows of df as a GeoJSON FeatureCollection of points, with their timestamp,
+        HDOP and satellite count as properties. Built column-wise by export.py.
+        """
+        with instrument.span('dataHandler.csv_to_geojson', rows=len(df)):
+            return export.to_geojson(df, properties=export.DEFAULT_PROPERTIES)
+
+    def export_geojson(self, path, df: pd.DataFrame = None, mode='points', ndjson=False, properties=None):
+        """
+        Stream rows to a GeoJSON file without building the whole document in memory.
+
+        Args:
+            path: Output path or writable text stream.
+            df (pd.DataFrame): Rows to export. Defaults to raw_df, or all_data when the raw
+                table was not kept (memory_budget mode).
+            mode (str): 'points' for one feature per row, 'tracks' for one LineString per tag.
+            ndjson (bool): Write one feature per line instead of a FeatureCollection.
+            properties: Point properties, as in export.point_features. Defaults to those
+                properties of csv_to_geojson that df has.
+
+        Returns:
+            int: Number of features written.
+        """
+        if df is None:
+            df = self.raw_df if self.raw_df is not None else self.all_data
+        if properties is None:
+            properties = {name: column for name, column in export.DEFAULT_PROPERTIES.items() if column in df.columns}
+        # raw_df keeps the CSV's tag column; the thinned frames call it 'name'
+        columns = {'tag': 'tag-local-identifier'} if mode == 'tracks' and 'name' not in df.columns else {}
+        with instrument.span('dataHandler.export_geojson', rows=len(df), mode=mode):
+            return export.write_geojson(df, path, mode=mode, properties=properties, ndjson=ndjson, **columns)
+
+
+def load_shared(csv_path=None, time_interval=pd.Timedelta(hours=5), min_distance=75, follow=False):
+    """
+    Return a dataHandler shared by all callers in this process.
+
+    The handler is cached per (file path, thinning parameters) in the process-wide study
+    catalog (catalog.CATALOG), which bounds the memory of all loaded studies, and rebuilt
+    only when the file's modification time changes. Callers must treat the returned
+    handler and its DataFrames as read-only, since every page and session sees the same objects.
+
+    Args:
+        csv_path (str): Path to the Movebank CSV. Defaults to the red fox dataset.
+        time_interval (pd.Timedelta): Minimum gap between kept fixes.
+        min_distance (float): Minimum distance in meters between kept fixes.
+        follow (bool): Treat the file as a growing live feed: rows appended to it are thinned
+            and added incrementally instead of reloading the whole file. A file that shrinks is
+            still reloaded.
+
+    Returns:
+        dataHandler: The loaded, thinned dataset.
+    """
+    # Imported here: catalog builds on this module
+    try:
+        from . import catalog
+    except ImportError:
+        import catalog
+
+    if csv_path is None:
+        csv_path = default_csv_path()
+    return catalog.CATALOG.load(csv_path, time_interval, min_distance, follow)
+
+
 if __name__ == "__main__":
     myDH = dataHandler()
     geojson_data = myDH.csv_to_geojson(myDH.raw_df)
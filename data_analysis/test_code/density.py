@@ -0,0 +1,235 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from . import lod
+except ImportError:
+    import lod
+
+# Zoom levels kept in the pyramid; other zooms are coarsened on the fly from the next finer one
+ZOOMS = (6, 8, 10, 12, 14)
+
+DAY_NS = 86_400 * 10 ** 9
+
+# Time buckets, finest first
+LEVELS = ('day', 'month')
+
+
+def _pack(lat_key, lon_key):
+    # Two signed 32-bit cell indices in one int64
+    return (lat_key.astype(np.int64) << 32) | (lon_key.astype(np.int64) & 0xFFFFFFFF)
+
+
+def _unpack(key):
+    lon_key = ((key & 0xFFFFFFFF) ^ 0x80000000) - 0x80000000
+    return key >> 32, lon_key
+
+
+def _coarsen(key, steps):
+    # The same cell `steps` zoom levels out: both cell indices halve per level
+    if steps == 0:
+        return key
+    lat_key, lon_key = _unpack(key)
+    return _pack(lat_key >> steps, lon_key >> steps)
+
+
+def _months(days):
+    # Calendar month index (months since 1970-01) of day numbers since the epoch
+    months = np.asarray(days, dtype=np.int64).astype('datetime64[D]').astype('datetime64[M]')
+    return months.astype(np.int64)
+
+
+def _month_first_day(month):
+    return int(np.datetime64(int(month), 'M').astype('datetime64[D]').astype(np.int64))
+
+
+def _aggregate(buckets, keys, counts):
+    # Sum counts per (bucket, key) and sort by bucket then key
+    frame = pd.DataFrame({'bucket': buckets, 'key': keys, 'count': counts})
+    frame = frame.groupby(['bucket', 'key'], sort=True)['count'].sum().reset_index()
+    return frame['bucket'].values, frame['key'].values, frame['count'].values
+
+
+class DensityPyramid:
+    """
+    Fix counts pre-binned into map cells at several zoom levels and per day and per
+    calendar month, for heatmaps over any time range.
+
+    A time range is answered by adding up the months it covers completely, then the days
+    left at either end, then the fixes of the partial days at its very edges. The work
+    depends on the number of occupied cells and buckets in the range, not on the number
+    of fixes. Cells match lod.density_bins, with the cell height fixed by the latitude of
+    the whole dataset.
+    """
+
+    def __init__(self, times, lat, lon, zooms=ZOOMS, pixels=4, latitude=None):
+        """
+        Args:
+            times (np.ndarray): int64 nanoseconds since the epoch.
+            lat, lon (np.ndarray): Coordinates in degrees.
+            zooms (tuple): Zoom levels to keep.
+            pixels (int): Cell width in screen pixels.
+            latitude (float): Latitude setting the cell height. Defaults to the mean of lat.
+        """
+        self.zooms = tuple(sorted(zooms))
+        self.pixels = pixels
+        lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+        valid = np.isfinite(lat) & np.isfinite(lon)
+        if latitude is None:
+            latitude = float(lat[valid].mean()) if valid.any() else 0.0
+        self.latitude = latitude
+        empty = np.empty(0, dtype=np.int64)
+        self.tables = {(zoom, level): (empty, empty, empty) for zoom in self.zooms for level in LEVELS}
+        self._add(np.asarray(times, dtype=np.int64)[valid], lat[valid], lon[valid])
+
+    def cell_keys(self, zoom, lat, lon):
+        lat_step, lon_step = lod.cell_size(zoom, self.latitude, self.pixels)
+        return _pack(np.floor(lat / lat_step).astype(np.int64), np.floor(lon / lon_step).astype(np.int64))
+
+    def _add(self, times, lat, lon):
+        previous = self.zooms[-1]
+        days, keys, counts = times // DAY_NS, self.cell_keys(previous, lat, lon), np.ones(len(times), dtype=np.int64)
+        for zoom in reversed(self.zooms):
+            # Each level is built from the (day, cell) counts of the next finer one, not from the fixes
+            days, keys, counts = _aggregate(days, _coarsen(keys, previous - zoom), counts)
+            previous = zoom
+            for level, new in (('day', (days, keys, counts)), ('month', _aggregate(_months(days), keys, counts))):
+                old = self.tables.get((zoom, level))
+                if old is not None and len(old[0]):
+                    new = _aggregate(*(np.concatenate(pair) for pair in zip(old, new)))
+                self.tables[zoom, level] = new
+
+    def add(self, times, lat, lon):
+        """
+        Count newly received fixes into every level.
+        """
+        lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+        valid = np.isfinite(lat) & np.isfinite(lon)
+        self._add(np.asarray(times, dtype=np.int64)[valid], lat[valid], lon[valid])
+
+    def copy(self):
+        """
+        Return a pyramid sharing this one's tables; add() on the copy leaves this one unchanged.
+        """
+        pyramid = DensityPyramid.__new__(DensityPyramid)
+        pyramid.__dict__.update(self.__dict__, tables=dict(self.tables))
+        return pyramid
+
+    @classmethod
+    def from_store(cls, store, **kwargs):
+        return cls(store.times, store.lat, store.lon, **kwargs)
+
+    def to_frame(self):
+        """
+        Return every level as one DataFrame ('zoom', 'level', 'bucket', 'key', 'count'), e.g. for ingest.save_derived.
+        """
+        parts = [pd.DataFrame({'zoom': zoom, 'level': level, 'bucket': b, 'key': k, 'count': c})
+                 for (zoom, level), (b, k, c) in self.tables.items()]
+        frame = pd.concat(parts, ignore_index=True)
+        frame.attrs.update(zooms=list(self.zooms), pixels=self.pixels, latitude=self.latitude)
+        return frame
+
+    @classmethod
+    def from_frame(cls, frame):
+        """
+        Rebuild a pyramid from to_frame() output.
+        """
+        pyramid = cls.__new__(cls)
+        pyramid.zooms = tuple(frame.attrs['zooms'])
+        pyramid.pixels = frame.attrs['pixels']
+        pyramid.latitude = frame.attrs['latitude']
+        pyramid.tables = {}
+        for (zoom, level), part in frame.groupby(['zoom', 'level'], sort=False):
+            pyramid.tables[int(zoom), level] = (part['bucket'].values, part['key'].values, part['count'].values)
+        empty = np.empty(0, dtype=np.int64)
+        for zoom in pyramid.zooms:
+            for level in LEVELS:
+                pyramid.tables.setdefault((zoom, level), (empty, empty, empty))
+        return pyramid
+
+    def _buckets(self, zoom, level, first, last):
+        # Keys and counts of buckets first..last (inclusive)
+        buckets, keys, counts = self.tables[zoom, level]
+        lo, hi = np.searchsorted(buckets, [first, last + 1])
+        return keys[lo:hi], counts[lo:hi]
+
+    def plan(self, start, end):
+        """
+        Split [start, end] into whole months, whole days and partial-day edges.
+
+        Returns:
+            tuple: (months as (first, last) or None, list of (first, last) day ranges,
+                list of (start, end) Timestamp edges still to be counted from fixes).
+        """
+        lo, hi = pd.Timestamp(start).value, pd.Timestamp(end).value
+        first_day = -(-lo // DAY_NS)
+        last_day = (hi + 1) // DAY_NS - 1
+        if first_day > last_day:
+            return None, [], [(pd.Timestamp(lo), pd.Timestamp(hi))]
+        edges = []
+        if lo < first_day * DAY_NS:
+            edges.append((pd.Timestamp(lo), pd.Timestamp(first_day * DAY_NS - 1)))
+        if hi >= (last_day + 1) * DAY_NS:
+            edges.append((pd.Timestamp((last_day + 1) * DAY_NS), pd.Timestamp(hi)))
+
+        first_month = int(_months([first_day])[0])
+        if _month_first_day(first_month) < first_day:
+            first_month += 1
+        last_month = int(_months([last_day])[0])
+        if _month_first_day(last_month + 1) - 1 > last_day:
+            last_month -= 1
+        if first_month > last_month:
+            return None, [(first_day, last_day)], edges
+        days = []
+        if first_day < _month_first_day(first_month):
+            days.append((first_day, _month_first_day(first_month) - 1))
+        if _month_first_day(last_month + 1) <= last_day:
+            days.append((_month_first_day(last_month + 1), last_day))
+        return (first_month, last_month), days, edges
+
+    def density(self, start, end, zoom=10, fixes=None):
+        """
+        Fix counts per map cell for start <= timestamp <= end.
+
+        Args:
+            start, end: Inclusive time bounds.
+            zoom (int): Map zoom level.
+            fixes: Callable (start, end) -> DataFrame of the fixes in that range (e.g.
+                dataHandler.query), used for the partial days at the edges of the range.
+                Without it the range is rounded inward to whole days.
+
+        Returns:
+            pd.DataFrame: One row per occupied cell with its center ('location-lat',
+                'location-long') and 'count', like lod.density_bins.
+        """
+        # Zooms beyond the finest level get its cells
+        zoom = min(zoom, self.zooms[-1])
+        source = min(z for z in self.zooms if z >= zoom)
+        months, days, edges = self.plan(start, end)
+        keys, counts = [], []
+        if months is not None:
+            k, c = self._buckets(source, 'month', *months)
+            keys.append(k), counts.append(c)
+        for first, last in days:
+            k, c = self._buckets(source, 'day', first, last)
+            keys.append(k), counts.append(c)
+        if fixes is not None:
+            for edge_start, edge_end in edges:
+                part = fixes(edge_start, edge_end)
+                lat, lon = part['location-lat'].values.astype(np.float64), part['location-long'].values.astype(np.float64)
+                valid = np.isfinite(lat) & np.isfinite(lon)
+                keys.append(self.cell_keys(source, lat[valid], lon[valid]))
+                counts.append(np.ones(valid.sum(), dtype=np.int64))
+        keys = _coarsen(np.concatenate(keys), source - zoom) if keys else np.empty(0, dtype=np.int64)
+        counts = np.concatenate(counts) if counts else np.empty(0, dtype=np.int64)
+
+        inverse, cells = pd.factorize(keys)
+        totals = np.bincount(inverse, weights=counts, minlength=len(cells)).astype(np.int64)
+        order = np.argsort(-totals, kind='stable')
+        lat_key, lon_key = _unpack(cells[order])
+        lat_step, lon_step = lod.cell_size(zoom, self.latitude, self.pixels)
+        return pd.DataFrame({
+            'location-lat': (lat_key + 0.5) * lat_step,
+            'location-long': (lon_key + 0.5) * lon_step,
+            'count': totals[order],
+        })
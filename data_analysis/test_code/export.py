@@ -0,0 +1,167 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+# Properties written by dataHandler.csv_to_geojson: output name -> column
+DEFAULT_PROPERTIES = {
+    'timestamp': 'timestamp',
+    'gps_hdop': 'gps:hdop',
+    'satellite_count': 'gps:satellite-count',
+}
+
+
+def _iso_format(values):
+    # Same text as Timestamp.isoformat() for every value, built column-wise
+    values = pd.to_datetime(values)
+    if getattr(values.dt, 'tz', None) is not None:
+        return values.map(lambda t: t.isoformat(), na_action='ignore')
+    # numpy's datetime64 -> str conversion is much faster than strftime and gives the same text
+    seconds = values.to_numpy(dtype='datetime64[ns]').astype('datetime64[s]')
+    text = pd.Series(seconds.astype(str).astype(object), index=values.index).where(values.notna())
+    ns = (values.dt.microsecond * 1000 + values.dt.nanosecond).fillna(0).astype(np.int64)
+    if ns.any():
+        fraction = pd.Series(np.where(
+            ns % 1000 == 0,
+            (ns // 1000).map('.{:06d}'.format),
+            ns.map('.{:09d}'.format),
+        ), index=values.index)
+        text = text + fraction.where(ns != 0, '')
+    return text
+
+
+def _encode(values):
+    """
+    JSON-encode every value of a column, returning a Series of JSON text (null for missing values).
+    """
+    values = pd.Series(values)
+    missing = values.isna().values
+    if pd.api.types.is_datetime64_any_dtype(values):
+        text = _iso_format(values).map(json.dumps, na_action='ignore')
+    elif pd.api.types.is_bool_dtype(values):
+        text = values.map({True: 'true', False: 'false'})
+    elif pd.api.types.is_integer_dtype(values):
+        # Nullable integer columns are filled before the cast; the gaps become null below
+        text = pd.Series(values.fillna(0).to_numpy(dtype=np.int64).astype(str).astype(object), index=values.index)
+    elif pd.api.types.is_float_dtype(values):
+        floats = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        # NaN and infinities are not valid JSON numbers
+        missing = ~np.isfinite(floats)
+        # repr gives the shortest round-tripping text, the same as json.dumps
+        text = pd.Series(floats.astype(object), index=values.index).map(repr)
+    else:
+        # Strings and other objects: encode each distinct value once
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        encoded = np.array([json.dumps(u, default=str) for u in uniques] + ['null'], dtype=object)
+        text = pd.Series(encoded[codes], index=values.index)
+    return text.where(~missing, 'null')
+
+
+def _properties(properties):
+    if properties is None:
+        return {}
+    if isinstance(properties, dict):
+        return dict(properties)
+    return {column: column for column in properties}
+
+
+def point_features(df, properties=None, lat='location-lat', lon='location-long'):
+    """
+    Return the GeoJSON Point feature of every row as a Series of JSON text.
+
+    Args:
+        df (pd.DataFrame): Rows to export.
+        properties: Columns written as feature properties: a list of column names, or a dict
+            mapping property name to column. None writes no properties.
+        lat, lon (str): Coordinate columns.
+    """
+    if not len(df):
+        return pd.Series([], dtype=object)
+    head = '{"type": "Feature", "geometry": {"type": "Point", "coordinates": ['
+    text = head + _encode(df[lon].values) + ', ' + _encode(df[lat].values) + ']}, "properties": {'
+    for i, (name, column) in enumerate(_properties(properties).items()):
+        text = text + (', ' if i else '') + json.dumps(name) + ': ' + _encode(df[column].values)
+    return text + '}}'
+
+
+def track_features(df, tag='name', lat='location-lat', lon='location-long', time='timestamp'):
+    """
+    Return one GeoJSON feature per tag, a LineString through its fixes in time order (a Point
+    for a single fix), as a list of JSON text. Properties are the tag, the first and last
+    timestamps and the number of fixes.
+    """
+    features = []
+    df = df.sort_values([tag, time], kind='stable') if len(df) else df
+    for name, group in df.groupby(tag, sort=False, observed=True):
+        coordinates = '[' + _encode(group[lon].values) + ', ' + _encode(group[lat].values) + ']'
+        times = _iso_format(group[time].reset_index(drop=True))
+        if len(group) == 1:
+            geometry = '{"type": "Point", "coordinates": ' + coordinates.iloc[0] + '}'
+        else:
+            geometry = '{"type": "LineString", "coordinates": [' + ', '.join(coordinates) + ']}'
+        props = json.dumps({
+            'name': str(name) if not isinstance(name, (int, float)) else name,
+            'start': times.iloc[0],
+            'end': times.iloc[-1],
+            'n_fixes': len(group),
+        })
+        features.append('{"type": "Feature", "geometry": ' + geometry + ', "properties": ' + props + '}')
+    return features
+
+
+def write_geojson(df, out, mode='points', properties=None, ndjson=False, chunksize=100_000, **columns):
+    """
+    Write rows as GeoJSON to a file or stream, converting `chunksize` rows at a time so
+    the output is never held in memory as a whole.
+
+    Args:
+        df (pd.DataFrame): Rows to export, e.g. dataHandler.raw_df or all_data.
+        out: Path or writable text stream.
+        mode (str): 'points' for one Point feature per row, 'tracks' for one LineString per tag.
+        properties: Property columns for point mode (see point_features).
+        ndjson (bool): Write newline-delimited GeoJSON (one feature per line) instead of a FeatureCollection.
+        chunksize (int): Rows converted at a time in point mode.
+        **columns: Column names overriding the defaults of point_features / track_features
+            (lat, lon, and for tracks tag and time).
+
+    Returns:
+        int: Number of features written.
+    """
+    if isinstance(out, (str, bytes)) or hasattr(out, '__fspath__'):
+        with open(out, 'w', encoding='utf-8') as f:
+            return write_geojson(df, f, mode, properties, ndjson, chunksize, **columns)
+
+    if mode == 'points':
+        chunks = (point_features(df.iloc[i:i + chunksize], properties, **columns) for i in range(0, len(df), chunksize))
+    elif mode == 'tracks':
+        chunks = [track_features(df, **columns)]
+    else:
+        raise ValueError(f"Unknown mode: {mode!r}")
+
+    count = 0
+    if not ndjson:
+        out.write('{"type": "FeatureCollection", "features": [\n')
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        if ndjson:
+            out.write('\n'.join(chunk))
+            out.write('\n')
+        else:
+            out.write(',\n' if count else '')
+            out.write(',\n'.join(chunk))
+        count += len(chunk)
+    if not ndjson:
+        out.write('\n]}\n')
+    return count
+
+
+def to_geojson(df, mode='points', properties=None, **columns):
+    """
+    Return rows as a GeoJSON FeatureCollection dict (see write_geojson). For large exports
+    prefer write_geojson, which streams to a file.
+    """
+    buffer = io.StringIO()
+    write_geojson(df, buffer, mode, properties, **columns)
+    return json.loads(buffer.getvalue())
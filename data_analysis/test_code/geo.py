@@ -0,0 +1,139 @@
+import numpy as np
+
+# WGS-84 ellipsoid, the same model geopy's geodesic uses by default
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+# Mean earth radius in meters (matches geopy.distance.EARTH_RADIUS)
+EARTH_RADIUS = 6371009.0
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in meters between arrays of points on a sphere.
+
+    Args:
+        lat1, lon1, lat2, lon2 (array-like): Coordinates in degrees. Inputs broadcast against each other.
+
+    Returns:
+        np.ndarray: Distances in meters.
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    d_lat = lat2 - lat1
+    d_lon = lon2 - lon1
+    a = np.sin(d_lat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(d_lon / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def vincenty(lat1, lon1, lat2, lon2, max_iter=200, tol=1e-12):
+    """
+    Ellipsoidal (WGS-84) distance in meters using Vincenty's inverse formula,
+    evaluated for all point pairs at once.
+
+    Args:
+        lat1, lon1, lat2, lon2 (array-like): Coordinates in degrees. Inputs broadcast against each other.
+        max_iter (int): Maximum number of lambda iterations.
+        tol (float): Convergence tolerance on lambda in radians.
+
+    Returns:
+        tuple: (distances in meters, boolean mask of pairs that converged).
+            Non-converged pairs (nearly antipodal points) and pairs with NaN coordinates are returned as NaN.
+    """
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (lat1, lon1, lat2, lon2)))
+    U1 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lat1)))
+    U2 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lat2)))
+    L = np.radians(lon2 - lon1)
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sinU2, cosU2 = np.sin(U2), np.cos(U2)
+
+    lam = L.copy()
+    # Pairs with missing coordinates are NaN throughout and need no iterations
+    missing = ~(np.isfinite(L) & np.isfinite(U1) & np.isfinite(U2))
+    converged = np.zeros(lam.shape, dtype=bool)
+    sin_sigma = cos_sigma = sigma = cos_sq_alpha = cos2_sigma_m = np.zeros(lam.shape)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for _ in range(max_iter):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.sqrt((cosU2 * sin_lam) ** 2 + (cosU1 * sinU2 - sinU1 * cosU2 * cos_lam) ** 2)
+            cos_sigma = sinU1 * sinU2 + cosU1 * cosU2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cosU1 * cosU2 * sin_lam / sin_sigma)
+            cos_sq_alpha = 1 - sin_alpha ** 2
+            # Equatorial lines have cos_sq_alpha == 0
+            cos2_sigma_m = np.where(cos_sq_alpha == 0, 0.0, cos_sigma - 2 * sinU1 * sinU2 / cos_sq_alpha)
+            C = WGS84_F / 16 * cos_sq_alpha * (4 + WGS84_F * (4 - 3 * cos_sq_alpha))
+            lam_prev = lam
+            lam = L + (1 - C) * WGS84_F * sin_alpha * (
+                sigma + C * sin_sigma * (cos2_sigma_m + C * cos_sigma * (-1 + 2 * cos2_sigma_m ** 2))
+            )
+            converged = (np.abs(lam - lam_prev) <= tol) | missing
+            if converged.all():
+                break
+
+        u_sq = cos_sq_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+        A = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+        B = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+        delta_sigma = B * sin_sigma * (
+            cos2_sigma_m + B / 4 * (
+                cos_sigma * (-1 + 2 * cos2_sigma_m ** 2)
+                - B / 6 * cos2_sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos2_sigma_m ** 2)
+            )
+        )
+        distance = WGS84_B * A * (sigma - delta_sigma)
+
+    # Coincident points converge trivially to zero
+    distance = np.where(sin_sigma == 0, 0.0, distance)
+    converged = converged | (sin_sigma == 0)
+    distance = np.where(converged, distance, np.nan)
+    return distance, converged
+
+
+def geodesic_distance(lat1, lon1, lat2, lon2):
+    """
+    Ellipsoidal distance in meters for arrays of point pairs. Uses the vectorized
+    Vincenty kernel and falls back to geopy's geodesic for the pairs it cannot solve.
+
+    Args:
+        lat1, lon1, lat2, lon2 (array-like): Coordinates in degrees. Inputs broadcast against each other.
+
+    Returns:
+        np.ndarray: Distances in meters (NaN where a coordinate is NaN).
+    """
+    distance, converged = vincenty(lat1, lon1, lat2, lon2)
+    if not converged.all():
+        lat1, lon1, lat2, lon2 = np.broadcast_arrays(lat1, lon1, lat2, lon2)
+        idx = np.flatnonzero(~converged.ravel())
+        distance.ravel()[idx] = exact_distance(
+            lat1.ravel()[idx], lon1.ravel()[idx], lat2.ravel()[idx], lon2.ravel()[idx]
+        )
+    return distance
+
+
+def exact_distance(lat1, lon1, lat2, lon2):
+    """
+    Per-pair geopy geodesic distance in meters. Slow; only meant for the handful of
+    pairs the vectorized kernels cannot decide on their own.
+    """
+    from geopy.distance import geodesic
+
+    return np.array([
+        geodesic((a, b), (c, d)).meters for a, b, c, d in zip(lat1, lon1, lat2, lon2)
+    ], dtype=np.float64)
+
+
+def bearing(lat1, lon1, lat2, lon2):
+    """
+    Initial bearing in degrees (0-360, clockwise from north) from point 1 to point 2.
+
+    Args:
+        lat1, lon1, lat2, lon2 (array-like): Coordinates in degrees. Inputs broadcast against each other.
+
+    Returns:
+        np.ndarray: Bearings in degrees.
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    d_lon = lon2 - lon1
+    x = np.sin(d_lon) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(d_lon)
+    return (np.degrees(np.arctan2(x, y)) + 360) % 360
@@ -0,0 +1,235 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from . import geo
+except ImportError:
+    import geo
+
+# Above this many fixes method='auto' switches from full-batch KMeans to MiniBatchKMeans
+MINIBATCH_ROWS = 50_000
+
+# Gaps between fixes longer than this are not counted as dwell time (e.g. the tag was off)
+MAX_GAP = pd.Timedelta(days=1)
+
+# Columns of the hotspot table, most visited first
+HOTSPOT_COLUMNS = [
+    'cluster', 'frequency', 'location-lat', 'location-long', 'most_frequent_hour',
+    'south', 'west', 'north', 'east', 'radius', 'visits', 'dwell_time', 'first_visit', 'last_visit',
+]
+
+
+def to_local(lat, lon, origin):
+    """
+    Project coordinates in degrees to meters east/north of `origin` (lat, long) on a local
+    equirectangular plane, so that clustering distances are in meters rather than degrees.
+
+    Returns:
+        np.ndarray: (n, 2) array of (x, y) meters.
+    """
+    lat0, lon0 = origin
+    x = np.radians(np.asarray(lon, dtype=np.float64) - lon0) * geo.EARTH_RADIUS * np.cos(np.radians(lat0))
+    y = np.radians(np.asarray(lat, dtype=np.float64) - lat0) * geo.EARTH_RADIUS
+    return np.column_stack([x, y])
+
+
+def from_local(xy, origin):
+    """
+    Inverse of to_local: (n, 2) meters back to (lat, long) arrays in degrees.
+    """
+    lat0, lon0 = origin
+    lat = lat0 + np.degrees(xy[:, 1] / geo.EARTH_RADIUS)
+    lon = lon0 + np.degrees(xy[:, 0] / (geo.EARTH_RADIUS * np.cos(np.radians(lat0))))
+    return lat, lon
+
+
+def kmeans_labels(lat, lon, n_clusters=5, init=None, method='auto', batch_size=4096, random_state=0):
+    """
+    Partition fixes into n_clusters groups with KMeans in local meters.
+
+    Args:
+        lat, lon (np.ndarray): Coordinates in degrees.
+        n_clusters (int): Number of clusters. Ignored when init is given.
+        init: Previous centers as an (n, 2) array of (lat, long), or an earlier hotspot
+            table. The fit starts from them instead of k-means++, so repeated runs over a
+            growing track converge in a few iterations. Each fitted cluster is then matched
+            to the nearest previous center (one to one) and takes its id: the table's
+            'cluster' value, or the center's row number for an array.
+        method (str): 'kmeans' (full batch), 'minibatch' or 'auto' (minibatch above MINIBATCH_ROWS fixes).
+        batch_size (int): Mini-batch size.
+
+    Returns:
+        tuple: (labels, centers as (lat, long) arrays indexed by label; with init, ids the
+            previous centers do not use are NaN).
+    """
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+
+    origin = (float(np.mean(lat)), float(np.mean(lon)))
+    xy = to_local(lat, lon, origin)
+    ids = None
+    if init is not None:
+        if isinstance(init, pd.DataFrame):
+            ids = init['cluster'].values.astype(np.int64) if 'cluster' in init else None
+            init = init[['location-lat', 'location-long']] if 'location-lat' in init else init
+        init = np.asarray(init, dtype=np.float64)
+        start, n_clusters, n_init = to_local(init[:, 0], init[:, 1], origin), len(init), 1
+    else:
+        start, n_init = 'k-means++', 'auto'
+    if method == 'auto':
+        method = 'minibatch' if len(xy) > MINIBATCH_ROWS else 'kmeans'
+    if method == 'kmeans':
+        model = KMeans(n_clusters=n_clusters, init=start, n_init=n_init, random_state=random_state)
+    elif method == 'minibatch':
+        model = MiniBatchKMeans(n_clusters=n_clusters, init=start, n_init=n_init, batch_size=batch_size, random_state=random_state)
+    else:
+        raise ValueError(f"Unknown KMeans method: {method!r}")
+    model.fit(xy)
+    if init is None:
+        return model.labels_, from_local(model.cluster_centers_, origin)
+
+    # KMeans numbers the clusters afresh; give each the id of the previous center it is closest to
+    from scipy.optimize import linear_sum_assignment
+
+    ids = np.arange(n_clusters) if ids is None else ids
+    cost = np.hypot(*(model.cluster_centers_[:, None, :] - start[None, :, :]).transpose(2, 0, 1))
+    fitted, previous = linear_sum_assignment(cost)
+    new_ids = np.empty(n_clusters, dtype=np.int64)
+    new_ids[fitted] = ids[previous]
+    center_lat, center_lon = from_local(model.cluster_centers_, origin)
+    centers = (np.full(new_ids.max() + 1, np.nan), np.full(new_ids.max() + 1, np.nan))
+    centers[0][new_ids], centers[1][new_ids] = center_lat, center_lon
+    return new_ids[model.labels_], centers
+
+
+def density_labels(lat, lon, eps=250.0, min_samples=10, cell=None):
+    """
+    Density-based hotspots: DBSCAN over great-circle (haversine) distance, accelerated by
+    first collapsing the fixes onto a grid. Every occupied cell becomes one weighted point
+    at the mean of its fixes, so the ball-tree neighbour search runs over cells, not fixes.
+
+    Args:
+        lat, lon (np.ndarray): Coordinates in degrees.
+        eps (float): Neighbourhood radius in meters.
+        min_samples (int): Fixes within eps needed to seed a cluster.
+        cell (float): Grid cell size in meters. Defaults to eps / 4, which moves no fix
+            more than ~0.35 eps from its own position.
+
+    Returns:
+        tuple: (labels, with -1 for fixes outside every hotspot; centers as (lat, long)
+            arrays, the mean of each cluster's fixes).
+    """
+    from sklearn.cluster import DBSCAN
+
+    lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+    if not len(lat):
+        return np.empty(0, dtype=np.int64), (np.empty(0), np.empty(0))
+    cell = eps / 4 if cell is None else cell
+    xy = to_local(lat, lon, (float(lat.mean()), float(lon.mean())))
+    cells = np.floor((xy - xy.min(axis=0)) / cell).astype(np.int64)
+    inverse, _ = pd.factorize(cells[:, 0] * (cells[:, 1].max() + 1) + cells[:, 1])
+    counts = np.bincount(inverse)
+    cell_lat = np.bincount(inverse, weights=lat) / counts
+    cell_lon = np.bincount(inverse, weights=lon) / counts
+
+    model = DBSCAN(eps=eps / geo.EARTH_RADIUS, min_samples=min_samples, metric='haversine', algorithm='ball_tree')
+    model.fit(np.radians(np.column_stack([cell_lat, cell_lon])), sample_weight=counts)
+    labels = model.labels_[inverse]
+
+    clustered = labels >= 0
+    n = labels.max() + 1
+    size = np.bincount(labels[clustered], minlength=n)
+    centers = (np.bincount(labels[clustered], weights=lat[clustered], minlength=n) / size,
+               np.bincount(labels[clustered], weights=lon[clustered], minlength=n) / size)
+    return labels, centers
+
+
+def summarize(df, labels, centers, max_gap=MAX_GAP):
+    """
+    Describe each cluster of a track with grouped (vectorized) operations.
+
+    Args:
+        df (pd.DataFrame): Fixes with 'timestamp', 'location-lat' and 'location-long', sorted by timestamp.
+        labels (np.ndarray): Cluster of each fix; -1 marks fixes outside every cluster.
+        centers (tuple): (lat, long) arrays of the cluster centers.
+        max_gap (pd.Timedelta): Longest gap between two fixes counted as dwell time.
+
+    Returns:
+        pd.DataFrame: One row per cluster, most visited first, with HOTSPOT_COLUMNS:
+            frequency (fixes), center, most_frequent_hour, bounding box (south, west,
+            north, east), radius (meters from the center to the furthest fix), visits
+            (separate stays), dwell_time (time until the next fix, summed over fixes
+            followed by a fix in the same cluster at most max_gap later), first_visit and last_visit.
+    """
+    labels = np.asarray(labels)
+    times = pd.to_datetime(df['timestamp']).values
+    lat, lon = df['location-lat'].values, df['location-long'].values
+    # Padded with NaN so that label -1 (no cluster) indexes a valid slot
+    center_lat = np.append(np.asarray(centers[0], dtype=np.float64), np.nan)
+    center_lon = np.append(np.asarray(centers[1], dtype=np.float64), np.nan)
+
+    # A stay continues while consecutive fixes are in the same cluster
+    same_as_next = np.zeros(len(labels), dtype=bool)
+    same_as_next[:-1] = labels[:-1] == labels[1:]
+    entered = np.ones(len(labels), dtype=bool)
+    entered[1:] = ~same_as_next[:-1]
+    gap = np.zeros(len(labels), dtype='timedelta64[ns]')
+    gap[:-1] = times[1:] - times[:-1]
+    gap[~same_as_next | (gap > pd.Timedelta(max_gap).to_timedelta64())] = np.timedelta64(0, 'ns')
+
+    fixes = pd.DataFrame({
+        'cluster': labels,
+        'lat': lat,
+        'lon': lon,
+        'time': times,
+        'hour': pd.DatetimeIndex(times).hour,
+        'entered': entered,
+        'gap': gap,
+        'distance': geo.haversine(center_lat[labels], center_lon[labels], lat, lon),
+    })
+    fixes = fixes[fixes['cluster'] >= 0]
+    grouped = fixes.groupby('cluster')
+    table = grouped.agg(
+        frequency=('lat', 'size'),
+        south=('lat', 'min'),
+        west=('lon', 'min'),
+        north=('lat', 'max'),
+        east=('lon', 'max'),
+        radius=('distance', 'max'),
+        visits=('entered', 'sum'),
+        dwell_time=('gap', 'sum'),
+        first_visit=('time', 'min'),
+        last_visit=('time', 'max'),
+    )
+    # Most frequent hour: the first (smallest) hour with the highest count, like Series.mode()[0]
+    hours = fixes.groupby(['cluster', 'hour']).size().unstack(fill_value=0)
+    table['most_frequent_hour'] = hours.idxmax(axis=1)
+    table['location-lat'] = center_lat[table.index]
+    table['location-long'] = center_lon[table.index]
+    table = table.reset_index().sort_values(by='frequency', ascending=False, kind='stable')
+    return table[HOTSPOT_COLUMNS].reset_index(drop=True)
+
+
+def find_hotspots(df, method='auto', n_clusters=5, init=None, eps=250.0, min_samples=10, max_gap=MAX_GAP, **kwargs):
+    """
+    Find the areas an animal visits most often.
+
+    Args:
+        df (pd.DataFrame): Fixes with 'timestamp', 'location-lat' and 'location-long' columns.
+        method (str): 'kmeans', 'minibatch', 'auto' (see kmeans_labels) or 'dbscan' (see density_labels).
+        n_clusters (int): Number of clusters for the KMeans methods.
+        init: Previous centers or hotspot table to warm-start the KMeans methods from (see kmeans_labels).
+        eps (float): DBSCAN neighbourhood radius in meters.
+        min_samples (int): DBSCAN core-point threshold in fixes.
+        max_gap (pd.Timedelta): Longest gap between fixes counted as dwell time.
+        **kwargs: Passed on to kmeans_labels or density_labels.
+
+    Returns:
+        pd.DataFrame: The hotspot table (see summarize).
+    """
+    df = df.sort_values(by='timestamp', kind='stable')
+    lat, lon = df['location-lat'].values, df['location-long'].values
+    if method == 'dbscan':
+        labels, centers = density_labels(lat, lon, eps, min_samples, **kwargs)
+    else:
+        labels, centers = kmeans_labels(lat, lon, n_clusters, init, method, **kwargs)
+    return summarize(df, labels, centers, max_gap)
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+try:
+    from . import instrument
+except ImportError:
+    import instrument
+
+# Repeated string columns stored dictionary-encoded and loaded back as pandas categoricals
+CATEGORICAL_COLUMNS = [
+    'tag-local-identifier',
+    'individual-local-identifier',
+    'individual-taxon-canonical-name',
+    'study-name',
+    'sensor-type',
+    'gps:fix-type-raw',
+]
+COORDINATE_COLUMNS = ['location-long', 'location-lat']
+
+# Bump when the cache layout changes so stale caches are rebuilt
+CACHE_VERSION = 1
+
+
+def file_hash(path, block_size=1 << 20):
+    """
+    Return the SHA-256 hex digest of a file, read in blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_paths(csv_path, cache_dir=None):
+    """
+    Return the (parquet, metadata) paths used to cache a CSV. By default the cache
+    lives in a `.cache` directory next to the CSV.
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(csv_path)), '.cache')
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f'{stem}.parquet'), os.path.join(cache_dir, f'{stem}.meta.json')
+
+
+def _typed_chunk(chunk, coord_dtype, text_dtype='string'):
+    chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+    for column in COORDINATE_COLUMNS:
+        if column in chunk:
+            chunk[column] = chunk[column].astype(coord_dtype)
+    for column in CATEGORICAL_COLUMNS:
+        if column in chunk:
+            chunk[column] = chunk[column].astype(text_dtype)
+    return chunk
+
+
+def ingest_csv(csv_path, cache_dir=None, coord_dtype='float64', chunksize=1_000_000, digest=None):
+    """
+    Convert a Movebank CSV into a typed Parquet cache. The CSV is streamed in chunks,
+    so ingest memory does not grow with the file size.
+
+    Args:
+        csv_path (str): Path to the Movebank CSV.
+        cache_dir (str): Directory for the cache files. Defaults to `.cache` next to the CSV.
+        coord_dtype (str): dtype for the coordinate columns. float64 keeps the thinning
+            results identical to reading the CSV directly; float32 halves their size.
+        chunksize (int): Number of CSV rows parsed at a time.
+        digest (str): Precomputed SHA-256 of the CSV, if the caller already has it.
+
+    Returns:
+        str: Path to the Parquet file.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parquet_path, meta_path = cache_paths(csv_path, cache_dir)
+    os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+    stat = os.stat(csv_path)
+    if digest is None:
+        digest = file_hash(csv_path)
+
+    # Write to a temporary file first so a crashed ingest never leaves a half-written cache behind
+    tmp_path = parquet_path + '.tmp'
+    writer = None
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            table = pa.Table.from_pandas(_typed_chunk(chunk, coord_dtype), preserve_index=False)
+            # Drop the pandas dtype metadata so text columns come back as categoricals via read_dictionary
+            table = table.replace_schema_metadata(None)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, parquet_path)
+
+    with open(meta_path, 'w') as f:
+        json.dump({
+            'version': CACHE_VERSION,
+            'csv_size': stat.st_size,
+            'csv_mtime_ns': stat.st_mtime_ns,
+            'csv_sha256': digest,
+            'coord_dtype': coord_dtype,
+        }, f)
+    return parquet_path
+
+
+def _cache_is_fresh(csv_path, parquet_path, meta_path, coord_dtype):
+    """
+    Check the cache metadata against the CSV. Size and mtime are compared first; the
+    file is only re-hashed when they differ (e.g. after a copy or touch). Returns
+    (fresh, digest) where digest is the CSV hash if it had to be computed.
+    """
+    if not (os.path.exists(parquet_path) and os.path.exists(meta_path)):
+        return False, None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get('version') != CACHE_VERSION or meta.get('coord_dtype') != coord_dtype:
+        return False, None
+    stat = os.stat(csv_path)
+    if meta['csv_size'] == stat.st_size and meta['csv_mtime_ns'] == stat.st_mtime_ns:
+        return True, None
+    digest = file_hash(csv_path)
+    if digest != meta['csv_sha256']:
+        return False, digest
+    # Same content, new mtime: remember it so the next check skips hashing
+    meta['csv_size'], meta['csv_mtime_ns'] = stat.st_size, stat.st_mtime_ns
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    return True, digest
+
+
+def load_table(csv_path, columns=None, cache_dir=None, coord_dtype='float64'):
+    """
+    Load a Movebank CSV through its columnar cache, ingesting it first if the cache is
+    missing or the CSV content has changed.
+
+    Args:
+        csv_path (str): Path to the Movebank CSV.
+        columns (list): Columns to load. Columns missing from the file are skipped. None loads all columns.
+        cache_dir (str): Directory for the cache files. Defaults to `.cache` next to the CSV.
+        coord_dtype (str): dtype for the coordinate columns.
+
+    Returns:
+        pd.DataFrame: The requested columns with categorical tag IDs and datetime64 timestamps.
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        # No Parquet support installed: parse the CSV directly
+        df = pd.read_csv(csv_path, usecols=lambda c: columns is None or c in columns)
+        return _typed_chunk(df, coord_dtype, 'category')
+
+    parquet_path, meta_path = cache_paths(csv_path, cache_dir)
+    try:
+        fresh, digest = _cache_is_fresh(csv_path, parquet_path, meta_path, coord_dtype)
+        if not fresh:
+            with instrument.span('ingest.csv_to_parquet'):
+                ingest_csv(csv_path, cache_dir, coord_dtype, digest=digest)
+    except OSError:
+        # Read-only data directory: fall back to parsing the CSV every time
+        df = pd.read_csv(csv_path, usecols=lambda c: columns is None or c in columns)
+        return _typed_chunk(df, coord_dtype, 'category')
+
+    available = pq.read_schema(parquet_path).names
+    if columns is not None:
+        columns = [c for c in columns if c in available]
+    categorical = [c for c in CATEGORICAL_COLUMNS if c in available and (columns is None or c in columns)]
+    with instrument.span('ingest.read_parquet') as span:
+        table = pq.read_table(parquet_path, columns=columns, read_dictionary=categorical)
+        df = table.to_pandas()
+        span.rows = len(df)
+    return df
+
+
+def _derived_paths(csv_path, name, cache_dir=None):
+    parquet_path, _ = cache_paths(csv_path, cache_dir)
+    base = os.path.splitext(parquet_path)[0]
+    return f'{base}.{name}.parquet', f'{base}.{name}.meta.json'
+
+
+def _source_hash(csv_path, cache_dir=None):
+    # Hash recorded when the raw cache was last validated; None if there is no cache
+    _, meta_path = cache_paths(csv_path, cache_dir)
+    try:
+        with open(meta_path) as f:
+            return json.load(f).get('csv_sha256')
+    except (OSError, ValueError):
+        return None
+
+
+def save_derived(csv_path, name, df, key, cache_dir=None):
+    """
+    Cache a table derived from a CSV (e.g. step features) next to its raw cache. The table
+    is tied to the CSV hash and `key`, which should describe every parameter it depends on.
+    Does nothing if the CSV has no raw cache or the cache directory is not writable.
+    """
+    digest = _source_hash(csv_path, cache_dir)
+    if digest is None:
+        return
+    parquet_path, meta_path = _derived_paths(csv_path, name, cache_dir)
+    try:
+        df.to_parquet(parquet_path + '.tmp')
+        os.replace(parquet_path + '.tmp', parquet_path)
+        with open(meta_path, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'csv_sha256': digest, 'key': key}, f)
+    except (OSError, ImportError):
+        pass
+
+
+def load_derived(csv_path, name, key, cache_dir=None):
+    """
+    Load a derived table saved by save_derived, or return None if it is missing or was
+    built from a different CSV or with a different key.
+    """
+    parquet_path, meta_path = _derived_paths(csv_path, name, cache_dir)
+    digest = _source_hash(csv_path, cache_dir)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if digest is None or meta != {'version': CACHE_VERSION, 'csv_sha256': digest, 'key': key}:
+            return None
+        return pd.read_parquet(parquet_path)
+    except (OSError, ValueError, ImportError):
+        return None
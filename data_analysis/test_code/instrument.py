@@ -0,0 +1,216 @@
+import collections
+import functools
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+# Timing spans for the data pipeline and the app pages. Recording is off unless the
+# TRACKING_INSTRUMENT environment variable is set or enable() is called; while it is off,
+# span() hands back one shared do-nothing object, so instrumented code pays only a function call.
+
+_enabled = os.environ.get('TRACKING_INSTRUMENT', '') not in ('', '0')
+_records = collections.deque(maxlen=20000)
+_lock = threading.Lock()
+_local = threading.local()
+_origin = time.perf_counter_ns()
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def _rss():
+    # Resident set size in bytes, or None where /proc is not available
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return None
+
+
+def enable(keep=None):
+    """
+    Start recording spans. keep sets how many of the most recent spans are kept.
+    """
+    global _enabled, _records
+    if keep is not None:
+        with _lock:
+            _records = collections.deque(_records, maxlen=keep)
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def clear():
+    with _lock:
+        _records.clear()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """
+    One timed region. Set `rows` (or any key of `attrs`) inside the with block to record
+    how much data the step handled.
+    """
+
+    def __init__(self, name, rows=None, attrs=None):
+        self.name = name
+        self.rows = rows
+        self.attrs = attrs or {}
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1].name if stack else None
+        self.depth = len(stack)
+        stack.append(self)
+        self.rss = _rss()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        rss = _rss()
+        _local.stack.pop()
+        record = {
+            'name': self.name,
+            'parent': self.parent,
+            'depth': self.depth,
+            'thread': threading.get_ident(),
+            'start_us': (self.start - _origin) / 1000,
+            'duration_ms': (end - self.start) / 1e6,
+            'rows': self.rows,
+            # Process-wide, so concurrent sessions show up in each other's deltas
+            'memory_delta': None if rss is None or self.rss is None else rss - self.rss,
+            'error': None if exc_type is None else exc_type.__name__,
+            **self.attrs,
+        }
+        with _lock:
+            _records.append(record)
+        return False
+
+
+def span(name, rows=None, **attrs):
+    """
+    Time a block of code:
+
+        with instrument.span('thin', rows=len(df)) as s:
+            ...
+            s.rows = len(result)
+
+    Returns a no-op context manager when recording is disabled.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, rows, attrs)
+
+
+def timed(name=None):
+    """
+    Decorator recording a span around every call of a function.
+    """
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def records():
+    """
+    Return the recorded spans, oldest first, as a list of dicts.
+    """
+    with _lock:
+        return list(_records)
+
+
+def summary():
+    """
+    Aggregate the recorded spans by name.
+
+    Returns:
+        pd.DataFrame: 'calls', 'total_ms', 'mean_ms', 'max_ms', 'rows' (total) and
+            'memory_delta' (total bytes) per span name, slowest total first.
+    """
+    df = pd.DataFrame(records(), columns=['name', 'duration_ms', 'rows', 'memory_delta'])
+    if df.empty:
+        return pd.DataFrame(columns=['name', 'calls', 'total_ms', 'mean_ms', 'max_ms', 'rows', 'memory_delta'])
+    grouped = df.groupby('name')
+    return pd.DataFrame({
+        'calls': grouped.size(),
+        'total_ms': grouped['duration_ms'].sum(),
+        'mean_ms': grouped['duration_ms'].mean(),
+        'max_ms': grouped['duration_ms'].max(),
+        'rows': grouped['rows'].sum(min_count=1),
+        'memory_delta': grouped['memory_delta'].sum(min_count=1),
+    }).sort_values('total_ms', ascending=False).reset_index()
+
+
+def to_json(path=None):
+    """
+    Export the recorded spans as JSON. Writes to path if given; returns the JSON text.
+    """
+    text = json.dumps(records(), default=str)
+    if path is not None:
+        with open(path, 'w') as f:
+            f.write(text)
+    return text
+
+
+def to_chrome_trace(path=None):
+    """
+    Export the recorded spans in the Chrome trace event format, viewable in chrome://tracing
+    or https://ui.perfetto.dev. Writes to path if given; returns the JSON text.
+    """
+    pid = os.getpid()
+    events = []
+    for record in records():
+        args = {key: value for key, value in record.items()
+                if key not in ('name', 'thread', 'start_us', 'duration_ms', 'depth', 'parent') and value is not None}
+        events.append({
+            'name': record['name'],
+            'ph': 'X',
+            'ts': record['start_us'],
+            'dur': record['duration_ms'] * 1000,
+            'pid': pid,
+            'tid': record['thread'],
+            'args': args,
+        })
+    text = json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}, default=str)
+    if path is not None:
+        with open(path, 'w') as f:
+            f.write(text)
+    return text
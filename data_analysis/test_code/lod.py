@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+# Web-mercator tiles are 256 pixels wide at zoom 0
+TILE_SIZE = 256
+
+
+def cell_size(zoom, latitude, pixels=4):
+    """
+    Size in degrees (lat, long) of a square map cell spanning `pixels` screen pixels at
+    the given zoom level and latitude.
+    """
+    lon_step = 360.0 / (TILE_SIZE * 2 ** zoom) * pixels
+    lat_step = lon_step * np.cos(np.radians(latitude))
+    return lat_step, lon_step
+
+
+def point_budget(zoom, base=5000, min_points=1000, max_points=50000):
+    """
+    Number of points worth sending at a zoom level: zoomed-in views resolve more detail,
+    so the budget doubles with each zoom level above 10 and halves below it.
+    """
+    return int(np.clip(base * 2.0 ** (zoom - 10), min_points, max_points))
+
+
+def _grid_keys(df, lat_step, lon_step):
+    return (
+        np.floor(df['location-lat'].values / lat_step).astype(np.int64),
+        np.floor(df['location-long'].values / lon_step).astype(np.int64),
+    )
+
+
+def grid_thin(df, zoom, budget, pixels=4):
+    """
+    Keep the first fix of each tag in every map cell. Cells start at `pixels` wide and are
+    doubled until the result fits in the budget.
+    """
+    latitude = df['location-lat'].mean()
+    while True:
+        lat_step, lon_step = cell_size(zoom, latitude, pixels)
+        lat_key, lon_key = _grid_keys(df, lat_step, lon_step)
+        keys = pd.DataFrame({'name': df['name'].values, 'lat': lat_key, 'lon': lon_key})
+        keep = ~keys.duplicated().values
+        if keep.sum() <= budget or pixels >= TILE_SIZE:
+            return df[keep]
+        pixels *= 2
+
+
+def stride_thin(df, budget):
+    """
+    Keep every k-th fix of each tag, plus each tag's first and last fix, with k chosen
+    so the total fits in the budget.
+    """
+    step = int(np.ceil(len(df) / budget))
+    position = df.groupby('name', sort=False, observed=True).cumcount().values
+    size = df.groupby('name', sort=False, observed=True)['name'].transform('size').values
+    return df[(position % step == 0) | (position == size - 1)]
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: pick n_out indices of the polyline (x, y) that best
+    preserve its visual shape. The first and last points are always kept.
+
+    Returns:
+        np.ndarray: Sorted positions of the selected points.
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[stop:next_stop].mean()
+        next_y = y[stop:next_stop].mean()
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(area.argmax())
+        selected[i + 1] = previous
+    return selected
+
+
+def lttb_thin(df, budget):
+    """
+    Run LTTB on each tag's track in long/lat space, splitting the budget between tags in
+    proportion to their number of fixes.
+    """
+    parts = []
+    for _, group in df.groupby('name', sort=False, observed=True):
+        n_out = max(int(budget * len(group) / len(df)), 2)
+        keep = lttb(group['location-long'].values, group['location-lat'].values, n_out)
+        parts.append(group.iloc[keep])
+    return pd.concat(parts) if parts else df
+
+
+def downsample(df, zoom=10, budget=None, method='grid'):
+    """
+    Reduce a set of tracks to at most roughly `budget` points for display.
+
+    Args:
+        df (pd.DataFrame): Fixes with 'name', 'timestamp', 'location-lat' and 'location-long' columns, sorted by time within each tag.
+        zoom (int): Map zoom level the points are drawn at.
+        budget (int): Maximum number of points. Defaults to point_budget(zoom).
+        method (str): 'grid' (one fix per tag per map cell), 'stride' (every k-th fix) or 'lttb'.
+
+    Returns:
+        pd.DataFrame: The selected rows of df.
+    """
+    if budget is None:
+        budget = point_budget(zoom)
+    if len(df) <= budget:
+        return df
+    if method == 'grid':
+        return grid_thin(df, zoom, budget)
+    if method == 'stride':
+        return stride_thin(df, budget)
+    if method == 'lttb':
+        return lttb_thin(df, budget)
+    raise ValueError(f"Unknown downsampling method: {method}")
+
+
+def density_bins(df, zoom=10, pixels=4):
+    """
+    Pre-aggregate fixes into map cells for a density map.
+
+    Args:
+        df (pd.DataFrame): Fixes with 'location-lat' and 'location-long' columns.
+        zoom (int): Map zoom level the heatmap is drawn at.
+        pixels (int): Cell width in screen pixels.
+
+    Returns:
+        pd.DataFrame: One row per occupied cell with its center ('location-lat', 'location-long') and 'count'.
+    """
+    if len(df) == 0:
+        return pd.DataFrame({'location-lat': [], 'location-long': [], 'count': []})
+    lat_step, lon_step = cell_size(zoom, df['location-lat'].mean(), pixels)
+    lat_key, lon_key = _grid_keys(df, lat_step, lon_step)
+    bins = pd.DataFrame({'lat': lat_key, 'lon': lon_key}).value_counts().reset_index()
+    return pd.DataFrame({
+        'location-lat': (bins['lat'].values + 0.5) * lat_step,
+        'location-long': (bins['lon'].values + 0.5) * lon_step,
+        'count': bins['count'].values,
+    })
@@ -0,0 +1,186 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+class SerialExecutor:
+    """
+    Executor with the concurrent.futures map() interface that runs everything in the calling thread.
+    """
+
+    def map(self, fn, *iterables, chunksize=1):
+        return map(fn, *iterables)
+
+    def shutdown(self, wait=True):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        return False
+
+
+def make_executor(kind='serial', max_workers=None):
+    """
+    Return an executor for per-tag work.
+
+    Args:
+        kind: 'serial', 'thread' or 'process', or an existing executor, which is returned as is.
+        max_workers (int): Number of workers for the thread and process pools. None lets
+            concurrent.futures choose.
+
+    Returns:
+        An object with map() and shutdown(), usable as a context manager. map() yields results
+        in input order, so results do not depend on the number of workers.
+    """
+    if kind is None or kind == 'serial':
+        return SerialExecutor()
+    if kind == 'thread':
+        return ThreadPoolExecutor(max_workers=max_workers)
+    if kind == 'process':
+        from multiprocessing import resource_tracker
+
+        # Start the tracker before any worker exists so the workers share it (see attach)
+        resource_tracker.ensure_running()
+        return ProcessPoolExecutor(max_workers=max_workers)
+    if hasattr(kind, 'map'):
+        return kind
+    raise ValueError(f"Unknown executor kind: {kind!r}")
+
+
+def owns_executor(kind):
+    # An executor made from a name is ours to shut down; one passed in belongs to the caller
+    return kind is None or isinstance(kind, str)
+
+
+class SharedArrays:
+    """
+    A dict of NumPy arrays handed to workers without pickling them.
+
+    For process pools the arrays are copied once into a single shared memory block and
+    workers receive only its name and layout; for serial and thread executors the arrays
+    are passed by reference. Either way workers call attach() on `handle`.
+    """
+
+    def __init__(self, arrays, executor=None):
+        """
+        Args:
+            arrays (dict): NumPy arrays keyed by name.
+            executor: The executor the handle will be used with.
+        """
+        self._shm = None
+        if not isinstance(executor, ProcessPoolExecutor):
+            self.handle = ('local', arrays)
+            return
+
+        from multiprocessing import shared_memory
+
+        layout, offset = [], 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            # Keep every array 8-byte aligned within the block
+            layout.append((name, array.dtype.str, array.shape, offset))
+            offset += -(-array.nbytes // 8) * 8
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (name, dtype, shape, start) in layout:
+            np.ndarray(shape, dtype, buffer=self._shm.buf, offset=start)[...] = arrays[name]
+        self.handle = ('shm', self._shm.name, layout)
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+# Whether each process had to start a resource tracker of its own, decided at its first attach
+_private_tracker = {}
+
+
+class attach:
+    """
+    Open the arrays behind a SharedArrays handle inside a worker, as a context manager
+    yielding the dict of arrays. Shared memory views are read-only and only valid inside
+    the with block; copy anything that has to outlive it.
+    """
+
+    def __init__(self, handle):
+        self.handle = handle
+        self._shm = None
+
+    def __enter__(self):
+        if self.handle[0] == 'local':
+            return self.handle[1]
+        from multiprocessing import resource_tracker, shared_memory
+
+        # Workers normally share their parent's resource tracker. A worker started before the
+        # parent had one would start its own, which would unlink the block when the worker
+        # exits, so in that case the block is unregistered from it again.
+        pid = os.getpid()
+        if pid not in _private_tracker:
+            _private_tracker[pid] = getattr(resource_tracker._resource_tracker, '_fd', None) is None
+        _, name, layout = self.handle
+        self._shm = shared_memory.SharedMemory(name=name)
+        if _private_tracker[pid]:
+            resource_tracker.unregister(self._shm._name, 'shared_memory')
+        arrays = {}
+        for key, dtype, shape, start in layout:
+            array = np.ndarray(shape, dtype, buffer=self._shm.buf, offset=start)
+            array.flags.writeable = False
+            arrays[key] = array
+        self._arrays = arrays
+        return arrays
+
+    def __exit__(self, *exc):
+        if self._shm is not None:
+            self._arrays = None
+            try:
+                self._shm.close()
+            except BufferError:
+                # A view escaped the with block; the mapping is released once it is garbage collected
+                pass
+        return False
+
+
+def frame_arrays(frames, columns):
+    """
+    Flatten per-tag DataFrames into one array per column plus the row offsets of each tag,
+    ready to be shared with workers. Datetime columns are stored as int64 nanoseconds.
+
+    Returns:
+        dict: The column arrays and an 'offsets' array of length len(frames) + 1.
+    """
+    frames = list(frames)
+    arrays = {}
+    for column in columns:
+        parts = [np.asarray(frame[column].values) for frame in frames]
+        values = np.concatenate(parts) if parts else np.empty(0)
+        if np.issubdtype(values.dtype, np.datetime64):
+            values = values.astype('datetime64[ns]').view('int64')
+        arrays[column] = values
+    arrays['offsets'] = np.cumsum([0] + [len(frame) for frame in frames]).astype(np.int64)
+    return arrays
+
+
+def frame_from_arrays(arrays, i, columns, time_columns=('timestamp',)):
+    """
+    Rebuild tag i's DataFrame from frame_arrays() output (e.g. inside a worker).
+    The frame may share memory with the arrays, so treat it as read-only.
+    """
+    start, stop = arrays['offsets'][i], arrays['offsets'][i + 1]
+    data = {}
+    for column in columns:
+        values = arrays[column][start:stop]
+        data[column] = values.view('datetime64[ns]') if column in time_columns else values
+    return pd.DataFrame(data, copy=False)
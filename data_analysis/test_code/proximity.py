@@ -0,0 +1,137 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    from . import geo, resample
+except ImportError:
+    import geo
+    import resample
+
+
+def align_to_grid(frames, step='1h', tolerance=None):
+    """
+    Snap every tag onto one regular time grid, taking each tag's nearest fix at every grid
+    time (resample.AlignedTracks with method='nearest').
+
+    Args:
+        frames (dict): DataFrames keyed by tag with 'timestamp', 'location-lat', 'location-long' columns.
+        step (str): Grid spacing, a fixed duration.
+        tolerance (str): Maximum gap between a grid time and the fix used for it. None
+            accepts any fix, but a tag is never extended past its first or last fix.
+
+    Returns:
+        resample.AlignedTracks: Dense (tags x times) positions; grid points a tag does not cover are NaN.
+    """
+    return resample.AlignedTracks.from_frames(frames, step, max_gap=None, method='nearest', tolerance=tolerance)
+
+
+def _accumulate(lat, lon, month_ids, n_months):
+    """
+    Reduce the pairwise distances of a block of grid times to per-pair sums, counts, minima,
+    maxima and per-month sums and counts. Pairs are the upper triangle of the tag matrix,
+    and distances are only evaluated where both tags have a position.
+    """
+    first, second = np.triu_indices(lat.shape[0], k=1)
+    n_pairs = len(first)
+    present = ~np.isnan(lat)
+    pair, column = np.nonzero(present[first] & present[second])
+    a, b = first[pair], second[pair]
+    distance = geo.geodesic_distance(lat[a, column], lon[a, column], lat[b, column], lon[b, column])
+
+    shortest = np.full(n_pairs, np.inf)
+    longest = np.full(n_pairs, -np.inf)
+    np.minimum.at(shortest, pair, distance)
+    np.maximum.at(longest, pair, distance)
+    month_pair = month_ids[column] * n_pairs + pair
+    return {
+        'sum': np.bincount(pair, distance, minlength=n_pairs),
+        'count': np.bincount(pair, minlength=n_pairs),
+        'min': shortest,
+        'max': longest,
+        'monthly_sum': np.bincount(month_pair, distance, minlength=n_months * n_pairs).reshape(n_months, n_pairs),
+        'monthly_count': np.bincount(month_pair, minlength=n_months * n_pairs).reshape(n_months, n_pairs),
+    }
+
+
+def _merge(total, part):
+    if total is None:
+        return part
+    for name in ['sum', 'count', 'monthly_sum', 'monthly_count']:
+        total[name] += part[name]
+    total['min'] = np.minimum(total['min'], part['min'])
+    total['max'] = np.maximum(total['max'], part['max'])
+    return total
+
+
+def all_pairs_proximity(frames, step='1h', tolerance=None, block=256, max_workers=None):
+    """
+    Distance statistics between every pair of tags, computed on a shared time grid of
+    each tag's nearest fixes (see align_to_grid and aligned_proximity).
+
+    Args:
+        frames (dict): DataFrames keyed by tag with 'timestamp', 'location-lat', 'location-long' columns.
+        step (str): Grid spacing, a fixed duration.
+        tolerance (str): Maximum gap between a grid time and the fix used for it (see align_to_grid).
+        block (int): Number of grid times whose distance matrices are computed together.
+        max_workers (int): Number of worker processes for the blocks. None runs in this process.
+    """
+    return aligned_proximity(align_to_grid(frames, step, tolerance), block, max_workers)
+
+
+def aligned_proximity(aligned, block=256, max_workers=None):
+    """
+    Distance statistics between every pair of tags resampled onto one grid, e.g.
+    dataHandler.aligned(), so the grid is built once for many analyses.
+
+    Args:
+        aligned (resample.AlignedTracks): Tracks on a shared grid.
+        block (int): Number of grid times whose distance matrices are computed together.
+        max_workers (int): Number of worker processes for the blocks. None runs in this process.
+
+    Returns:
+        tuple: (pairs, monthly) DataFrames. pairs has one row per tag pair with 'average_distance',
+            'longest_distance', 'shortest_distance' and the number of shared grid times 'n';
+            monthly has 'average_distance' per pair and month. Pairs that never overlap are omitted.
+    """
+    grid, tags, lat, lon = aligned.times, aligned.tags, aligned.lat, aligned.lon
+    months = grid.to_period('M')
+    month_labels, month_ids = np.unique(months.asi8, return_inverse=True)
+    n_months = len(month_labels)
+    blocks = [slice(i, i + block) for i in range(0, len(grid), block)]
+    args = [(lat[:, b], lon[:, b], month_ids[b], n_months) for b in blocks]
+
+    total = None
+    if max_workers is None:
+        for arg in args:
+            total = _merge(total, _accumulate(*arg))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            for part in pool.map(_accumulate, *zip(*args)):
+                total = _merge(total, part)
+
+    columns = ['fox1', 'fox2', 'average_distance', 'longest_distance', 'shortest_distance', 'n']
+    if total is None:
+        return pd.DataFrame(columns=columns), pd.DataFrame(columns=['fox1', 'fox2', 'month', 'average_distance'])
+    first, second = np.triu_indices(len(tags), k=1)
+    names = np.array(tags, dtype=object)
+    overlap = np.flatnonzero(total['count'] > 0)
+    pairs = pd.DataFrame({
+        'fox1': names[first[overlap]],
+        'fox2': names[second[overlap]],
+        'average_distance': total['sum'][overlap] / total['count'][overlap],
+        'longest_distance': total['max'][overlap],
+        'shortest_distance': total['min'][overlap],
+        'n': total['count'][overlap],
+    })
+
+    # Monthly rows ordered by pair, then month
+    pair_idx, month_idx = np.nonzero(total['monthly_count'].T)
+    monthly = pd.DataFrame({
+        'fox1': names[first[pair_idx]],
+        'fox2': names[second[pair_idx]],
+        'month': pd.PeriodIndex.from_ordinals(month_labels[month_idx], freq='M'),
+        'average_distance': total['monthly_sum'][month_idx, pair_idx] / total['monthly_count'][month_idx, pair_idx],
+    })
+    return pairs, monthly
@@ -0,0 +1,213 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from .track_store import TrackStore
+except ImportError:
+    from track_store import TrackStore
+
+# Grid spacing, and the longest gap between two fixes that is interpolated across
+STEP = '1h'
+MAX_GAP = '12h'
+
+NS_PER_DAY = 86400 * 10 ** 9
+
+METHODS = ('linear', 'nearest')
+
+
+def _timedelta_ns(value):
+    return None if value is None else pd.Timedelta(value).value
+
+
+def make_grid(first, last, step=STEP):
+    """
+    Regular grid of int64 epoch nanoseconds from `first`, rounded down to a multiple of
+    `step`, up to and including `last`.
+
+    Args:
+        first, last: Bounds as timestamps or int64 nanoseconds.
+        step (str): Grid spacing, a fixed duration such as '30min' or '1h'.
+    """
+    step_ns = _timedelta_ns(step)
+    if step_ns <= 0:
+        raise ValueError(f"Grid step must be positive, got {step!r}")
+    first = pd.Timestamp(first).value
+    last = pd.Timestamp(last).value
+    first -= first % step_ns
+    # Count in integers: np.arange sizes its output in floating point, which can drop the last nanosecond time
+    return first + step_ns * np.arange(max(0, (last - first) // step_ns + 1), dtype=np.int64)
+
+
+def resample_track(times, lat, lon, grid, method='linear', max_gap=MAX_GAP, tolerance=None):
+    """
+    Positions of one track at the grid times.
+
+    Args:
+        times (np.ndarray): int64 nanoseconds of the fixes, in increasing order.
+        lat, lon (np.ndarray): Coordinates of the fixes.
+        grid (np.ndarray): int64 nanoseconds to resample at, in increasing order.
+        method (str): 'linear' interpolates between the fixes on either side of each grid
+            time; 'nearest' takes the closer of the two.
+        max_gap (str): Grid times between two fixes further apart than this are masked.
+            None bridges any gap.
+        tolerance (str): Grid times further than this from the fix used are masked. None
+            accepts any fix.
+
+    Returns:
+        tuple: (lat, lon) float64 arrays of len(grid). Masked grid times, and those before
+            the first or after the last fix, are NaN; the track is never extrapolated.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+    out_lat = np.full(len(grid), np.nan)
+    out_lon = np.full(len(grid), np.nan)
+    if not len(times):
+        return out_lat, out_lon
+    # Only the grid times within the track's span are resampled
+    inside = slice(np.searchsorted(grid, times[0], 'left'), np.searchsorted(grid, times[-1], 'right'))
+    at = grid[inside]
+    right = np.clip(np.searchsorted(times, at), 0, len(times) - 1)
+    left = np.clip(right - 1, 0, len(times) - 1)
+    exact = times[right] == at
+    valid = np.ones(len(at), dtype=bool)
+    if max_gap is not None:
+        valid &= exact | (times[right] - times[left] <= _timedelta_ns(max_gap))
+
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    if method == 'nearest':
+        nearest = np.where(np.abs(times[left] - at) <= np.abs(times[right] - at), left, right)
+        if tolerance is not None:
+            valid &= np.abs(times[nearest] - at) <= _timedelta_ns(tolerance)
+        out_lat[inside] = np.where(valid, lat[nearest], np.nan)
+        out_lon[inside] = np.where(valid, lon[nearest], np.nan)
+        return out_lat, out_lon
+
+    gap = (times[right] - times[left]).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = np.where(gap > 0, (at - times[left]) / gap, 1.0)
+    if tolerance is not None:
+        valid &= np.minimum(at - times[left], times[right] - at) <= _timedelta_ns(tolerance)
+    # Longitude steps are taken the short way round, so tracks crossing the antimeridian stay continuous
+    step_lon = (lon[right] - lon[left] + 180) % 360 - 180
+    out_lat[inside] = np.where(valid, lat[left] + weight * (lat[right] - lat[left]), np.nan)
+    out_lon[inside] = np.where(valid, (lon[left] + weight * step_lon + 180) % 360 - 180, np.nan)
+    return out_lat, out_lon
+
+
+class AlignedTracks:
+    """
+    Every tag's track resampled onto one shared regular time grid, as dense (tags x grid)
+    latitude and longitude arrays. Row i holds tags[i]; grid times a tag does not cover
+    (outside its span, or in a gap the resampler masked) are NaN in both arrays and False
+    in `valid`.
+
+    Build it once (dataHandler.aligned caches one per set of parameters) and hand it to
+    the correlation and proximity analyses, which then work on rows of the arrays instead
+    of merging tracks pair by pair.
+    """
+
+    def __init__(self, grid, tags, lat, lon, step=STEP, max_gap=MAX_GAP, method='linear', tolerance=None):
+        self.grid = np.asarray(grid, dtype=np.int64)
+        self.tags = list(tags)
+        self.lat = lat
+        self.lon = lon
+        self.valid = ~np.isnan(lat)
+        self.step = pd.Timedelta(step)
+        self.max_gap = None if max_gap is None else pd.Timedelta(max_gap)
+        self.method = method
+        self.tolerance = None if tolerance is None else pd.Timedelta(tolerance)
+        self._rows = {tag: i for i, tag in enumerate(self.tags)}
+
+    @classmethod
+    def from_store(cls, store, step=STEP, max_gap=MAX_GAP, method='linear', tolerance=None, start=None, end=None):
+        """
+        Resample every track of a TrackStore (see resample_track for the parameters).
+
+        Args:
+            store (TrackStore): Tracks to resample, e.g. dataHandler.tracks.
+            start, end: Bounds of the grid. Default to the first and last fix of any tag.
+        """
+        tracks = [store.track(tag) for tag in store.tags]
+        spans = [(track.times[0], track.times[-1]) for track in tracks if len(track.times)]
+        if start is None and end is None and not spans:
+            grid = np.empty(0, dtype=np.int64)
+        else:
+            first = min(span[0] for span in spans) if start is None else start
+            last = max(span[1] for span in spans) if end is None else end
+            grid = make_grid(first, last, step)
+
+        lat = np.full((len(tracks), len(grid)), np.nan)
+        lon = np.full((len(tracks), len(grid)), np.nan)
+        for i, track in enumerate(tracks):
+            lat[i], lon[i] = resample_track(track.times, track.lat, track.lon, grid, method, max_gap, tolerance)
+        return cls(grid, store.tags, lat, lon, step, max_gap, method, tolerance)
+
+    @classmethod
+    def from_frames(cls, frames, step=STEP, max_gap=MAX_GAP, method='linear', tolerance=None, start=None, end=None):
+        """
+        Resample per-tag DataFrames with 'timestamp', 'location-lat' and 'location-long'
+        columns, such as dataHandler.unique. Tags are the dict's keys.
+        """
+        frames = {tag: frame.assign(timestamp=pd.to_datetime(frame['timestamp'])) for tag, frame in frames.items()}
+        return cls.from_store(TrackStore.from_frames(frames), step, max_gap, method, tolerance, start, end)
+
+    def __len__(self):
+        return len(self.tags)
+
+    def __contains__(self, tag):
+        return tag in self._rows
+
+    @property
+    def times(self):
+        return pd.DatetimeIndex(self.grid.view('datetime64[ns]'), freq=self.step)
+
+    @property
+    def nbytes(self):
+        return self.grid.nbytes + self.lat.nbytes + self.lon.nbytes + self.valid.nbytes
+
+    def row(self, tag):
+        return self._rows[tag]
+
+    def overlap(self, tag1, tag2, end_of_day=False):
+        """
+        Grid positions at which both tags have a position, in time order.
+
+        Args:
+            end_of_day (bool): Keep only the last such position of each UTC day, so the
+                two tags are compared once a day, at the same moment.
+        """
+        positions = np.flatnonzero(self.valid[self.row(tag1)] & self.valid[self.row(tag2)])
+        if end_of_day and len(positions):
+            day = self.grid[positions] // NS_PER_DAY
+            positions = positions[np.append(day[1:] != day[:-1], True)]
+        return positions
+
+    def pair(self, tag1, tag2, end_of_day=False, suffixes=('_fox1', '_fox2')):
+        """
+        Return the two tags' positions at their shared grid times (see overlap) as a
+        DataFrame with 'timestamp' and suffixed 'location-long' / 'location-lat' columns,
+        the layout of correlation.align.
+        """
+        positions = self.overlap(tag1, tag2, end_of_day)
+        i, j = self.row(tag1), self.row(tag2)
+        return pd.DataFrame({
+            'timestamp': self.grid[positions].view('datetime64[ns]'),
+            'location-long' + suffixes[0]: self.lon[i, positions],
+            'location-lat' + suffixes[0]: self.lat[i, positions],
+            'location-long' + suffixes[1]: self.lon[j, positions],
+            'location-lat' + suffixes[1]: self.lat[j, positions],
+        })
+
+    def to_frame(self, tag):
+        """
+        Return one tag's resampled track as a DataFrame with 'timestamp', 'location-lat' and
+        'location-long' columns, without the masked grid times.
+        """
+        i = self.row(tag)
+        keep = self.valid[i]
+        return pd.DataFrame({
+            'timestamp': self.grid[keep].view('datetime64[ns]'),
+            'location-lat': self.lat[i, keep],
+            'location-long': self.lon[i, keep],
+        })
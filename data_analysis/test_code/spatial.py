@@ -0,0 +1,249 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from . import geo
+except ImportError:
+    import geo
+
+# Average number of fixes per occupied grid cell the default cell size aims for
+FIXES_PER_CELL = 16
+
+
+def unit_vectors(lat, lon):
+    """
+    Points on the unit sphere for coordinates in degrees, as an (n, 3) array. Straight-line
+    (chord) distance between them is monotonic in great-circle distance.
+    """
+    lat, lon = np.radians(np.asarray(lat, dtype=np.float64)), np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def _chord(meters):
+    return 2 * np.sin(np.minimum(np.asarray(meters, dtype=np.float64) / geo.EARTH_RADIUS, np.pi) / 2)
+
+
+def _arc(chord):
+    return 2 * geo.EARTH_RADIUS * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+def points_in_polygon(lat, lon, polygon):
+    """
+    Even-odd test of which points lie inside a polygon.
+
+    Args:
+        lat, lon (np.ndarray): Point coordinates in degrees.
+        polygon: Sequence of (lat, long) vertices; the ring is closed automatically.
+
+    Returns:
+        np.ndarray: Boolean mask.
+    """
+    vertices = np.asarray(polygon, dtype=np.float64)
+    y0, x0 = vertices[:, 0], vertices[:, 1]
+    y1, x1 = np.roll(y0, -1), np.roll(x0, -1)
+    inside = np.zeros(len(lat), dtype=bool)
+    # One pass per edge, vectorized over the points: flip when a ray to the east crosses the edge
+    for ay, ax, by, bx in zip(y0, x0, y1, x1):
+        if ay == by:
+            continue
+        crosses = (ay > lat) != (by > lat)
+        x_cross = ax + (lat - ay) * (bx - ax) / (by - ay)
+        inside ^= crosses & (lon < x_cross)
+    return inside
+
+
+def _ranges(starts, stops):
+    # Concatenate arange(start, stop) for every pair without a Python loop
+    lengths = stops - starts
+    keep = lengths > 0
+    starts, lengths = starts[keep], lengths[keep]
+    if not len(lengths):
+        return np.empty(0, dtype=np.int64)
+    steps = np.ones(lengths.sum(), dtype=np.int64)
+    ends = np.cumsum(lengths)
+    steps[0] = starts[0]
+    steps[ends[:-1]] = starts[1:] - (starts[:-1] + lengths[:-1] - 1)
+    return np.cumsum(steps)
+
+
+class SpatialIndex:
+    """
+    Grid index over the fixes of a track_store.TrackStore.
+
+    The fixes are bucketed into square lat/long cells and sorted by cell, row by row, so the
+    cells of one grid row inside a bounding box are a single run found by binary search.
+    A box or polygon query touches only the candidate fixes of the cells it overlaps:
+    O(rows * log n + k) instead of a scan. Nearest-fix and radius queries use a KD-tree
+    over unit-sphere vectors, built on first use.
+
+    Positions returned by the queries index the store's arrays, i.e. the rows of
+    store.to_frame() (dataHandler.all_data), in increasing order.
+    """
+
+    def __init__(self, store, cell=None):
+        """
+        Args:
+            store (TrackStore): Fixes to index; kept by reference.
+            cell (float): Grid cell size in degrees. Defaults to a size giving about
+                FIXES_PER_CELL fixes per cell over the data's extent.
+        """
+        self.store = store
+        lat = np.asarray(store.lat, dtype=np.float64)
+        lon = np.asarray(store.lon, dtype=np.float64)
+        valid = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+        if len(valid):
+            self.south, self.north = lat[valid].min(), lat[valid].max()
+            self.west, self.east = lon[valid].min(), lon[valid].max()
+        else:
+            self.south = self.north = self.west = self.east = 0.0
+        if cell is None:
+            area = max((self.north - self.south) * (self.east - self.west), 1e-12)
+            cell = max(np.sqrt(area * FIXES_PER_CELL / max(len(valid), 1)), 1e-6)
+        self.cell = float(cell)
+        self.n_cols = int((self.east - self.west) // self.cell) + 1
+        self.n_rows = int((self.north - self.south) // self.cell) + 1
+
+        keys = self._keys(lat[valid], lon[valid])
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.order = valid[order]
+        self._tree = None
+
+    def _keys(self, lat, lon):
+        rows = ((lat - self.south) // self.cell).astype(np.int64)
+        cols = ((lon - self.west) // self.cell).astype(np.int64)
+        return rows * self.n_cols + cols
+
+    def __len__(self):
+        return len(self.order)
+
+    def _box_runs(self, south, west, north, east):
+        # (starts, stops) into self.order of the grid cells overlapping the box
+        r0 = max(int((south - self.south) // self.cell), 0)
+        r1 = min(int((north - self.south) // self.cell), self.n_rows - 1)
+        c0 = max(int((west - self.west) // self.cell), 0)
+        c1 = min(int((east - self.west) // self.cell), self.n_cols - 1)
+        if r0 > r1 or c0 > c1:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        rows = np.arange(r0, r1 + 1, dtype=np.int64) * self.n_cols
+        return np.searchsorted(self.keys, rows + c0, 'left'), np.searchsorted(self.keys, rows + c1, 'right')
+
+    def _time_positions(self, start, end, tags):
+        # Positions of the fixes in the time range, found by binary search per track
+        store = self.store
+        lo = np.iinfo(np.int64).min if start is None else pd.Timestamp(start).value
+        hi = np.iinfo(np.int64).max if end is None else pd.Timestamp(end).value
+        starts, stops = [], []
+        for tag in store.tags if tags is None else tags:
+            s = store.slice(tag)
+            segment = store.times[s]
+            starts.append(s.start + np.searchsorted(segment, lo, 'left'))
+            stops.append(s.start + np.searchsorted(segment, hi, 'right'))
+        return _ranges(np.array(starts, dtype=np.int64), np.array(stops, dtype=np.int64))
+
+    def _box(self, south, west, north, east, start=None, end=None, tags=None):
+        starts, stops = self._box_runs(south, west, north, east)
+        filtered = start is not None or end is not None or tags is not None
+        if filtered:
+            in_time = self._time_positions(start, end, tags)
+            # Scan whichever side is smaller: the time range, or the cells under the box
+            if len(in_time) < (stops - starts).sum():
+                candidates = in_time
+            else:
+                candidates = np.sort(self.order[_ranges(starts, stops)])
+                candidates = candidates[self._in_time(candidates, start, end, tags)]
+        else:
+            candidates = np.sort(self.order[_ranges(starts, stops)])
+        lat, lon = self.store.lat[candidates], self.store.lon[candidates]
+        inside = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+        return candidates[inside]
+
+    def _in_time(self, positions, start, end, tags):
+        store = self.store
+        mask = np.ones(len(positions), dtype=bool)
+        if start is not None:
+            mask &= store.times[positions] >= pd.Timestamp(start).value
+        if end is not None:
+            mask &= store.times[positions] <= pd.Timestamp(end).value
+        if tags is not None:
+            track = np.searchsorted(store.offsets, positions, 'right') - 1
+            wanted = np.zeros(len(store.tags), dtype=bool)
+            wanted[[store.tags.index(tag) for tag in tags]] = True
+            mask &= wanted[track]
+        return mask
+
+    def bbox(self, south, west, north, east, start=None, end=None, tags=None):
+        """
+        Positions of the fixes inside a bounding box, optionally limited to a time range
+        (inclusive, None for open) and to some tags. A box with west > east crosses the
+        antimeridian.
+        """
+        if west > east:
+            parts = [self._box(south, west, north, 180.0, start, end, tags),
+                     self._box(south, -180.0, north, east, start, end, tags)]
+            return np.unique(np.concatenate(parts))
+        return self._box(south, west, north, east, start, end, tags)
+
+    def polygon(self, vertices, start=None, end=None, tags=None):
+        """
+        Positions of the fixes inside a polygon of (lat, long) vertices, optionally limited
+        to a time range and to some tags. Only the fixes in the polygon's bounding box are tested.
+        """
+        vertices = np.asarray(vertices, dtype=np.float64)
+        south, west = vertices.min(axis=0)
+        north, east = vertices.max(axis=0)
+        candidates = self._box(south, west, north, east, start, end, tags)
+        inside = points_in_polygon(self.store.lat[candidates], self.store.lon[candidates], vertices)
+        return candidates[inside]
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            from scipy.spatial import cKDTree
+
+            self._tree = cKDTree(unit_vectors(self.store.lat[self.order], self.store.lon[self.order]))
+        return self._tree
+
+    def nearest(self, lat, lon, k=1, start=None, end=None, tags=None):
+        """
+        The k fixes closest to a point (great-circle distance), optionally limited to a
+        time range and to some tags.
+
+        Returns:
+            tuple: (distances in meters, positions), both sorted by distance.
+        """
+        if not len(self):
+            return np.empty(0), np.empty(0, dtype=np.int64)
+        point = unit_vectors([lat], [lon])[0]
+        if start is None and end is None and tags is None:
+            chord, found = self.tree.query(point, k=min(k, len(self)))
+            chord, found = np.atleast_1d(chord), np.atleast_1d(found)
+            return _arc(chord), self.order[found]
+
+        in_time = self._time_positions(start, end, tags)
+        if len(in_time) <= max(4 * k, len(self) // 16):
+            # A small time range is cheaper to measure directly
+            distance = geo.haversine(lat, lon, self.store.lat[in_time], self.store.lon[in_time])
+            valid = np.flatnonzero(np.isfinite(distance))
+            best = valid[np.argsort(distance[valid], kind='stable')[:k]]
+            return distance[best], in_time[best]
+        # Otherwise widen the tree search until k neighbours pass the filter
+        want = k
+        while True:
+            chord, found = self.tree.query(point, k=min(want * 4, len(self)))
+            chord, found = np.atleast_1d(chord), np.atleast_1d(found)
+            positions = self.order[found]
+            keep = self._in_time(positions, start, end, tags)
+            if keep.sum() >= k or len(found) == len(self):
+                return _arc(chord[keep][:k]), positions[keep][:k]
+            want *= 4
+
+    def within(self, lat, lon, radius):
+        """
+        Positions of the fixes within `radius` meters (great-circle) of a point, in increasing order.
+        """
+        if not len(self):
+            return np.empty(0, dtype=np.int64)
+        found = self.tree.query_ball_point(unit_vectors([lat], [lon])[0], _chord(radius))
+        return np.sort(self.order[np.asarray(found, dtype=np.int64)])
@@ -0,0 +1,226 @@
+import glob
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    from . import ingest, thinning
+except ImportError:
+    import ingest
+    import thinning
+
+
+class IncrementalThinner:
+    """
+    Apply the time/distance thinning of dataHandler.processData to fixes as they arrive.
+
+    Whether a fix is kept depends only on the last kept fix of its tag, so that fix (plus
+    the newest timestamp seen, to recognise replayed or late rows) is all the state held
+    per tag. Feeding a track in batches keeps the same fixes as thinning it in one go.
+    """
+
+    def __init__(self, interval, min_distance):
+        """
+        Args:
+            interval (pd.Timedelta): Minimum gap between kept fixes.
+            min_distance (float): Minimum distance in meters between kept fixes.
+        """
+        self.interval = pd.Timedelta(interval).value
+        self.min_distance = min_distance
+        # tag -> (time ns, lat, lon) of the last kept fix
+        self.last = {}
+        # tag -> newest timestamp seen (ns), kept or not
+        self.seen = {}
+
+    def seed(self, frames):
+        """
+        Initialise the state from already thinned tracks, e.g. dataHandler.unique.
+        """
+        for tag, df in frames.items():
+            if len(df):
+                row = df.iloc[-1]
+                time = pd.Timestamp(row['timestamp']).value
+                self.last[tag] = (time, float(row['location-lat']), float(row['location-long']))
+                self.seen[tag] = max(self.seen.get(tag, time), time)
+
+    def push(self, tag, times, lat, lon):
+        """
+        Thin a batch of new fixes of one tag.
+
+        Args:
+            tag: Tag the fixes belong to.
+            times (np.ndarray): Timestamps as int64 nanoseconds, sorted ascending.
+            lat (np.ndarray): Latitudes in degrees.
+            lon (np.ndarray): Longitudes in degrees.
+
+        Returns:
+            np.ndarray: Positions of the fixes to keep. Fixes earlier than the newest one
+                already seen for the tag are dropped, since keeping them would change decisions
+                that have already been made.
+        """
+        times = np.asarray(times, dtype=np.int64)
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        # Replaying a fix at the newest seen time is harmless: it is judged against the
+        # same last kept fix as before, so only strictly older fixes need dropping
+        fresh = np.flatnonzero(times >= self.seen.get(tag, np.iinfo(np.int64).min))
+        if not len(fresh):
+            return fresh
+        self.seen[tag] = int(times[fresh[-1]])
+
+        if tag in self.last:
+            # Thin with the last kept fix in front; thin_track always keeps position 0
+            t0, lat0, lon0 = self.last[tag]
+            keep = thinning.thin_track(
+                np.concatenate([[t0], times[fresh]]),
+                np.concatenate([[lat0], lat[fresh]]),
+                np.concatenate([[lon0], lon[fresh]]),
+                self.interval,
+                self.min_distance,
+            )[1:] - 1
+        else:
+            keep = thinning.thin_track(times[fresh], lat[fresh], lon[fresh], self.interval, self.min_distance)
+        keep = fresh[keep]
+        if len(keep):
+            last = keep[-1]
+            self.last[tag] = (int(times[last]), float(lat[last]), float(lon[last]))
+        return keep
+
+
+def tail_bytes(path, offset, size=256):
+    """
+    Return the (up to) `size` bytes of a file just before `offset`. Recorded when a file is
+    read, they tell a file that was appended to from one that was rewritten.
+    """
+    with open(path, 'rb') as f:
+        f.seek(max(0, offset - size))
+        return f.read(offset - max(0, offset - size))
+
+
+class CsvTail:
+    """
+    Follow a CSV file that is being appended to, returning the rows written since the last read.
+    Only complete lines are consumed, so a row that is still being written is picked up next time.
+    """
+
+    def __init__(self, path, offset=None, columns=None, check=None):
+        """
+        Args:
+            path (str): Path to the CSV.
+            offset (int): Byte offset to start reading from. Defaults to the current end of the
+                file, i.e. only rows appended from now on are returned.
+            columns (list): Columns to keep. None keeps every column.
+            check (bytes): The bytes before `offset` as they were when the file was read up to
+                it (see tail_bytes). Defaults to the file's current bytes, which is only right
+                if the file has not changed since it was read.
+        """
+        self.path = path
+        self.columns = columns
+        with open(path, 'rb') as f:
+            self.header = f.readline()
+        self.offset = os.path.getsize(path) if offset is None else max(offset, len(self.header))
+        self.tail = tail_bytes(path, self.offset) if check is None else check
+
+    def rewritten(self):
+        """
+        True if the file no longer starts with what was already read (it is shorter, or the
+        bytes before the read offset changed), i.e. it was rewritten rather than appended to.
+        """
+        return os.path.getsize(self.path) < self.offset or tail_bytes(self.path, self.offset) != self.tail
+
+    def read(self):
+        """
+        Returns:
+            pd.DataFrame: The complete rows appended since the last call (possibly empty), typed like ingest.load_table.
+        """
+        if self.rewritten():
+            # A rewritten file is read again from the top; replayed rows are dropped by the thinner
+            self.offset = len(self.header)
+            self.tail = self.header
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        self.offset += end
+        self.tail = (self.tail + data[:end])[-256:]
+        return _parse(self.header + data[:end], self.columns)
+
+
+class ChunkDirectory:
+    """
+    Follow a directory that receives new CSV chunk files (each with its own header row),
+    returning the rows written to them since the last read.
+
+    Every file is read from a byte offset, like CsvTail, and only complete lines are
+    consumed: a file the writer has only partly written is picked up where it was left
+    when more of it has been written.
+    """
+
+    def __init__(self, path, pattern='*.csv', columns=None, skip_existing=False):
+        """
+        Args:
+            path (str): Directory to watch.
+            pattern (str): Glob pattern of the chunk files.
+            columns (list): Columns to keep. None keeps every column.
+            skip_existing (bool): Ignore the rows already in the files that are there; only
+                rows added to them later are returned.
+        """
+        self.path = path
+        self.pattern = pattern
+        self.columns = columns
+        # Per file: its header line and the offset up to which it has been consumed
+        self.headers = {}
+        self.offsets = {}
+        if skip_existing:
+            for file in self._files():
+                self.offsets[file] = os.path.getsize(file)
+
+    def _files(self):
+        return sorted(glob.glob(os.path.join(self.path, self.pattern)))
+
+    def _read_file(self, path):
+        # Complete lines written to one file since the last read, with its header; None if there are none
+        size = os.path.getsize(path)
+        offset = self.offsets.get(path, 0)
+        if path not in self.headers:
+            with open(path, 'rb') as f:
+                header = f.readline()
+            if not header.endswith(b'\n'):
+                # The header row itself is still being written
+                return None
+            self.headers[path] = header
+            offset = max(offset, len(header))
+        if size <= offset:
+            self.offsets[path] = offset
+            return None
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(size - offset)
+        end = data.rfind(b'\n') + 1
+        self.offsets[path] = offset + end
+        return self.headers[path] + data[:end] if end else None
+
+    def read(self):
+        """
+        Returns:
+            pd.DataFrame: The complete rows written since the last call, in file name order (possibly empty).
+        """
+        parts = []
+        for path in self._files():
+            data = self._read_file(path)
+            if data is not None:
+                parts.append(_parse(data, self.columns))
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return _parse(b'', self.columns)
+        return pd.concat(parts, ignore_index=True)
+
+
+def _parse(data, columns):
+    if not data.strip():
+        return pd.DataFrame(columns=columns if columns is not None else [])
+    usecols = None if columns is None else lambda column: column in columns
+    df = pd.read_csv(io.BytesIO(data), usecols=usecols)
+    return ingest._typed_chunk(df, 'float64')
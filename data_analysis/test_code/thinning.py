@@ -0,0 +1,95 @@
+import numpy as np
+
+try:
+    from . import geo
+except ImportError:
+    import geo
+
+# Distances closer than this (in meters) to the threshold are re-checked with geopy,
+# so the kernel's accept/reject decision is identical to a per-row geodesic loop
+EXACT_BAND = 1e-3
+
+
+def _exceeds(lat0, lon0, lat, lon, min_distance):
+    """
+    Return a boolean mask of which points lie strictly further than min_distance meters
+    from their anchor points (lat0, lon0). Anchors broadcast against the points.
+    """
+    lat0, lon0, lat, lon = np.broadcast_arrays(lat0, lon0, lat, lon)
+    distance = geo.geodesic_distance(lat0, lon0, lat, lon)
+    far = distance > min_distance
+    unsure = np.nonzero(np.abs(distance - min_distance) <= EXACT_BAND)
+    if len(unsure[0]):
+        exact = geo.exact_distance(lat0[unsure], lon0[unsure], lat[unsure], lon[unsure])
+        far[unsure] = exact > min_distance
+    return far
+
+
+def thin_track(times, lat, lon, interval, min_distance, lookahead=4, block=64):
+    """
+    Select the fixes of a single track that are at least `interval` after and more than
+    `min_distance` meters away from the previously selected fix. The first fix is always kept.
+
+    The gate is tested for every fix at once against its first `lookahead` time-eligible
+    successors, so walking the chain of selected fixes is mostly a table lookup. Anchors
+    whose successors are all too close fall back to a block-wise vectorized scan.
+
+    Args:
+        times (np.ndarray): Timestamps as int64 (e.g. nanoseconds), sorted ascending.
+        lat (np.ndarray): Latitudes in degrees.
+        lon (np.ndarray): Longitudes in degrees.
+        interval (int): Minimum time gap in the same unit as `times`.
+        min_distance (float): Minimum distance in meters.
+        lookahead (int): Number of successors precomputed for every fix.
+        block (int): Initial number of candidates tested per step of the fallback scan.
+
+    Returns:
+        np.ndarray: Positions of the selected fixes.
+    """
+    times = np.ascontiguousarray(times, dtype=np.int64)
+    lat = np.ascontiguousarray(lat, dtype=np.float64)
+    lon = np.ascontiguousarray(lon, dtype=np.float64)
+    n = len(times)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    # First time-eligible successor of every fix; every later fix is time-eligible too
+    first = np.maximum(np.searchsorted(times, times + interval, side='left'), np.arange(1, n + 1))
+
+    # Test each fix against its next `lookahead` eligible successors in one pass
+    candidates = first[:, None] + np.arange(lookahead)
+    valid = candidates < n
+    candidates = np.minimum(candidates, n - 1)
+    far = _exceeds(lat[:, None], lon[:, None], lat[candidates], lon[candidates], min_distance) & valid
+    has_hit = far.any(axis=1)
+    jump = np.where(has_hit, candidates[np.arange(n), far.argmax(axis=1)], -1).tolist()
+    first = first.tolist()
+
+    keep = [0]
+    last = 0
+    while True:
+        found = jump[last]
+        if found < 0:
+            found = _scan(lat, lon, last, first[last] + lookahead, min_distance, block)
+            if found < 0:
+                break
+        keep.append(found)
+        last = found
+    return np.asarray(keep, dtype=np.int64)
+
+
+def _scan(lat, lon, anchor, start, min_distance, block):
+    """
+    Find the first position at or after `start` that is far enough from `anchor`, testing
+    growing blocks of candidates at a time. Returns -1 if there is none.
+    """
+    n = len(lat)
+    step = block
+    while start < n:
+        stop = min(start + step, n)
+        hits = np.flatnonzero(_exceeds(lat[anchor], lon[anchor], lat[start:stop], lon[start:stop], min_distance))
+        if len(hits):
+            return start + int(hits[0])
+        start = stop
+        step *= 2
+    return -1
@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+
+
+def _to_ns(value, default):
+    if value is None:
+        return default
+    return pd.Timestamp(value).value
+
+
+def _categorical_dtypes(data, frames):
+    # Extend the categorical columns of data with any new categories found in frames
+    dtypes = {}
+    for column, dtype in data.dtypes.items():
+        if not isinstance(dtype, pd.CategoricalDtype):
+            continue
+        categories = dtype.categories
+        for frame in frames:
+            if column in frame:
+                new = pd.Index(frame[column].dropna().unique())
+                categories = categories.append(new.difference(categories))
+        dtypes[column] = pd.CategoricalDtype(categories, ordered=dtype.ordered)
+    return dtypes
+
+
+def _with_dtypes(part, dtypes):
+    changed = {column: dtype for column, dtype in dtypes.items() if column in part and part[column].dtype != dtype}
+    return part.astype(changed) if changed else part
+
+
+class TimeIndex:
+    """
+    Time-range index over a dict of per-tag DataFrames.
+
+    The frames are stored back to back in one DataFrame (tag by tag, each sorted by
+    timestamp) alongside its int64 timestamps and the row offset where each tag starts.
+    A range query is then a binary search per tag plus slicing, i.e. O(tags * log n + k).
+    """
+
+    def __init__(self, frames):
+        """
+        Args:
+            frames (dict): DataFrames keyed by tag, each with a 'timestamp' column.
+        """
+        self.tags = list(frames)
+        parts = [frame.sort_values('timestamp', kind='stable') for frame in frames.values()]
+        self.data = pd.concat(parts) if parts else pd.DataFrame(columns=['timestamp'])
+        self.times = self.data['timestamp'].values.astype('datetime64[ns]').view('int64')
+        self.offsets = np.cumsum([0] + [len(part) for part in parts])
+        self._positions = {tag: i for i, tag in enumerate(self.tags)}
+
+    @classmethod
+    def from_store(cls, store):
+        """
+        Build the index over a track_store.TrackStore, whose tracks are already stored
+        back to back in time order. Nothing is sorted or copied: `data` is store.to_frame().
+        """
+        index = cls.__new__(cls)
+        index.tags = list(store.tags)
+        index.data = store.to_frame()
+        index.times = store.times
+        index.offsets = store.offsets
+        index._positions = {tag: i for i, tag in enumerate(index.tags)}
+        return index
+
+    def append(self, frames):
+        """
+        Return a new index with rows added to the end of some tags' tracks. Existing rows
+        are copied as whole slices, never re-sorted, so the cost is a single concatenation.
+
+        Args:
+            frames (dict): New rows keyed by tag, each no earlier than that tag's last
+                indexed timestamp. Unknown tags are added after the existing ones.
+
+        Returns:
+            TimeIndex: The extended index. This index is left unchanged, so readers holding it are unaffected.
+        """
+        tags = self.tags + [tag for tag in frames if tag not in self._positions]
+        dtypes = _categorical_dtypes(self.data, frames.values())
+        parts, lengths = [], []
+        for tag in tags:
+            i = self._positions.get(tag)
+            old = self.data.iloc[self.offsets[i]:self.offsets[i + 1]] if i is not None else self.data.iloc[0:0]
+            new = frames.get(tag)
+            if new is not None and len(new):
+                new = new.sort_values('timestamp', kind='stable')
+                parts.extend([old, new] if len(old) else [new])
+                lengths.append(len(old) + len(new))
+            else:
+                parts.append(old)
+                lengths.append(len(old))
+
+        index = TimeIndex.__new__(TimeIndex)
+        index.tags = tags
+        # Categorical columns only survive the concatenation if every part shares one dtype
+        parts = [_with_dtypes(part, dtypes) for part in parts]
+        index.data = pd.concat(parts) if parts else self.data
+        index.times = index.data['timestamp'].values.astype('datetime64[ns]').view('int64')
+        index.offsets = np.cumsum([0] + lengths)
+        index._positions = {tag: i for i, tag in enumerate(tags)}
+        return index
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def min_time(self):
+        return pd.Timestamp(self.times.min()) if len(self) else None
+
+    @property
+    def max_time(self):
+        return pd.Timestamp(self.times.max()) if len(self) else None
+
+    def slices(self, start=None, end=None, tags=None):
+        """
+        Locate the rows of each tag with start <= timestamp <= end.
+
+        Args:
+            start, end: Inclusive bounds (anything pd.Timestamp accepts). None leaves that side open.
+            tags (list): Tags to include. None includes every tag.
+
+        Returns:
+            dict: A row slice into `self.data` for each selected tag.
+        """
+        lo = _to_ns(start, np.iinfo(np.int64).min)
+        hi = _to_ns(end, np.iinfo(np.int64).max)
+        result = {}
+        for tag in self.tags if tags is None else tags:
+            i = self._positions[tag]
+            first, last = self.offsets[i], self.offsets[i + 1]
+            segment = self.times[first:last]
+            result[tag] = slice(
+                first + int(np.searchsorted(segment, lo, side='left')),
+                first + int(np.searchsorted(segment, hi, side='right')),
+            )
+        return result
+
+    def views(self, start=None, end=None, tags=None):
+        """
+        Same as slices(), but returns the matching rows of each tag as DataFrame views
+        (no data is copied).
+        """
+        return {tag: self.data.iloc[s] for tag, s in self.slices(start, end, tags).items()}
+
+    def query(self, start=None, end=None, tags=None):
+        """
+        Return the rows with start <= timestamp <= end as a single DataFrame, optionally
+        limited to some tags.
+
+        The result is a view of `data` when the matching rows are one contiguous block: a
+        single tag, or neighbouring tags whose rows meet (e.g. every tag with an open
+        time range). Otherwise the per-tag blocks are concatenated into a copy; use
+        views() to get them without copying.
+        """
+        blocks = []
+        for s in self.slices(start, end, tags).values():
+            if s.stop == s.start:
+                continue
+            if blocks and blocks[-1].stop == s.start:
+                blocks[-1] = slice(blocks[-1].start, s.stop)
+            else:
+                blocks.append(s)
+        if len(blocks) == 1:
+            return self.data.iloc[blocks[0]]
+        if not blocks:
+            return self.data.iloc[0:0]
+        return pd.concat([self.data.iloc[s] for s in blocks])
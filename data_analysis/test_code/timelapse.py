@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+# Rows of a timelapse layout; each frame's earlier fixes are thinned to stay within it
+MAX_POINTS = 100_000
+
+
+def frame_ends(times, max_frames=None, bucket=None):
+    """
+    Pick the animation frames for a sorted track.
+
+    Args:
+        times (pd.Series): Sorted timestamps.
+        max_frames (int): Upper bound on the number of frames. Frames are spread evenly
+            over the track and the last fix always gets its own frame.
+        bucket (str): Optional pandas frequency (e.g. '6h', '1D'). One frame is emitted per
+            bucket, ending at the last fix inside it.
+
+    Returns:
+        np.ndarray: For each frame, the number of leading fixes it shows.
+    """
+    keys = times.dt.floor(bucket) if bucket else times
+    keys = keys.values.astype('datetime64[ns]').view('int64')
+    if len(keys) == 0:
+        return np.empty(0, dtype=np.int64)
+    # A frame ends at the last fix of each run of equal keys
+    ends = np.flatnonzero(np.append(keys[1:] != keys[:-1], True)) + 1
+    if max_frames is not None and len(ends) > max_frames:
+        picks = np.unique(np.linspace(0, len(ends) - 1, max_frames).round().astype(np.int64))
+        ends = ends[picks]
+    return ends
+
+
+def earlier_step(previous, fixes, max_points):
+    """
+    Stride at which earlier fixes are kept as background dots, so the frames fit a budget.
+
+    Args:
+        previous (np.ndarray): For each frame, the number of fixes shown in earlier frames.
+        fixes (int): Number of fixes in the track; each is shown once as 'latest'.
+        max_points (int): Upper bound on the rows of the whole layout; None keeps every fix.
+
+    Returns:
+        int: Every k-th fix of the track stays on the map once it has been reached. With
+            too many fixes for the budget, each frame keeps at most one earlier dot.
+    """
+    earlier = int(previous.sum())
+    if max_points is None or fixes + earlier <= max_points:
+        return 1
+    # ceil(p / k) earlier dots per frame adds at most one dot per frame over p / k
+    spare = max(max_points - fixes - len(previous), 1)
+    return max(-(-earlier // spare), 1)
+
+
+def build_cumulative_frames(df, max_frames=200, bucket=None, max_points=MAX_POINTS):
+    """
+    Lay out a track for a persistent-dots animation: frame k shows the fixes that are new
+    in it, marked as 'latest', over every k-th earlier fix (see earlier_step), marked as
+    'earlier'. The background dots are the same fixes in every frame, so they do not flicker.
+
+    The layout is built with index arithmetic, so the cost is linear in the number of rows
+    emitted, which stays within max(max_points, fixes + frames).
+
+    Args:
+        df (pd.DataFrame): Track with a 'timestamp' column.
+        max_frames (int): Upper bound on the number of frames; None keeps one frame per timestamp.
+        bucket (str): Optional pandas frequency used to group fixes into frames.
+        max_points (int): Upper bound on the number of rows emitted; None repeats every
+            earlier fix in every frame.
+
+    Returns:
+        pd.DataFrame: The repeated rows with 'animation_frame' (frame end time), 'dot_type'
+            (1-based position of the fix in the track) and 'color' ('latest' or 'earlier') columns.
+    """
+    df = df.sort_values('timestamp', kind='stable')
+    counts = frame_ends(df['timestamp'], max_frames, bucket)
+    previous = np.concatenate(([0], counts[:-1]))
+    step = earlier_step(previous, len(df), max_points)
+
+    earlier = -(-previous // step)
+    sizes = earlier + counts - previous
+    frame = np.repeat(np.arange(len(counts)), sizes)
+    offset = np.arange(len(frame)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    is_earlier = offset < earlier[frame]
+    position = np.where(is_earlier, offset * step, previous[frame] + offset - earlier[frame])
+
+    frames = df.iloc[position].reset_index(drop=True)
+    frames['animation_frame'] = df['timestamp'].values[counts - 1][frame]
+    frames['dot_type'] = position + 1
+    frames['color'] = np.where(is_earlier, 'earlier', 'latest')
+    return frames
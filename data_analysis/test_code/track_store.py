@@ -0,0 +1,216 @@
+import collections
+
+import numpy as np
+import pandas as pd
+
+# Column names of the per-tag DataFrames the pages and analyses use (see dataHandler.processData)
+FRAME_COLUMNS = ['location-long', 'location-lat', 'name', 'timestamp']
+
+# Zero-copy view of one tag's fixes
+Track = collections.namedtuple('Track', ['times', 'lat', 'lon', 'rows'])
+
+
+def _code_dtype(n):
+    # Smallest signed integer type holding n category codes (and pandas' -1 for missing)
+    for dtype in (np.int8, np.int16, np.int32):
+        if n <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+class TrackStore:
+    """
+    Fixes of every tag as one structure of arrays: int64 epoch nanoseconds, latitude and
+    longitude, a small integer tag code and the source row label of each fix. Tracks are
+    stored back to back, each in time order, and `offsets[i]:offsets[i + 1]` are the
+    positions of the i-th tag in `tags`.
+
+    Per-tag access (track, slice) returns views, and to_frame/frames wrap the arrays in
+    DataFrames of the usual 'location-long', 'location-lat', 'name', 'timestamp' layout
+    without copying them.
+    """
+
+    def __init__(self, tags, offsets, times, lat, lon, rows=None, dtype=None):
+        """
+        Args:
+            tags (list): Tag of each track, in storage order.
+            offsets (array): Start position of each track, plus the total length.
+            times (np.ndarray): int64 nanoseconds since the epoch.
+            lat, lon (np.ndarray): Coordinates (float64 or float32).
+            rows (np.ndarray): Row label of each fix in the source table. Defaults to positions.
+            dtype (pd.CategoricalDtype): Dtype of the 'name' column of to_frame(). Defaults to the tags.
+        """
+        self.tags = list(tags)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.times = times
+        self.lat = lat
+        self.lon = lon
+        self.rows = np.arange(len(times), dtype=np.int64) if rows is None else rows
+        self.dtype = pd.CategoricalDtype(self.tags) if dtype is None else dtype
+        track_codes = self.dtype.categories.get_indexer(self.tags).astype(_code_dtype(len(self.dtype.categories)))
+        self.codes = np.repeat(track_codes, np.diff(self.offsets))
+        self._positions = {tag: i for i, tag in enumerate(self.tags)}
+
+    @classmethod
+    def from_table(cls, df, tag='tag-local-identifier', time='timestamp', lat='location-lat', lon='location-long', coord_dtype=None):
+        """
+        Build a store from a table of fixes in any order, such as dataHandler.raw_df.
+        Tags are ordered by their first fix and fixes with the same timestamp keep their
+        order in the table, the same rule chunked.spill_by_tag follows. Fixes without a tag
+        are left out.
+
+        Args:
+            df (pd.DataFrame): Fixes with tag, time and coordinate columns.
+            coord_dtype: dtype for the coordinates, e.g. 'float32' to halve their size.
+                Defaults to the table's.
+        """
+        times = df[time].values.astype('datetime64[ns]').view('int64')
+        if isinstance(df[tag].dtype, pd.CategoricalDtype):
+            codes, dtype = df[tag].cat.codes.values, df[tag].dtype
+        else:
+            codes, categories = pd.factorize(df[tag])
+            dtype = pd.CategoricalDtype(categories)
+
+        order = np.argsort(times, kind='stable')
+        order = order[codes[order] >= 0]
+        first = pd.unique(codes[order])
+        rank = np.empty(len(dtype.categories), dtype=np.int64)
+        rank[first] = np.arange(len(first))
+        order = order[np.argsort(rank[codes[order]], kind='stable')]
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(rank[codes[order]], minlength=len(first)))])
+
+        coords = [df[column].values[order] for column in (lat, lon)]
+        if coord_dtype is not None:
+            coords = [values.astype(coord_dtype, copy=False) for values in coords]
+        rows = np.asarray(df.index)[order]
+        return cls(dtype.categories[first], offsets, times[order], coords[0], coords[1], rows, dtype)
+
+    @classmethod
+    def from_frames(cls, frames, tag='name', time='timestamp', lat='location-lat', lon='location-long'):
+        """
+        Build a store from per-tag DataFrames, such as dataHandler.unique or the output of
+        chunked.thin_csv. The arrays are copied once into the store.
+        """
+        tags = list(frames)
+        parts = []
+        for frame in frames.values():
+            parts.append(frame if frame[time].is_monotonic_increasing else frame.sort_values(time, kind='stable'))
+        dtypes = {part[tag].dtype for part in parts if tag in part}
+        dtype = dtypes.pop() if len(dtypes) == 1 else None
+        if not isinstance(dtype, pd.CategoricalDtype) or not set(tags) <= set(dtype.categories):
+            dtype = None
+
+        def column(name, empty):
+            return np.concatenate([np.asarray(part[name].values) for part in parts]) if parts else np.empty(0, empty)
+
+        times = column(time, 'datetime64[ns]').astype('datetime64[ns]').view('int64')
+        rows = np.concatenate([np.asarray(part.index) for part in parts]) if parts else np.empty(0, np.int64)
+        offsets = np.concatenate([[0], np.cumsum([len(part) for part in parts])])
+        return cls(tags, offsets, times, column(lat, np.float64), column(lon, np.float64), rows, dtype)
+
+    @classmethod
+    def from_index(cls, index):
+        """
+        Wrap a TimeIndex, whose data is already stored tag by tag in time order. The
+        arrays are shared with the index's DataFrame wherever pandas allows it.
+        """
+        data = index.data
+        dtype = data['name'].dtype if 'name' in data and isinstance(data['name'].dtype, pd.CategoricalDtype) else None
+        return cls(index.tags, index.offsets, index.times, data['location-lat'].values,
+                   data['location-long'].values, np.asarray(data.index), dtype)
+
+    def __len__(self):
+        return len(self.times)
+
+    def __contains__(self, tag):
+        return tag in self._positions
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.times, self.lat, self.lon, self.rows, self.codes, self.offsets))
+
+    def slice(self, tag):
+        i = self._positions[tag]
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def track(self, tag):
+        """
+        Return one tag's fixes as a Track of array views (no data is copied).
+        """
+        s = self.slice(tag)
+        return Track(self.times[s], self.lat[s], self.lon[s], self.rows[s])
+
+    def arrays(self):
+        """
+        Return the arrays in the layout of parallel.frame_arrays (per-column arrays plus
+        'offsets'), ready for parallel.SharedArrays.
+        """
+        return {'timestamp': self.times, 'location-lat': self.lat, 'location-long': self.lon, 'offsets': self.offsets}
+
+    def take(self, keeps):
+        """
+        Return a store with a subset of every track.
+
+        Args:
+            keeps (list): For each track, in storage order, the positions within the track
+                to keep, in increasing order (e.g. the output of thinning.thin_track).
+        """
+        keeps = [np.asarray(keep, dtype=np.int64) for keep in keeps]
+        positions = np.concatenate([start + keep for start, keep in zip(self.offsets, keeps)]) if keeps else np.empty(0, np.int64)
+        offsets = np.concatenate([[0], np.cumsum([len(keep) for keep in keeps])])
+        return TrackStore(self.tags, offsets, self.times[positions], self.lat[positions],
+                          self.lon[positions], self.rows[positions], self.dtype)
+
+    def summary(self):
+        """
+        Return one row per tag, in storage order: 'name', 'fixes', 'first' and 'last'
+        timestamp, and the bounding box ('south', 'west', 'north', 'east'; NaN for a track
+        without coordinates). Computed with segment reductions over the arrays, so no
+        per-tag frame is built.
+        """
+        counts = np.diff(self.offsets)
+        starts = self.offsets[:-1]
+        full = counts > 0
+        # Empty tracks have no segment of their own; the next start closes each non-empty one
+        def reduce(ufunc, values):
+            out = np.full(len(counts), np.nan)
+            if full.any():
+                out[full] = ufunc.reduceat(np.asarray(values, dtype=np.float64), starts[full])
+            return out
+
+        first = np.full(len(counts), np.iinfo(np.int64).min, dtype=np.int64)
+        last = first.copy()
+        first[full] = self.times[starts[full]]
+        last[full] = self.times[self.offsets[1:][full] - 1]
+        return pd.DataFrame({
+            'name': pd.Categorical(self.tags, dtype=self.dtype),
+            'fixes': counts,
+            'first': first.view('datetime64[ns]'),
+            'last': last.view('datetime64[ns]'),
+            'south': reduce(np.fmin, self.lat),
+            'west': reduce(np.fmin, self.lon),
+            'north': reduce(np.fmax, self.lat),
+            'east': reduce(np.fmax, self.lon),
+        })
+
+    def to_frame(self):
+        """
+        Return every fix as a DataFrame with 'location-long', 'location-lat', 'name' and
+        'timestamp' columns, indexed by source row. The columns share memory with the store,
+        so treat the frame as read-only.
+        """
+        return pd.DataFrame({
+            'location-long': self.lon,
+            'location-lat': self.lat,
+            'name': pd.Categorical.from_codes(self.codes, dtype=self.dtype),
+            'timestamp': self.times.view('datetime64[ns]'),
+        }, index=pd.Index(self.rows), columns=FRAME_COLUMNS, copy=False)
+
+    def frames(self, data=None):
+        """
+        Return the fixes as a dict of per-tag DataFrame views of to_frame() (or of `data`,
+        a frame it returned earlier).
+        """
+        if data is None:
+            data = self.to_frame()
+        return {tag: data.iloc[self.offsets[i]:self.offsets[i + 1]] for i, tag in enumerate(self.tags)}
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from . import geo
+except ImportError:
+    import geo
+
+DIRECTIONS = np.array(['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW'], dtype=object)
+
+
+def step_arrays(times, lat, lon):
+    """
+    Compute the metrics of every step between consecutive fixes of one track in a single pass.
+
+    Args:
+        times (np.ndarray): Timestamps as datetime64 or int64 nanoseconds.
+        lat (np.ndarray): Latitudes in degrees.
+        lon (np.ndarray): Longitudes in degrees.
+
+    Returns:
+        dict: Arrays of length len(times) named 'distance' (meters), 'bearing' (degrees),
+            'dt' (seconds) and 'speed' (m/s). Entry i describes the step from fix i-1 to fix i,
+            so entry 0 is NaN.
+    """
+    times = np.asarray(times).astype('datetime64[ns]').view('int64')
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    n = len(times)
+    distance = np.full(n, np.nan)
+    bearing = np.full(n, np.nan)
+    dt = np.full(n, np.nan)
+    if n > 1:
+        distance[1:] = geo.geodesic_distance(lat[:-1], lon[:-1], lat[1:], lon[1:])
+        bearing[1:] = geo.bearing(lat[:-1], lon[:-1], lat[1:], lon[1:])
+        dt[1:] = np.diff(times) / 1e9
+    with np.errstate(divide='ignore', invalid='ignore'):
+        speed = np.where(dt > 0, distance / dt, np.nan)
+    return {'distance': distance, 'bearing': bearing, 'dt': dt, 'speed': speed}
+
+
+def step_metrics(df):
+    """
+    Step distance, bearing, time gap and speed for consecutive rows of a track, in row order.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing 'timestamp', 'location-lat', 'location-long' columns.
+
+    Returns:
+        pd.DataFrame: 'distance', 'bearing', 'dt' and 'speed' columns indexed like df. The first row is NaN.
+    """
+    return pd.DataFrame(
+        step_arrays(pd.to_datetime(df['timestamp']).values, df['location-lat'].values, df['location-long'].values),
+        index=df.index,
+    )
+
+
+def bearing_to_direction(bearing):
+    """
+    Map bearings in degrees to the 8 cardinal directions. NaN bearings map to None.
+    """
+    bearing = np.asarray(bearing, dtype=np.float64)
+    valid = ~np.isnan(bearing)
+    index = (np.floor((np.where(valid, bearing, 0) + 22.5) / 45).astype(np.int64)) % 8
+    return np.where(valid, DIRECTIONS[index], None)
+
+
+# Columns of the per-step feature table, on top of the fix columns
+STEP_COLUMNS = ['distance', 'bearing', 'turning_angle', 'dt', 'speed', 'minute_of_day', 'month']
+
+
+def build_step_table(df, offsets=None):
+    """
+    Materialize the per-step features of one or more tracks.
+
+    Args:
+        df (pd.DataFrame): Fixes with 'timestamp', 'location-lat', 'location-long' (and optionally 'name')
+            columns, sorted by timestamp within each track, with tracks stored back to back.
+        offsets (array-like): Row offsets where each track starts, plus the total length
+            (as kept by TimeIndex). None treats df as a single track.
+
+    Returns:
+        pd.DataFrame: The fix columns plus 'distance' (m), 'bearing' (deg), 'turning_angle'
+            (deg, -180 to 180), 'dt' (s), 'speed' (m/s), 'minute_of_day' and 'month', indexed like df.
+            Step features are NaN on each track's first fix (turning angle on its first two).
+    """
+    if offsets is None:
+        offsets = [0, len(df)]
+    timestamps = pd.to_datetime(df['timestamp'])
+    steps = step_arrays(timestamps.values, df['location-lat'].values, df['location-long'].values)
+
+    # Steps never cross from one track into the next
+    starts = np.asarray(offsets[:-1], dtype=np.int64)
+    starts = starts[starts < len(df)]
+    for values in steps.values():
+        values[starts] = np.nan
+    turning = np.full(len(df), np.nan)
+    turning[1:] = (steps['bearing'][1:] - steps['bearing'][:-1] + 180) % 360 - 180
+
+    columns = [c for c in ['name', 'timestamp', 'location-lat', 'location-long'] if c in df]
+    table = df[columns].copy()
+    table['timestamp'] = timestamps
+    table['distance'] = steps['distance']
+    table['bearing'] = steps['bearing']
+    table['turning_angle'] = turning
+    table['dt'] = steps['dt']
+    table['speed'] = steps['speed']
+    table['minute_of_day'] = (timestamps.dt.hour * 60 + timestamps.dt.minute).astype(np.int64)
+    table['month'] = timestamps.dt.to_period('M')
+    return table
+
+
+def steps_for(df):
+    """
+    Return the step features for a track. A slice of a materialized step table (such as
+    dataHandler.steps) is used as is; anything else is sorted by timestamp and computed here.
+    The caller's DataFrame is never modified.
+    """
+    if all(column in df for column in STEP_COLUMNS):
+        return df
+    return build_step_table(df.sort_values(by='timestamp'))
@@ -0,0 +1,54 @@
+import os
+
+import streamlit as st
+import pandas as pd
+
+from data_analysis.test_code import catalog, instrument
+
+# Diagnostics page: timings recorded by data_analysis/test_code/instrument.py.
+# Streamlit lists it in the sidebar, so it stays empty unless opted into with TRACKING_DIAGNOSTICS=1
+# or by opening it with ?diagnostics=1. Recording is off until enabled here or with TRACKING_INSTRUMENT=1.
+
+st.set_page_config(page_title="Diagnostics", layout="wide")
+if os.environ.get("TRACKING_DIAGNOSTICS", "") in ("", "0") and st.query_params.get("diagnostics") != "1":
+    st.info("This page is for maintainers. Set TRACKING_DIAGNOSTICS=1 or open it with ?diagnostics=1.")
+    st.stop()
+
+st.title("Diagnostics")
+
+recording = st.sidebar.toggle("Record timings", value=instrument.is_enabled())
+if recording != instrument.is_enabled():
+    if recording:
+        instrument.enable()
+    else:
+        instrument.disable()
+if st.sidebar.button("Clear recorded spans"):
+    instrument.clear()
+
+st.header("Datasets")
+studies = catalog.CATALOG.summary()
+st.caption(f"{studies['loaded'].sum()} of {len(studies)} studies loaded, "
+           f"{catalog.CATALOG.memory_usage() / 2 ** 20:.0f} of {catalog.CATALOG.max_bytes / 2 ** 20:.0f} MB")
+st.dataframe(studies, use_container_width=True)
+
+if not instrument.is_enabled() and not instrument.records():
+    st.info("Timing is off. Switch on **Record timings**, then use the other pages; their spans show up here.")
+    st.stop()
+
+st.header("Summary")
+summary = instrument.summary()
+st.dataframe(summary, use_container_width=True)
+
+st.header("Recent spans")
+records = pd.DataFrame(instrument.records())
+if not records.empty:
+    records = records.iloc[::-1].head(500)
+    records["name"] = ["  " * depth + name for depth, name in zip(records["depth"], records["name"])]
+    st.dataframe(records.drop(columns=["depth", "thread"]), use_container_width=True)
+
+st.header("Export")
+col1, col2 = st.columns(2)
+with col1:
+    st.download_button("Spans (JSON)", instrument.to_json(), file_name="spans.json", mime="application/json")
+with col2:
+    st.download_button("Chrome trace", instrument.to_chrome_trace(), file_name="trace.json", mime="application/json")
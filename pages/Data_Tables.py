@@ -1,24 +1,52 @@
+import math
+
 import streamlit as st
 import pandas as pd
-from data_analysis.test_code.data_handler import dataHandler
+from data_analysis.test_code import catalog, instrument
 
-myDH = dataHandler()
+# Only one page of each open table is sent to the browser
+PAGE_SIZES = [100, 500, 1000, 5000]
 
 st.set_page_config(page_title="Data Tables", page_icon="📄")
+myDH = catalog.select_study()
 st.title("Data Tables")
-st.header("Tables by Category")
+page_size = st.sidebar.selectbox("Rows per page:", PAGE_SIZES, index=1)
+
+# One summary row per tag up front; the fixes themselves load only for the selected tags
+st.header("Tags")
+summary = myDH.summary
+with instrument.span("Data_Tables.summary", rows=len(summary)):
+    selection = st.dataframe(
+        summary.assign(duration=summary["last"] - summary["first"]),
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        # A new study starts with nothing selected
+        key=f"tags_{st.session_state.get('study')}",
+    )
+selected = [summary["name"].iloc[i] for i in selection["selection"]["rows"] if i < len(summary)]
 
-unique_tables = myDH.unique
+st.header("Tables by Category")
+if not selected:
+    st.info("Select tags in the table above to show their fixes.")
 
 col1, col2 = st.columns(2)
 
 # Alternate placing tables in the two columns
-for i, (table_name, table_data) in enumerate(unique_tables.items()):
-    if i % 2 == 0:  # Add to the first column
-        with col1:
-            st.subheader(table_name)
-            st.dataframe(table_data)
-    else:  # Add to the second column
-        with col2:
+with instrument.span("Data_Tables.render", tags=len(selected)) as span:
+    shown = 0
+    for i, table_name in enumerate(selected):
+        with col1 if i % 2 == 0 else col2:
             st.subheader(table_name)
+            total = len(myDH.unique[table_name])
+            pages = max(math.ceil(total / page_size), 1)
+            number = 1
+            if pages > 1:
+                number = st.number_input("Page", min_value=1, max_value=pages, value=1, key=f"page_{table_name}")
+            table_data = myDH.page(table_name, number - 1, page_size)
+            start = (number - 1) * page_size
+            st.caption(f"Rows {start + 1}–{start + len(table_data)} of {total}")
             st.dataframe(table_data)
+            shown += len(table_data)
+    span.rows = shown
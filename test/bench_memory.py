@@ -0,0 +1,88 @@
+"""
+Measure the peak memory of loading and thinning a large Movebank CSV, fully in memory
+versus the chunked pipeline (dataHandler(memory_budget=...)), and check that both keep
+the same fixes. Each run happens in a fresh subprocess so its peak RSS is measured alone.
+
+Run from the top level directory:
+
+    python test/bench_memory.py --rows 2000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def peak_rss():
+    # VmHWM starts afresh at exec; ru_maxrss can carry over the parent's peak from fork
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run(csv_path, budget):
+    # Runs in the child process
+    import pandas as pd
+    from data_analysis.test_code.data_handler import dataHandler
+
+    start = time.perf_counter()
+    handler = dataHandler(csv_path, memory_budget=budget)
+    elapsed = time.perf_counter() - start
+    kept = [[str(tag), len(df)] for tag, df in handler.unique.items()]
+    checksum = float(pd.concat(handler.unique.values())['location-lat'].sum())
+    peak = peak_rss()
+    print(json.dumps({'seconds': elapsed, 'peak': peak, 'kept': kept, 'checksum': checksum}))
+
+
+def measure(csv_path, budget):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    code = f"import bench_memory; bench_memory.run({csv_path!r}, {budget!r})"
+    out = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                         env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def baseline_rss():
+    code = "import pandas, numpy, bench_memory; print(bench_memory.peak_rss())"
+    return int(subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout)
+
+
+if __name__ == "__main__":
+    from synthetic import write_synthetic_csv
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--tags', type=int, default=50)
+    parser.add_argument('--budgets', default='64,256', help='Comma-separated budgets in MB for the chunked runs')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_synthetic_csv(os.path.join(tmp, 'synthetic.csv'), args.rows, args.tags)
+        size = os.path.getsize(csv_path)
+        base = baseline_rss()
+        print(f"{args.rows} rows, {args.tags} tags, CSV {size / 2 ** 20:.0f} MB; "
+              f"interpreter with pandas {base / 2 ** 20:.0f} MB")
+
+        reference = measure(csv_path, None)
+        print(f"in memory:     peak {reference['peak'] / 2 ** 20:6.0f} MB, {reference['seconds']:.1f}s")
+        for mb in [int(b) for b in args.budgets.split(',')]:
+            result = measure(csv_path, mb * 2 ** 20)
+            # Tags in the same order, each keeping the same number of fixes
+            assert result['kept'] == reference['kept'], "chunked run kept different fixes or tag order"
+            assert abs(result['checksum'] - reference['checksum']) <= 1e-9 * abs(reference['checksum'])
+            print(f"budget {mb:4d} MB: peak {result['peak'] / 2 ** 20:6.0f} MB, {result['seconds']:.1f}s "
+                  f"(over baseline: {(result['peak'] - base) / 2 ** 20:.0f} MB)")
@@ -0,0 +1,73 @@
+"""
+Scaling of the per-tag work in dataHandler.processData and utils.analyze_tags with the
+serial, thread and process executors, from 1 to N workers (N = number of CPUs by default).
+Every run is checked against the serial result.
+
+Run from the top level directory:
+
+    python test/bench_parallel.py --rows 1000000 --tags 64
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from data_analysis.test_code import parallel, utils
+from data_analysis.test_code.data_handler import dataHandler
+from synthetic import write_synthetic_csv
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def same_frames(expected, actual):
+    assert list(expected) == list(actual), "tag order differs"
+    for tag in expected:
+        pd.testing.assert_frame_equal(expected[tag], actual[tag], check_index_type=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--tags', type=int, default=64)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    workers = sorted({1, 2, args.max_workers} | set(range(4, args.max_workers + 1, 4)))
+    workers = [w for w in workers if w <= args.max_workers]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_synthetic_csv(os.path.join(tmp, 'synthetic.csv'), args.rows, args.tags)
+        with contextlib.redirect_stdout(io.StringIO()):
+            handler = dataHandler(csv_path)
+        print(f"{args.rows} rows, {args.tags} tags, {os.cpu_count()} CPUs")
+
+        analysis = utils.calculate_total_distance_per_day_per_month
+        with contextlib.redirect_stdout(io.StringIO()):
+            (_, reference), serial_thin = timed(handler.processData, executor='serial')
+        unique = handler.unique
+        reference_analysis, serial_analysis = timed(utils.analyze_tags, analysis, unique, executor=parallel.SerialExecutor())
+        print(f"{'executor':>8} {'workers':>7} {'thinning':>10} {'speedup':>7} {'analysis':>10} {'speedup':>7}")
+        print(f"{'serial':>8} {1:>7} {serial_thin:>9.2f}s {1:>6.1f}x {serial_analysis:>9.2f}s {1:>6.1f}x")
+
+        for kind in ['thread', 'process']:
+            for n in workers:
+                # Pools are created up front so start-up cost is not counted against the work
+                with parallel.make_executor(kind, n) as pool:
+                    list(pool.map(abs, range(n)))
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        (_, thinned), thin_time = timed(handler.processData, executor=pool)
+                    analysed, analysis_time = timed(utils.analyze_tags, analysis, unique, executor=pool)
+                same_frames(reference, thinned)
+                same_frames(reference_analysis, analysed)
+                print(f"{kind:>8} {n:>7} {thin_time:>9.2f}s {serial_thin / thin_time:>6.1f}x "
+                      f"{analysis_time:>9.2f}s {serial_analysis / analysis_time:>6.1f}x")
@@ -0,0 +1,426 @@
+"""
+Benchmark suite for the data pipeline and the app pages, on synthetic Movebank data
+(see synthetic.py) at several sizes. Times dataHandler construction (cold and warm cache,
+and chunked), processData, every utils.py and cor_utils.py function, spatial queries,
+heatmap binning, GeoJSON export and the rendering of each Streamlit page, including its
+Plotly figures.
+
+Results can be saved as JSON and compared with an earlier run to catch regressions.
+Run from the top level directory:
+
+    python test/bench_suite.py --sizes 1e3,1e4,1e5 --json bench.json
+    python test/bench_suite.py --sizes 1e3,1e4,1e5 --compare bench.json
+
+Benchmarks that would take too long at a size (e.g. the per-row GeoJSON export) are
+skipped above their limit; use --only to run a subset, e.g. --only utils/,pages/.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from data_analysis.test_code import catalog, cor_utils, data_handler, ingest, utils
+from synthetic import synthetic_tracks, write_synthetic_csv
+
+BENCHMARKS = []
+
+# Above this many fixes the dataset is only loaded through the chunked pipeline, and
+# benchmarks that need the whole raw table in memory are skipped
+IN_MEMORY_ROWS = 10 ** 7
+
+
+def benchmark(name, max_rows=None, repeat=None):
+    """
+    Register a benchmark. The function receives the Context of the current size.
+
+    Args:
+        name (str): 'group/name' label.
+        max_rows (int): Skip the benchmark for datasets larger than this.
+        repeat (int): Fixed number of repetitions (e.g. 1 for runs that change state).
+    """
+    def register(func):
+        BENCHMARKS.append((name, func, max_rows, repeat))
+        return func
+    return register
+
+
+class Context:
+    """
+    One synthetic dataset and the objects the benchmarks work on, built once per size.
+    """
+
+    def __init__(self, csv_path, rows):
+        self.csv_path = csv_path
+        self.rows = rows
+        budget = None if rows <= IN_MEMORY_ROWS else 256 * 2 ** 20
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.handler = data_handler.dataHandler(csv_path, memory_budget=budget)
+        self.frames = self.handler.unique
+        # The two longest tracks stand in for "a fox" and "a pair of foxes"
+        longest = sorted(self.frames, key=lambda tag: len(self.frames[tag]), reverse=True)
+        self.track = self.frames[longest[0]]
+        self.other = self.frames[longest[1 if len(longest) > 1 else 0]]
+        self._single_track = None
+
+    def track_copy(self):
+        return self.track.copy(), self.other.copy()
+
+    def single_track(self):
+        # One unthinned tag with as many fixes as the dataset, generated on first use
+        if self._single_track is None:
+            self._single_track = synthetic_tracks(self.rows, tags=1)
+        return self._single_track
+
+
+# Loading and thinning
+
+@benchmark("load/dataHandler_cold", repeat=1, max_rows=IN_MEMORY_ROWS)
+def load_cold(ctx):
+    parquet_path, _ = ingest.cache_paths(ctx.csv_path)
+    shutil.rmtree(os.path.dirname(parquet_path), ignore_errors=True)
+    data_handler.dataHandler(ctx.csv_path)
+
+
+@benchmark("load/dataHandler_warm", max_rows=IN_MEMORY_ROWS)
+def load_warm(ctx):
+    data_handler.dataHandler(ctx.csv_path)
+
+
+@benchmark("load/dataHandler_chunked")
+def load_chunked(ctx):
+    data_handler.dataHandler(ctx.csv_path, memory_budget=64 * 2 ** 20)
+
+
+@benchmark("thin/processData", max_rows=IN_MEMORY_ROWS)
+def process_data(ctx):
+    ctx.handler.processData()
+
+
+# utils.py, on the longest track
+
+@benchmark("utils/total_distance")
+def total_distance(ctx):
+    utils.total_distance(ctx.track)
+
+
+@benchmark("utils/average_speed_per_day")
+def average_speed_per_day(ctx):
+    utils.average_speed_per_day(ctx.track)
+
+
+@benchmark("utils/calculate_average_distance_auto_sections")
+def auto_sections(ctx):
+    utils.calculate_average_distance_auto_sections(ctx.track)
+
+
+@benchmark("utils/calculate_total_distance_per_day_per_month")
+def per_day_per_month(ctx):
+    utils.calculate_total_distance_per_day_per_month(ctx.track)
+
+
+@benchmark("utils/calculate_moving_directions")
+def moving_directions(ctx):
+    utils.calculate_moving_directions(ctx.track)
+
+
+@benchmark("utils/calculate_monthly_distance_and_direction")
+def monthly_distance_and_direction(ctx):
+    utils.calculate_monthly_distance_and_direction(ctx.track)
+
+
+@benchmark("utils/calculate_frequent_areas")
+def frequent_areas(ctx):
+    utils.calculate_frequent_areas(ctx.track, 5)
+
+
+@benchmark("utils/calculate_frequent_areas_minibatch")
+def frequent_areas_minibatch(ctx):
+    utils.calculate_frequent_areas(ctx.track, 5, method='minibatch')
+
+
+@benchmark("utils/calculate_frequent_areas_dbscan")
+def frequent_areas_dbscan(ctx):
+    utils.calculate_frequent_areas(ctx.track, method='dbscan')
+
+
+# cor_utils.py, on the two longest tracks (copies: some functions convert columns in place)
+
+@benchmark("cor_utils/calculate_distance_stats_between_foxes")
+def distance_stats(ctx):
+    cor_utils.calculate_distance_stats_between_foxes(*ctx.track_copy())
+
+
+@benchmark("cor_utils/calculate_monthly_average_distance_between_foxes")
+def monthly_average_distance(ctx):
+    cor_utils.calculate_monthly_average_distance_between_foxes(*ctx.track_copy())
+
+
+@benchmark("cor_utils/calculate_distance_stats_all_pairs", max_rows=10 ** 7)
+def distance_stats_all_pairs(ctx):
+    cor_utils.calculate_distance_stats_all_pairs(ctx.frames)
+
+
+@benchmark("cor_utils/analyze_fox_correlation_aligned")
+def correlation_aligned(ctx):
+    cor_utils.analyze_fox_correlation_aligned(*ctx.track_copy())
+    plt.close("all")
+
+
+@benchmark("cor_utils/analyze_fox_correlation_by_month")
+def correlation_by_month(ctx):
+    cor_utils.analyze_fox_correlation_by_month(*ctx.track_copy())
+    plt.close("all")
+
+
+@benchmark("cor_utils/analyze_fox_correlation_end_of_day")
+def correlation_end_of_day(ctx):
+    cor_utils.analyze_fox_correlation_end_of_day(*ctx.track_copy())
+    plt.close("all")
+
+
+@benchmark("cor_utils/analyze_fox_correlation_end_of_day_by_month")
+def correlation_end_of_day_by_month(ctx):
+    cor_utils.analyze_fox_correlation_end_of_day_by_month(*ctx.track_copy())
+    plt.close("all")
+
+
+@benchmark("cor_utils/calculate_cross_correlation")
+def cross_correlation(ctx):
+    cor_utils.calculate_cross_correlation(*ctx.track_copy())
+
+
+# Every tag on one shared time grid: building it, then the all-pairs analyses reusing the cached grid
+
+@benchmark("aligned/build", max_rows=10 ** 7)
+def aligned_build(ctx):
+    ctx.handler._aligned = {}
+    ctx.handler.aligned()
+
+
+@benchmark("aligned/correlations", max_rows=10 ** 7)
+def aligned_correlations(ctx):
+    ctx.handler.correlations()
+
+
+@benchmark("aligned/proximity", max_rows=10 ** 7)
+def aligned_proximity(ctx):
+    ctx.handler.proximity()
+
+
+# Activity profiles of every tag from the step table: three bin widths, and rolling 7-day windows in solar time
+
+@benchmark("activity/profile_all_tags")
+def activity_all_tags(ctx):
+    ctx.handler.activity_profile([60, 90, 180])
+
+
+@benchmark("activity/profile_rolling_7d")
+def activity_rolling(ctx):
+    ctx.handler.activity_profile(90, window=7, solar=True)
+
+
+# Spatial index, on the thinned tracks: the central tenth of the data's extent in each direction
+
+def _central_box(ctx):
+    index = ctx.handler.spatial
+    lat, lon = (index.south + index.north) / 2, (index.west + index.east) / 2
+    half_lat, half_lon = (index.north - index.south) / 20, (index.east - index.west) / 20
+    return lat - half_lat, lon - half_lon, lat + half_lat, lon + half_lon
+
+
+@benchmark("spatial/build", repeat=1)
+def spatial_build(ctx):
+    ctx.handler._spatial = None
+    ctx.handler.spatial
+
+
+@benchmark("spatial/bbox")
+def spatial_bbox(ctx):
+    ctx.handler.query(bbox=_central_box(ctx))
+
+
+@benchmark("spatial/nearest")
+def spatial_nearest(ctx):
+    south, west, north, east = _central_box(ctx)
+    ctx.handler.nearest((south + north) / 2, (west + east) / 2, k=10)
+
+
+# Heatmap bins for the full time range: binning every fix vs summing the heat pyramid
+
+@benchmark("heat/density_bins")
+def heat_density_bins(ctx):
+    from data_analysis.test_code import lod
+
+    lod.density_bins(ctx.handler.query(), zoom=10)
+
+
+@benchmark("heat/pyramid_build", repeat=1)
+def heat_pyramid_build(ctx):
+    from data_analysis.test_code import density
+
+    density.DensityPyramid.from_store(ctx.handler.tracks)
+
+
+@benchmark("heat/heat_bins")
+def heat_bins(ctx):
+    ctx.handler.heat_bins(zoom=10)
+
+
+# Data tables: the per-tag summary and one page of the longest track
+
+@benchmark("tables/summary")
+def tables_summary(ctx):
+    ctx.handler._summary = None
+    ctx.handler.summary
+
+
+@benchmark("tables/page")
+def tables_page(ctx):
+    tag = ctx.track["name"].iloc[0]
+    ctx.handler.page(tag, len(ctx.track) // 1000, 500).to_json()
+
+
+# Timelapse layout of a single track as long as the dataset, at the page's default settings
+
+@benchmark("timelapse/build_frames", max_rows=10 ** 6)
+def timelapse_frames(ctx):
+    from data_analysis.test_code import timelapse
+
+    frames = timelapse.build_cumulative_frames(ctx.single_track())
+    if len(frames) > max(timelapse.MAX_POINTS, ctx.rows + 200):
+        raise RuntimeError(f"timelapse layout has {len(frames)} rows for {ctx.rows} fixes")
+
+
+# Export
+
+@benchmark("export/csv_to_geojson", max_rows=10 ** 6)
+def geojson(ctx):
+    ctx.handler.csv_to_geojson(ctx.handler.raw_df)
+
+
+# Pages: a full script run through Streamlit's test harness, including building the Plotly figures
+
+def _run_page(ctx, page):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(ROOT, page), default_timeout=600).run()
+    if app.exception:
+        raise RuntimeError(f"{page}: {app.exception[0].value}")
+
+
+@benchmark("pages/Data_Visualization", max_rows=IN_MEMORY_ROWS)
+def page_visualization(ctx):
+    _run_page(ctx, "Data_Visualization.py")
+
+
+@benchmark("pages/Timelapse", max_rows=IN_MEMORY_ROWS)
+def page_timelapse(ctx):
+    _run_page(ctx, os.path.join("pages", "Timelapse.py"))
+
+
+@benchmark("pages/Data_Tables", max_rows=IN_MEMORY_ROWS)
+def page_tables(ctx):
+    _run_page(ctx, os.path.join("pages", "Data_Tables.py"))
+
+
+def time_benchmark(func, ctx, repeat):
+    times = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func(ctx)
+            times.append(time.perf_counter() - start)
+    return {"min": min(times), "median": statistics.median(times), "repeat": repeat}
+
+
+def run_suite(sizes, tags, repeat, only=None):
+    """
+    Run every registered benchmark at every size.
+
+    Returns:
+        dict: {size: {benchmark name: {'min', 'median', 'repeat'}}}.
+    """
+    results = {}
+    default_study = catalog.CATALOG.default
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            csv_path = write_synthetic_csv(os.path.join(tmp, f"synthetic_{rows}.csv"), rows, tags)
+            ctx = Context(csv_path, rows)
+            # The pages load the default study; point them at this size's file
+            catalog.CATALOG.register("synthetic", csv_path)
+            catalog.CATALOG.default = "synthetic"
+            if rows <= IN_MEMORY_ROWS:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    catalog.CATALOG.get()
+            results[str(rows)] = {}
+            for name, func, max_rows, fixed_repeat in BENCHMARKS:
+                if only and not any(name.startswith(prefix) for prefix in only):
+                    continue
+                if max_rows is not None and rows > max_rows:
+                    continue
+                result = time_benchmark(func, ctx, fixed_repeat or repeat)
+                results[str(rows)][name] = result
+                print(f"{rows:>10} {name:<58} {result['min'] * 1000:>10.1f} ms")
+            os.remove(csv_path)
+    catalog.CATALOG.unregister("synthetic")
+    catalog.CATALOG.default = default_study
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the benchmarks that got slower than `threshold` times their baseline minimum.
+
+    Returns:
+        int: Number of regressions.
+    """
+    regressions = 0
+    for size, benchmarks in results.items():
+        for name, result in benchmarks.items():
+            old = baseline.get(size, {}).get(name)
+            if old is None:
+                continue
+            ratio = result["min"] / old["min"]
+            if ratio > threshold:
+                regressions += 1
+                print(f"REGRESSION {size:>10} {name:<58} {old['min'] * 1000:.1f} -> {result['min'] * 1000:.1f} ms ({ratio:.2f}x)")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1e3,1e4,1e5", help="Comma-separated numbers of fixes, from 1e3 up to 1e8")
+    parser.add_argument("--tags", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", default=None, help="Comma-separated benchmark name prefixes")
+    parser.add_argument("--json", default=None, help="Write the results to this file")
+    parser.add_argument("--compare", default=None, help="Compare with the results in this file")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    sizes = [int(float(size)) for size in args.sizes.split(",")]
+    only = args.only.split(",") if args.only else None
+    results = run_suite(sizes, args.tags, args.repeat, only)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"environment": {"python": sys.version.split()[0], "pandas": pd.__version__, "cpus": os.cpu_count()},
+                       "results": results}, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        sys.exit(1 if compare(results, baseline, args.threshold) else 0)
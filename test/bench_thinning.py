@@ -0,0 +1,60 @@
+"""
+Benchmark the vectorized thinning engine in dataHandler.processData against the
+original per-row geodesic loop, and check that both select exactly the same fixes.
+
+Run from the top level directory:
+
+    python test/bench_thinning.py
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+from geopy.distance import geodesic
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from data_analysis.test_code.data_handler import dataHandler
+
+
+def legacy_process(raw_df, time_interval=pd.Timedelta(hours=5), min_distance=75):
+    # The original processData loop, kept verbatim as the reference implementation except
+    # for stable sorts: quicksort leaves tied timestamps (e.g. tags whose first fixes share a
+    # time) in an arbitrary order, and both loading paths keep ties in CSV row order
+    df = raw_df.sort_values(by='timestamp', kind='stable')
+    new_df = df[['location-long', 'location-lat', 'tag-local-identifier', 'timestamp']]
+    unique_dfs = {}
+    for unique_name in df['tag-local-identifier'].unique():
+        group = new_df[new_df['tag-local-identifier'] == unique_name].sort_values(by='timestamp', kind='stable')
+        group.rename(columns={"tag-local-identifier": "name"}, inplace=True)
+        filtered_group = [group.iloc[0]]
+        for i in range(1, len(group)):
+            if group.iloc[i]['timestamp'] - filtered_group[-1]['timestamp'] >= time_interval and geodesic(
+                    (group.iloc[i]['location-lat'], group.iloc[i]['location-long']),
+                    (filtered_group[-1]['location-lat'], filtered_group[-1]['location-long'])).meters > min_distance:
+                filtered_group.append(group.iloc[i])
+        unique_dfs[unique_name] = pd.DataFrame(filtered_group)
+    return unique_dfs
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    myDH = dataHandler()
+
+    for interval_hours, min_distance in [(5, 75), (1, 10), (12, 500)]:
+        interval = pd.Timedelta(hours=interval_hours)
+        expected, legacy_time = timed(legacy_process, myDH.raw_df, interval, min_distance)
+        (_, actual), new_time = timed(myDH.processData, interval, min_distance)
+
+        assert list(expected) == list(actual), "tag order differs"
+        for name in expected:
+            pd.testing.assert_frame_equal(expected[name], actual[name].astype({"name": object}), check_dtype=False)
+
+        rows = sum(len(df) for df in actual.values())
+        print(f"{interval_hours}h / {min_distance}m: {rows} fixes kept, "
+              f"legacy {legacy_time:.2f}s, vectorized {new_time:.3f}s ({legacy_time / new_time:.0f}x)")
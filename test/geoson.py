@@ -1,6 +1,12 @@
+import os
+import sys
+
 import pandas as pd
 import folium
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from data_analysis.test_code import export
+
 # Example DataFrame
 df = pd.DataFrame({
     'latitude': [37.7749, 34.0522, 40.7128],
@@ -10,18 +16,7 @@ df = pd.DataFrame({
 
 # Convert DataFrame to GeoJSON
 def df_to_geojson(df, lat='latitude', lon='longitude', properties=None):
-    geojson = {"type": "FeatureCollection", "features": []}
-    for _, row in df.iterrows():
-        feature = {
-            "type": "Feature",
-            "geometry": {
-                "type": "Point",
-                "coordinates": [row[lon], row[lat]]
-            },
-            "properties": {prop: row[prop] for prop in properties or []}
-        }
-        geojson["features"].append(feature)
-    return geojson
+    return export.to_geojson(df, properties=properties, lat=lat, lon=lon)
 
 geojson_data = df_to_geojson(df, lat='latitude', lon='longitude', properties=['info'])
 
@@ -0,0 +1,128 @@
+"""
+Cold-start profile of the Streamlit entry points, from `python -X importtime`.
+
+For each page, its top-level imports run in a fresh interpreter under -X importtime
+(a few times, keeping the fastest run); the page fails if they take longer than the
+budget. The page is then rendered once with streamlit's AppTest, also in a fresh
+interpreter, and fails if that loads any of the heavy optional dependencies in HEAVY:
+those should only load when a feature that needs them is used.
+
+Run from the top level directory:
+
+    python test/import_budget.py
+    python test/import_budget.py --budget 1500 --top 15 Data_Visualization.py
+
+Exits with status 1 if any page is over budget or loads a heavy dependency.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+PAGES = [
+    "Data_Visualization.py",
+    os.path.join("pages", "Data_Tables.py"),
+    os.path.join("pages", "Timelapse.py"),
+    os.path.join("pages", "99_Diagnostics.py"),
+]
+
+# Packages no page needs to render; they load on first use of the analysis that needs them
+HEAVY = ["sklearn", "scipy", "matplotlib", "geopy", "tabulate", "folium", "geopandas"]
+
+# Milliseconds the imports of one entry point may take
+BUDGET_MS = 1500
+
+RENDER = """
+import json, sys
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=600).run()
+print(json.dumps({"exceptions": [str(e.value) for e in at.exception], "modules": sorted({m.split('.')[0] for m in sys.modules})}))
+"""
+
+
+def _run(args):
+    # The diagnostics page renders in full only when opted into
+    env = dict(os.environ, TRACKING_DIAGNOSTICS="1", PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    return subprocess.run([sys.executable] + args, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+def page_imports(page):
+    """
+    Return the top-level import statements of a page script as source code.
+    """
+    with open(os.path.join(ROOT, page)) as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def import_profile(source):
+    """
+    Run `source` in a fresh interpreter with -X importtime.
+
+    Returns:
+        list: (self microseconds, cumulative microseconds, nesting depth, module) per import,
+            in the order they finished.
+    """
+    stderr = _run(["-X", "importtime", "-c", source]).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(own), int(cumulative), depth, name.strip()))
+    return rows
+
+
+def render_modules(page):
+    """
+    Render a page in a fresh interpreter; return its exceptions and the top-level packages it loaded.
+    """
+    result = json.loads(_run(["-c", RENDER, page]).stdout.strip().splitlines()[-1])
+    return result["exceptions"], result["modules"]
+
+
+def check_page(page, budget_ms, repeat, top):
+    """
+    Profile one page and print its report.
+
+    Returns:
+        bool: Whether the page is within budget and loads no heavy dependency.
+    """
+    source = page_imports(page)
+    # Modules a bare interpreter imports at startup (site, encodings, ...) are not the page's
+    startup = {row[3] for row in import_profile("pass")}
+    runs = [[row for row in import_profile(source) if row[3] not in startup] for _ in range(repeat)]
+    totals = [sum(row[1] for row in rows if row[2] == 0) / 1000 for rows in runs]
+    best = runs[totals.index(min(totals))]
+    print(f"{page}: imports {min(totals):.0f} ms (budget {budget_ms:.0f} ms)")
+    # The page's own imports and the project modules they pull in
+    shown = [row for row in best if row[2] == 0 or row[3].startswith("data_analysis")]
+    for own, cumulative, depth, name in sorted(shown, key=lambda row: -row[1])[:top]:
+        print(f"    {cumulative / 1000:>8.1f} ms cumulative {own / 1000:>7.1f} ms self  {name}")
+
+    exceptions, modules = render_modules(page)
+    loaded = [name for name in HEAVY if name in modules]
+    for error in exceptions:
+        print(f"    render error: {error}")
+    if loaded:
+        print(f"    rendering loaded heavy dependencies: {', '.join(loaded)}")
+    return min(totals) <= budget_ms and not loaded and not exceptions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*", default=PAGES, help="Page scripts, relative to the top level directory")
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, help="Import budget per page in milliseconds")
+    parser.add_argument("--repeat", type=int, default=3, help="Import runs per page; the fastest counts")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest top-level and project imports to list")
+    args = parser.parse_args()
+
+    failed = [page for page in args.pages if not check_page(page, args.budget, args.repeat, args.top)]
+    if failed:
+        print(f"Over budget or loading heavy dependencies: {', '.join(failed)}")
+        sys.exit(1)
@@ -0,0 +1,98 @@
+"""
+Generate synthetic Movebank-style GPS tracks for benchmarks. The files have the same
+columns as the red fox study: every tag does a random walk with fixes roughly every
+`step` apart, and rows are written in time order as a live collar feed would deliver them.
+
+Run from the top level directory, e.g. to write one million fixes over 50 tags:
+
+    python test/synthetic.py /tmp/synthetic.csv --rows 1000000 --tags 50
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = [
+    'event-id', 'visible', 'timestamp', 'location-long', 'location-lat', 'gps:fix-type',
+    'gps:fix-type-raw', 'gps:hdop', 'gps:satellite-count', 'sensor-type',
+    'individual-taxon-canonical-name', 'tag-local-identifier', 'individual-local-identifier', 'study-name',
+]
+
+
+def synthetic_tracks(rows, tags=20, start='2020-01-01', step='2h', seed=0, origin=(57.9, -92.8)):
+    """
+    Return a DataFrame of synthetic fixes in Movebank column layout.
+
+    Args:
+        rows (int): Total number of fixes.
+        tags (int): Number of tags the fixes are spread over.
+        start (str): Time of the first fix.
+        step (str): Typical gap between a tag's fixes.
+        seed (int): Random seed.
+        origin (tuple): (lat, long) around which the tags start.
+    """
+    rng = np.random.default_rng(seed)
+    tag = rng.integers(0, tags, rows)
+    # Fix times: each row advances the study clock by step / tags on average, with jitter
+    step_ns = pd.Timedelta(step).value / tags
+    times = pd.Timestamp(start).value + np.cumsum(rng.exponential(step_ns, rows)).astype(np.int64)
+
+    # Random walk per tag: ~200 m steps, occasionally resting in place
+    moving = rng.random(rows) > 0.3
+    d_lat = rng.normal(0, 0.002, rows) * moving
+    d_lon = rng.normal(0, 0.004, rows) * moving
+    order = np.argsort(tag, kind='stable')
+    lat = np.empty(rows)
+    lon = np.empty(rows)
+    boundaries = np.flatnonzero(np.diff(tag[order])) + 1
+    for group in np.split(order, boundaries):
+        if len(group):
+            t = tag[group[0]]
+            lat[group] = origin[0] + 0.05 * (t % 7) + np.cumsum(d_lat[group])
+            lon[group] = origin[1] + 0.05 * (t // 7) + np.cumsum(d_lon[group])
+
+    names = np.array([f'T{i:05d}' for i in range(tags)], dtype=object)
+    return pd.DataFrame({
+        'event-id': np.arange(rows, dtype=np.int64) + 10 ** 10,
+        'visible': True,
+        'timestamp': pd.to_datetime(times).strftime('%Y-%m-%d %H:%M:%S.000'),
+        'location-long': lon.round(6),
+        'location-lat': lat.round(6),
+        'gps:fix-type': 2,
+        'gps:fix-type-raw': 'Resolved QFP',
+        'gps:hdop': rng.uniform(0.6, 3.0, rows).round(1),
+        'gps:satellite-count': rng.integers(4, 12, rows),
+        'sensor-type': 'gps',
+        'individual-taxon-canonical-name': 'Vulpes vulpes',
+        'tag-local-identifier': names[tag],
+        'individual-local-identifier': names[tag],
+        'study-name': 'Synthetic study',
+    }, columns=COLUMNS)
+
+
+def write_synthetic_csv(path, rows, tags=20, chunk=500_000, seed=0, **kwargs):
+    """
+    Write synthetic fixes to a CSV in chunks, so files larger than memory can be generated.
+    Each chunk continues the previous one in time; tracks restart near their origin.
+    """
+    start = pd.Timestamp(kwargs.pop('start', '2020-01-01'))
+    written = 0
+    with open(path, 'w') as f:
+        while written < rows:
+            n = min(chunk, rows - written)
+            df = synthetic_tracks(n, tags, start=start, seed=seed + written, **kwargs)
+            df['event-id'] += written
+            df.to_csv(f, index=False, header=written == 0)
+            start = pd.Timestamp(df['timestamp'].iloc[-1]) + pd.Timedelta(seconds=1)
+            written += n
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--tags', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_synthetic_csv(args.path, args.rows, args.tags, seed=args.seed)